@@ -0,0 +1,234 @@
+""" Checkpoint journal of the batch export for the resume after a crash
+
+Each run writes its progress to <CSV name>.journal.jsonl next to the CSV file. The journal is only appended
+and each record is flushed to the disk, so it survives a crash of Allplan:
+
+    {"type": "run", "run_id": "...", "csv_hash": "...", "time": "...", "resumed_from": ""}
+    {"type": "row", "row_index": 3, "row_key": "...", "status": "exported", "sha256": "", "completed": false}
+    {"type": "row", "row_index": 3, "row_key": "...", "status": "ok", "sha256": "...", "completed": true}
+    {"type": "recycled", "run_id": "...", "reason": "..."}
+    {"type": "finished", "run_id": "..."}
+
+An exported row is completed after the exported file is verified and published. When the same CSV file is
+started again and the journal has no "finished" record, the completed rows are skipped. The rows are
+identified by the SHA-256 of the CSV file and the row index and key, so an edited CSV file starts a new run.
+A run which ended its session to continue in a new Allplan process writes a "recycled" record instead of
+"finished", the new process resumes the run in the same way.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+import datetime
+import json
+import os
+
+
+def is_recycled(journal_file: str) -> bool:
+    """ Check, whether the last run of a journal ended by recycling its session
+
+    Args:
+        journal_file: path of the JSON lines journal file
+
+    Returns:
+        True, if the last record is a "recycled" record
+    """
+
+    last_type = ""
+
+    try:
+        with open(journal_file, "r", encoding = "UTF-8") as file:
+            for line in file:
+                try:
+                    last_type = json.loads(line).get("type", "")
+
+                except (ValueError, AttributeError):
+                    continue
+
+    except OSError:
+        return False
+
+    return last_type == "recycled"
+
+
+class CheckpointJournal():
+    """ Definition of class CheckpointJournal
+    """
+
+    def __init__(self,
+                 journal_file: str):
+        """ Initialization of class CheckpointJournal
+
+        Args:
+            journal_file: path of the JSON lines journal file
+        """
+
+        self.journal_file = journal_file
+        self.resumed_from = ""
+
+        self.completed: Dict[Tuple[int, str], bool] = {}
+
+        self.file: Optional[TextIO] = None
+
+
+    def read(self,
+             csv_hash: str) -> str:
+        """ Read the journal of an interrupted run of the same CSV file
+
+        A truncated last record, written during the crash, is ignored.
+
+        Args:
+            csv_hash: SHA-256 of the CSV file
+
+        Returns:
+            ID of the interrupted run, empty if the previous run was finished or the CSV file changed
+        """
+
+        run_id = ""
+
+        self.completed = {}
+
+        try:
+            with open(self.journal_file, "r", encoding = "UTF-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+
+                    except ValueError:
+                        continue
+
+                    if record.get("type") == "run":
+                        if record.get("csv_hash") != csv_hash:
+                            run_id = ""
+                            break
+
+                        run_id = record.get("run_id", "")
+
+                    elif record.get("type") == "row":
+                        self.completed[record["row_index"], record["row_key"]] = record.get("completed", False)
+
+                    elif record.get("type") == "finished":
+                        run_id = ""
+
+        except (OSError, KeyError, TypeError):
+            run_id = ""
+
+        if not run_id:
+            self.completed = {}
+
+        return run_id
+
+
+    def open(self,
+             run_id  : str,
+             csv_hash: str,
+             restart : bool) -> bool:
+        """ Open the journal, the journal of an interrupted run is continued, otherwise a new journal is started
+
+        Args:
+            run_id:   ID of the run
+            csv_hash: SHA-256 of the CSV file
+            restart:  start a new journal also after an interrupted run
+
+        Returns:
+            True, if an interrupted run is resumed
+        """
+
+        self.resumed_from = "" if restart else self.read(csv_hash)
+
+        self.file = open(self.journal_file, "a" if self.resumed_from else "w",      # pylint: disable=consider-using-with
+                         encoding = "UTF-8")
+
+        self.write("run", run_id = run_id, csv_hash = csv_hash,
+                   time = datetime.datetime.now().isoformat(timespec = "seconds"), resumed_from = self.resumed_from)
+
+        return bool(self.resumed_from)
+
+
+    def close(self):
+        """ Close the journal
+        """
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+    def is_completed(self,
+                     row_index: int,
+                     row_key  : str) -> bool:
+        """ Check, whether a row was completed in the interrupted run
+
+        Args:
+            row_index: index of the row in the CSV file
+            row_key:   key of the row
+
+        Returns:
+            True, if the row was completed
+        """
+
+        return self.completed.get((row_index, row_key), False)
+
+
+    def write(self,
+              record_type: str,
+              **values   : Any):
+        """ Write a record, the record is flushed to the disk
+
+        Args:
+            record_type: type of the record
+            values:      values of the record
+        """
+
+        if not self.file:
+            return
+
+        self.file.write(json.dumps({"type": record_type, **values}) + "\n")
+        self.file.flush()
+
+        os.fsync(self.file.fileno())
+
+
+    def write_row(self,
+                  row_index: int,
+                  row_key  : str,
+                  status   : str,
+                  sha256   : str,
+                  completed: bool):
+        """ Write the status of a row
+
+        Args:
+            row_index: index of the row in the CSV file
+            row_key:   key of the row
+            status:    status of the row or of the verification of the exported file
+            sha256:    SHA-256 of the exported file, empty if not verified
+            completed: the row doesn't need to be exported again after a crash
+        """
+
+        self.write("row", row_index = row_index, row_key = row_key, status = status, sha256 = sha256,
+                   completed = completed)
+
+
+    def recycle(self,
+                run_id: str,
+                reason: str):
+        """ Mark the run as recycled, the run is resumed by a new Allplan process
+
+        Args:
+            run_id: ID of the run
+            reason: reason of the recycling
+        """
+
+        self.write("recycled", run_id = run_id, reason = reason)
+
+
+    def finish(self,
+               run_id: str):
+        """ Mark the run as finished, the next start of the CSV file exports all rows again
+
+        Args:
+            run_id: ID of the run
+        """
+
+        self.write("finished", run_id = run_id)
@@ -0,0 +1,563 @@
+""" Coordinator for the export by several Allplan instances
+
+The rows of the CSV file are split into shards. All rows of a project are in the same shard, so that two
+instances never open the same drawing files. Each shard is written as CSV file next to the original one
+and exported by its own Allplan instance with the command line of a scheduled export:
+
+    Allplan_2026.exe -o "@<path>\\IFCExportByFileList.pyp" "<path>\\IFCExport.shard01.csv" [options]
+
+With --history, the path of the run history of the instances, the projects are distributed by their
+estimated duration from the run history instead of their number of rows. The option is also passed to each
+instance.
+
+An instance which recycles its session, see --recycle-rows and --recycle-memory, is started again by the
+coordinator with the same shard and resumes the shard from its journal.
+
+Each shard starts with a copy of the manifest of the original CSV file. After all instances are finished,
+the manifests of the shards are merged into the manifest of the original CSV file, so an unchanged row is
+skipped in the next run, even if it is in another shard. The logs, error reports, event logs, pre-flight
+reports and status files of the shards are merged, the journals and metrics of the shards are removed.
+
+Usage:
+
+    python -m allplan_gmbh.BatchExport.Coordinator <csv file> --allplan <Allplan exe> --pyp <pyp file>
+                                                   [--instances N] [--timeout seconds] [--history <sqlite file>]
+                                                   [export options]
+
+Unknown options, e.g. --force, are passed to each instance. Instead of Allplan, any executable with the
+same command line can be used, e.g. benchmarks\\AllplanStandIn.py for a test of the coordinator with the
+simulated Allplan API. A Python script is started with the Python interpreter of the coordinator.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+
+from .CheckpointJournal import is_recycled
+from .ExportJob import get_export_type, get_settings_path, read_jobs
+from .ExportManifest import ExportManifest
+from .ExportOptions import parse_command_line
+from .RowExpansion import expand_jobs
+from .RunHistory import RunHistory, get_history_key
+
+
+POLL_INTERVAL = 0.5
+
+
+def read_rows(csv_file: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """ Read the rows of the CSV file, the column names are stripped like by ExportJob.read_rows
+
+    Bytes which are not UTF-8 are kept as surrogates and written unchanged to the shards, the row is reported
+    by the instance of its shard.
+
+    Args:
+        csv_file: path of the CSV file
+
+    Returns:
+        column names,
+        rows
+    """
+
+    with open(csv_file, "r", encoding = "utf-8-sig", errors = "surrogateescape", newline = "") as file:
+        reader = csv.DictReader(file)
+
+        fieldnames = [name.strip() for name in reader.fieldnames or []]
+
+        reader.fieldnames = fieldnames
+
+        return fieldnames, list(reader)
+
+
+def estimate_rows(csv_file    : str,
+                  history_file: str,
+                  row_count   : int) -> Optional[List[float]]:
+    """ Estimate the duration of the rows of the CSV file by the run history
+
+    A split row is estimated by the sum of its sub-jobs. Rows without estimate, e.g. invalid rows or rows
+    without history of their format, are estimated by the average of the estimated rows.
+
+    Args:
+        csv_file:     path of the CSV file
+        history_file: path of the run history
+        row_count:    number of rows of the CSV file
+
+    Returns:
+        estimated duration of each row in seconds, None if the history is not available or has no estimates
+    """
+
+    history = RunHistory(history_file)
+
+    try:
+        history.open()
+
+    except sqlite3.Error:
+        return None
+
+    finally:
+        history.close()
+
+    estimates: List[Optional[float]] = [None] * row_count
+
+    jobs = read_jobs(csv_file, get_settings_path(csv_file), get_export_type(csv_file), "",
+                     lambda *args, **kwargs: None)
+
+    for job in expand_jobs(jobs, lambda *args, **kwargs: None):
+        estimate = history.estimate(get_history_key(job.host_name, job.project_name, job.file_numbers,
+                                                    job.export_favorite_file, job.export_type, job.version,
+                                                    job.filename), len(job.file_numbers))
+
+        if estimate is not None and 0 < job.row_index <= row_count:
+            estimates[job.row_index - 1] = (estimates[job.row_index - 1] or 0.0) + estimate
+
+    if not (known := [estimate for estimate in estimates if estimate is not None]):
+        return None
+
+    average = sum(known) / len(known)
+
+    return [estimate if estimate is not None else average for estimate in estimates]
+
+
+def partition_by_project(rows     : Sequence[Dict[str, str]],
+                         instances: int,
+                         estimates: Optional[Sequence[float]] = None) -> List[List[Dict[str, str]]]:
+    """ Partition the rows by project into shards with about the same duration
+
+    The projects are assigned to the shards from the longest to the shortest, always to the shard with the
+    shortest duration. Without estimates, the duration of a project is its number of rows. The rows of a
+    shard keep the order of the CSV file.
+
+    Args:
+        rows:      rows of the CSV file
+        instances: number of shards
+        estimates: estimated duration of each row, None for the number of rows
+
+    Returns:
+        rows of each shard, empty shards are removed
+    """
+
+    projects: Dict[Tuple[str, str], List[int]] = {}
+
+    for index, row in enumerate(rows):
+        projects.setdefault((row.get("hostName", ""), row.get("projectName", "")), []).append(index)
+
+    def get_duration(indices: List[int]) -> float:
+        """ get the estimated duration of rows
+
+        Args:
+            indices: indices of the rows
+
+        Returns:
+            estimated duration
+        """
+
+        return sum(estimates[index] for index in indices) if estimates else float(len(indices))
+
+    shards: List[List[int]] = [[] for _ in range(max(instances, 1))]
+
+    for indices in sorted(projects.values(), key = get_duration, reverse = True):
+        min(shards, key = get_duration).extend(indices)
+
+    return [[rows[index] for index in sorted(shard)] for shard in shards if shard]
+
+
+def get_shard_file(csv_file   : str,
+                   shard_index: int) -> str:
+    """ Get the path of the CSV file of a shard
+
+    Args:
+        csv_file:    path of the original CSV file
+        shard_index: index of the shard
+
+    Returns:
+        path of the CSV file of the shard
+    """
+
+    return os.path.splitext(csv_file)[0] + f".shard{shard_index + 1:02d}.csv"
+
+
+def write_shards(csv_file  : str,
+                 fieldnames: List[str],
+                 shards    : List[List[Dict[str, str]]]) -> List[str]:
+    """ Write the CSV files of the shards next to the original CSV file
+
+    The setting files are found relative to the CSV file, so the shards must be in the same folder.
+
+    Args:
+        csv_file:   path of the original CSV file
+        fieldnames: column names
+        shards:     rows of each shard
+
+    Returns:
+        paths of the CSV files of the shards
+    """
+
+    shard_files = []
+
+    for shard_index, shard_rows in enumerate(shards):
+        shard_file = get_shard_file(csv_file, shard_index)
+
+        with open(shard_file, "w", encoding = "UTF-8", errors = "surrogateescape", newline = "") as file:
+            writer = csv.DictWriter(file, fieldnames, extrasaction = "ignore")
+            writer.writeheader()
+            writer.writerows(shard_rows)
+
+        shard_files.append(shard_file)
+
+    return shard_files
+
+
+def get_shard_manifests(csv_file: str) -> List[str]:
+    """ Get the manifests of the shards of a CSV file, also the ones left by an interrupted coordinator
+
+    Args:
+        csv_file: path of the original CSV file
+
+    Returns:
+        paths of the manifests of the shards
+    """
+
+    return sorted(glob.glob(glob.escape(os.path.splitext(csv_file)[0]) + ".shard*.manifest.json"))
+
+
+def merge_manifests(manifest_file       : str,
+                    shard_manifest_files: Sequence[str]):
+    """ Merge the manifests of the shards into the manifest of the original CSV file
+
+    A shard manifest starts as copy of the original manifest: a row changed by the shard is taken, a row
+    removed by the shard, e.g. because its exported file was invalid, is removed. The manifests of the shards
+    are removed after merging.
+
+    Args:
+        manifest_file:        path of the manifest of the original CSV file
+        shard_manifest_files: paths of the manifests of the shards
+    """
+
+    manifest = ExportManifest(manifest_file)
+
+    original_rows = dict(manifest.rows)
+
+    for shard_manifest_file in shard_manifest_files:
+        if not os.path.isfile(shard_manifest_file):
+            continue
+
+        shard_rows = ExportManifest(shard_manifest_file).rows
+
+        for row_key in original_rows.keys() - shard_rows.keys():
+            manifest.rows.pop(row_key, None)
+
+        manifest.rows.update({row_key: entry for row_key, entry in shard_rows.items()
+                              if entry != original_rows.get(row_key)})
+
+    manifest.write()
+
+    for shard_manifest_file in shard_manifest_files:
+        try:
+            os.remove(shard_manifest_file)
+
+        except OSError:
+            pass
+
+
+def prepare_manifests(csv_file   : str,
+                      shard_files: List[str]):
+    """ Start the manifest of each shard as copy of the manifest of the original CSV file
+
+    The manifests left by an interrupted coordinator are merged first, so their exported rows are skipped,
+    although the rows may be in other shards now.
+
+    Args:
+        csv_file:    path of the original CSV file
+        shard_files: paths of the CSV files of the shards
+    """
+
+    manifest_file = os.path.splitext(csv_file)[0] + ".manifest.json"
+
+    if (shard_manifest_files := get_shard_manifests(csv_file)):
+        merge_manifests(manifest_file, shard_manifest_files)
+
+    if not os.path.isfile(manifest_file):
+        return
+
+    for shard_file in shard_files:
+        shutil.copyfile(manifest_file, os.path.splitext(shard_file)[0] + ".manifest.json")
+
+
+def run_instances(allplan_exe: str,
+                  pyp_file   : str,
+                  shard_files: List[str],
+                  extra_args : List[str],
+                  timeout    : float) -> List[Dict[str, Any]]:
+    """ Run one Allplan instance for each shard and wait until all are finished
+
+    An instance which ended by recycling its session is started again and resumes its shard.
+
+    Args:
+        allplan_exe: path of the Allplan executable
+        pyp_file:    path of the PythonPart of the export
+        shard_files: paths of the CSV files of the shards
+        extra_args:  additional arguments for each instance
+        timeout:     maximum run time of all instances in seconds, 0 for no limit
+
+    Returns:
+        result of each instance
+    """
+
+    start_time = time.monotonic()
+
+    def start_instance(shard_file: str,
+                       resume    : bool) -> subprocess.Popen:
+        """ start the Allplan instance of a shard, the instance doesn't relaunch itself
+
+        Args:
+            shard_file: path of the CSV file of the shard
+            resume:     resume the recycled run of the shard, --restart is removed
+
+        Returns:
+            process of the instance
+        """
+
+        arguments = [argument for argument in extra_args if not resume or argument != "--restart"]
+
+        command = [sys.executable, allplan_exe] if allplan_exe.lower().endswith(".py") else [allplan_exe]
+
+        return subprocess.Popen([*command, "-o", "@" + pyp_file, shard_file, *arguments, "--no-relaunch"])
+
+    processes = [start_instance(shard_file, False) for shard_file in shard_files]
+
+    results: List[Dict[str, Any]] = [{"shard_file" : shard_file,
+                                      "status"     : "running",
+                                      "return_code": None,
+                                      "recycles"   : 0,
+                                      "duration"   : 0.0} for shard_file in shard_files]
+
+    while any(result["status"] == "running" for result in results):
+        duration = time.monotonic() - start_time
+
+        for index, (process, result) in enumerate(zip(processes, results)):
+            if result["status"] != "running":
+                continue
+
+            if process.poll() is None:
+                if not timeout or duration < timeout:
+                    continue
+
+                process.kill()
+                process.wait()
+
+                result["status"] = "timeout"
+
+            elif is_recycled(os.path.splitext(result["shard_file"])[0] + ".journal.jsonl"):
+                processes[index] = start_instance(result["shard_file"], True)
+
+                result["recycles"] += 1
+                continue
+
+            else:
+                result["status"] = "finished"
+
+            result["return_code"] = process.returncode
+            result["duration"]    = round(duration, 3)
+
+        time.sleep(POLL_INTERVAL)
+
+    return results
+
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    """ Read and remove a JSON report of a shard
+
+    Args:
+        path: path of the JSON file
+
+    Returns:
+        content of the file, None if it is missing or invalid
+    """
+
+    try:
+        with open(path, "r", encoding = "UTF-8") as file:
+            content = json.load(file)
+
+        os.remove(path)
+
+    except (OSError, ValueError):
+        return None
+
+    return content if isinstance(content, dict) else None
+
+
+def remove_files(paths: Sequence[str]):
+    """ Remove files, missing files are ignored
+
+    Args:
+        paths: paths of the files
+    """
+
+    for path in paths:
+        try:
+            os.remove(path)
+
+        except OSError:
+            pass
+
+
+def merge_results(csv_file   : str,
+                  shard_files: List[str],
+                  results    : List[Dict[str, Any]],
+                  metrics_dir: str = ""):
+    """ Merge the reports of the shards and write the result of the coordinator
+
+    The logs, error reports, event logs, pre-flight reports, status files and manifests of the shards are
+    merged into the ones of the original CSV file, the events are appended to its event log. The rows in
+    the merged reports keep their row index in the shard together with the shard file. The CSV files,
+    journals and metrics of the shards are removed.
+
+    Args:
+        csv_file:    path of the original CSV file
+        shard_files: paths of the CSV files of the shards
+        results:     result of each instance
+        metrics_dir: folder of the metrics files given by --metrics-dir, empty for the folder of the CSV file
+    """
+
+    report_path = os.path.splitext(csv_file)[0]
+
+    errors   : List[Dict[str, Any]] = []
+    preflight: Dict[str, Any]       = {"csv_file": csv_file, "valid_rows": 0, "invalid_rows": 0, "rows": []}
+    statuses : List[Dict[str, Any]] = []
+
+    with open(report_path + ".log", "w", encoding = "UTF-8") as log_file, \
+         open(report_path + ".events.jsonl", "a", encoding = "UTF-8") as event_file:
+        for shard_file, result in zip(shard_files, results):
+            shard_path = os.path.splitext(shard_file)[0]
+
+            log_file.write("=============================================================\n")
+            log_file.write("Shard:          " + shard_file + "\n")
+            log_file.write("Status:         " + result["status"] + ", return code " + str(result["return_code"]) + "\n")
+            log_file.write("=============================================================\n")
+
+            try:
+                with open(shard_path + ".log", "r", encoding = "UTF-8") as shard_log:
+                    log_file.write(shard_log.read())
+
+                os.remove(shard_path + ".log")
+
+            except OSError:
+                log_file.write("No log file written\n")
+
+            if (shard_errors := read_json(shard_path + ".errors.json")) is not None:
+                errors.extend(dict(error, shard_file = shard_file) for error in shard_errors.get("errors", []))
+
+            try:
+                with open(shard_path + ".events.jsonl", "r", encoding = "UTF-8") as shard_events:
+                    event_file.writelines(shard_events)
+
+                os.remove(shard_path + ".events.jsonl")
+
+            except OSError:
+                pass
+
+            if (shard_preflight := read_json(shard_path + ".preflight.json")) is not None:
+                preflight.setdefault("mode", shard_preflight.get("mode"))
+
+                preflight["valid_rows"]   += shard_preflight.get("valid_rows", 0)
+                preflight["invalid_rows"] += shard_preflight.get("invalid_rows", 0)
+                preflight["rows"].extend(dict(row, shard_file = shard_file) for row in shard_preflight.get("rows", []))
+
+            if (shard_status := read_json(shard_path + ".status.json")) is not None:
+                statuses.append(dict(shard_status, shard_file = shard_file))
+
+            if result["status"] != "finished":
+                errors.append({"category"  : "instance_" + result["status"],
+                               "message"   : "Allplan instance for " + shard_file + " didn't finish",
+                               "shard_file": shard_file})
+
+            remove_files([shard_file, shard_path + ".journal.jsonl",
+                          os.path.join(metrics_dir, "batch_export_" + os.path.basename(shard_path) + ".prom")
+                          if metrics_dir else shard_path + ".prom"])
+
+    merge_manifests(report_path + ".manifest.json", [os.path.splitext(shard_file)[0] + ".manifest.json"
+                                                     for shard_file in shard_files])
+
+    with open(report_path + ".errors.json", "w", encoding = "UTF-8") as file:
+        json.dump({"csv_file": csv_file, "headless": True, "errors": errors}, file, indent = 2)
+
+    with open(report_path + ".preflight.json", "w", encoding = "UTF-8") as file:
+        json.dump(preflight, file, indent = 2)
+
+    with open(report_path + ".status.json", "w", encoding = "UTF-8") as file:
+        json.dump({"csv_file": csv_file, "instances": statuses}, file, indent = 2)
+
+    with open(report_path + ".coordinator.json", "w", encoding = "UTF-8") as file:
+        json.dump({"csv_file": csv_file, "instances": results}, file, indent = 2)
+
+
+def main(argv: List[str]) -> int:
+    """ Run the coordinator
+
+    Args:
+        argv: command line arguments without the program name
+
+    Returns:
+        exit code, 0 if all instances finished
+    """
+
+    parser = argparse.ArgumentParser(prog = "Coordinator", description = "Batch export by several Allplan instances")
+
+    parser.add_argument("csv_file", help = "CSV file with the export settings")
+    parser.add_argument("--allplan", required = True, help = "path of the Allplan executable")
+    parser.add_argument("--pyp", required = True, help = "path of IFCExportByFileList.pyp or DWGExportByFileList.pyp")
+    parser.add_argument("--instances", type = int, default = max((os.cpu_count() or 2) // 2, 1),
+                        help = "number of Allplan instances")
+    parser.add_argument("--timeout", type = float, default = 0, help = "maximum run time in seconds")
+    parser.add_argument("--history", default = "",
+                        help = "run history of the instances, used to distribute the projects by their duration")
+
+    options, extra_args = parser.parse_known_args(argv)
+
+    if not os.path.isfile(options.allplan) or \
+            not (options.allplan.lower().endswith(".py") or os.access(options.allplan, os.X_OK)):
+        parser.error("the Allplan executable " + options.allplan + " doesn't exist or isn't executable")
+
+    if not os.path.isfile(options.pyp):
+        parser.error("the PythonPart " + options.pyp + " doesn't exist")
+
+    if not os.path.isfile(options.csv_file):
+        parser.error("the CSV file " + options.csv_file + " doesn't exist")
+
+    csv_file = os.path.abspath(options.csv_file)
+
+    fieldnames, rows = read_rows(csv_file)
+
+    estimates = None
+
+    if options.history:
+        extra_args = [*extra_args, "--history", options.history]
+
+        estimates = estimate_rows(csv_file, options.history, len(rows))
+
+    shard_files = write_shards(csv_file, fieldnames, partition_by_project(rows, options.instances, estimates))
+
+    prepare_manifests(csv_file, shard_files)
+
+    print(f"{len(rows)} rows in {len(shard_files)} shards" +
+          (f", {sum(estimates):.0f} s estimated" if estimates else ", no estimates in the run history"))
+
+    results = run_instances(options.allplan, options.pyp, shard_files, extra_args, options.timeout)
+
+    merge_results(csv_file, shard_files, results, parse_command_line(["Coordinator", *extra_args]).metrics_dir)
+
+    return 0 if all(result["status"] == "finished" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
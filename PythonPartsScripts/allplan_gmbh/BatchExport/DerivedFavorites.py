@@ -0,0 +1,130 @@
+""" Derived DWG export favorites with a configuration file
+
+The configuration file of a DWG export is set in the favorite (.nth) by the line
+
+    "AOConfigfile"=string:"C:\\...\\cfgSettings\\test-cfg-1.cfg"
+
+For each combination of favorite and configuration file, a copy of the favorite with this line is
+created in a cache folder. The name of the copy contains the hash of the favorite content and the path
+of the configuration file, so a copy is created once and reused by all rows and following runs. The
+original favorite is never changed. The encoding and byte order mark of the favorite are kept, a favorite
+without byte order mark is read as UTF-8 or, if it isn't valid UTF-8, like an ANSI file by the encoding of the
+locale, e.g. cp1252.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import codecs
+import hashlib
+import locale
+import os
+
+
+CONFIG_KEY = "\"AOConfigfile\""
+
+BYTE_ORDER_MARKS = ((codecs.BOM_UTF8,     "utf-8"),
+                    (codecs.BOM_UTF16_LE, "utf-16-le"),
+                    (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+_derived_cache: Dict[Tuple[str, int, int, str, str], str] = {}
+
+
+def get_encoding(content: bytes) -> Tuple[bytes, str]:
+    """ Get the encoding of a favorite from its byte order mark
+
+    Args:
+        content: content of the favorite
+
+    Returns:
+        byte order mark, empty if not existing,
+        encoding of the content after the byte order mark, without byte order mark UTF-8 or the encoding of
+        the locale for an ANSI file
+    """
+
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if content.startswith(bom):
+            return bom, encoding
+
+    try:
+        content.decode("utf-8")
+
+    except UnicodeDecodeError:
+        return b"", locale.getpreferredencoding(False)
+
+    return b"", "utf-8"
+
+
+def set_config_file(text       : str,
+                    config_file: str) -> str:
+    """ Set the configuration file in the text of a favorite
+
+    Args:
+        text:        text of the favorite
+        config_file: path of the configuration file
+
+    Returns:
+        text with the changed configuration file, unchanged if the favorite contains no configuration file
+    """
+
+    lines = text.splitlines(keepends = True)
+
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith(CONFIG_KEY):
+            line_end = line[len(line.rstrip("\r\n")):]
+
+            lines[index] = f"{CONFIG_KEY}=string:\"{config_file}\"{line_end}"
+
+    return "".join(lines)
+
+
+def get_derived_favorite(favorite_file: str,
+                         config_file  : str,
+                         cache_path   : str) -> str:
+    """ Get the copy of a favorite with the configuration file, the copy is created if not existing
+
+    Args:
+        favorite_file: path of the DWG export favorite
+        config_file:   path of the configuration file
+        cache_path:    folder of the derived favorites
+
+    Returns:
+        path of the derived favorite
+    """
+
+    stat = os.stat(favorite_file)
+
+    key = (os.path.normcase(os.path.abspath(favorite_file)), stat.st_mtime_ns, stat.st_size, config_file, cache_path)
+
+    if (derived_file := _derived_cache.get(key)) is not None and os.path.isfile(derived_file):
+        return derived_file
+
+    with open(favorite_file, "rb") as file:
+        content = file.read()
+
+    derived_hash = hashlib.sha256(content + b"\0" + os.path.normcase(config_file).encode("UTF-8")).hexdigest()
+
+    name = os.path.splitext(os.path.basename(favorite_file))[0]
+
+    derived_file = os.path.join(cache_path, f"{name}.{derived_hash[:16]}.nth")
+
+    if not os.path.isfile(derived_file):
+        bom, encoding = get_encoding(content)
+
+        #----------------- bytes not defined in the encoding are kept unchanged
+
+        text = set_config_file(content[len(bom):].decode(encoding, "surrogateescape"), config_file)
+
+        os.makedirs(cache_path, exist_ok = True)
+
+        temp_file = f"{derived_file}.{os.getpid()}.tmp"
+
+        with open(temp_file, "wb") as file:
+            file.write(bom + text.encode(encoding, "surrogateescape"))
+
+        os.replace(temp_file, derived_file)
+
+    _derived_cache[key] = derived_file
+
+    return derived_file
@@ -0,0 +1,135 @@
+""" Reading of the drawing file selections (dfSelection)
+
+Two formats of drawing file favorites are supported. A favorite from the IFC export window contains
+the selected drawing files as Teilbild nodes:
+
+    <NemetschekBIMStructureSelection Activated="1">
+    <SelectedNodes>
+        <Teilbild Name="Walls Ground floor" NodeID="0201" />
+
+A favorite from the building structure contains all drawing files with their load state. Files with
+the state 2 (active background) or 3 (active foreground) are selected:
+
+    <NemetschekBIMStructureSettings Activated="1">
+      <Files>
+        <File ID="1030" State="3" Activated="1" />
+
+Both formats can contain the expanded storeys of the building structure. The file is read with
+iterparse in one pass, the result is cached by path, modification time and size, so that a favorite
+used by several rows is only read once.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import os
+import xml.etree.ElementTree as ET
+
+
+SELECTED_STATES = {"2", "3"}
+
+_selection_cache: Dict[Tuple[str, int, int], DrawingFileSelection] = {}
+
+
+class DrawingFileSelection():
+    """ Definition of class DrawingFileSelection
+    """
+
+    __slots__ = ("file_numbers", "file_names", "file_states", "storeys")
+
+    def __init__(self,
+                 file_numbers: Tuple[int, ...],
+                 file_names  : Dict[int, str],
+                 file_states : Dict[int, int],
+                 storeys     : Tuple[str, ...]):
+        """ Initialization of class DrawingFileSelection
+
+        Args:
+            file_numbers: numbers of the selected drawing files in the order of the file
+            file_names:   names of the selected drawing files, only known for a favorite of the IFC export window
+            file_states:  load states of the selected drawing files, only known for a building structure favorite
+            storeys:      names of the expanded storeys
+        """
+
+        self.file_numbers = file_numbers
+        self.file_names   = file_names
+        self.file_states  = file_states
+        self.storeys      = storeys
+
+
+def read_selection(path: str) -> DrawingFileSelection:
+    """ Read a drawing file selection
+
+    Args:
+        path: path of the drawing file selection
+
+    Returns:
+        drawing file selection
+
+    Raises:
+        OSError:       file not readable
+        ET.ParseError: no valid XML file
+        ValueError:    invalid drawing file number
+    """
+
+    file_numbers: List[int]      = []
+    file_names  : Dict[int, str] = {}
+    file_states : Dict[int, int] = {}
+    storeys     : List[str]      = []
+
+    for _, element in ET.iterparse(path, events = ("end",)):
+        attrib = element.attrib
+
+        if element.tag == "Teilbild" and "NodeID" in attrib:
+            file_number = int(attrib["NodeID"])
+
+            file_numbers.append(file_number)
+            file_names[file_number] = attrib.get("Name", "").strip()
+
+        elif element.tag == "File" and "ID" in attrib and attrib.get("Activated") == "1" and \
+                attrib.get("State") in SELECTED_STATES:
+            file_number = int(attrib["ID"])
+
+            file_numbers.append(file_number)
+            file_states[file_number] = int(attrib["State"])
+
+        elif element.tag == "Storey":
+            storeys.append(attrib.get("Name", "").strip())
+
+        element.clear()
+
+    return DrawingFileSelection(tuple(file_numbers), file_names, file_states, tuple(storeys))
+
+
+def get_selection(path: str) -> DrawingFileSelection:
+    """ Get a drawing file selection, the result is cached by path, modification time and size
+
+    Args:
+        path: path of the drawing file selection
+
+    Returns:
+        drawing file selection
+    """
+
+    stat = os.stat(path)
+
+    key = (os.path.normcase(os.path.abspath(path)), stat.st_mtime_ns, stat.st_size)
+
+    if (selection := _selection_cache.get(key)) is None:
+        selection = _selection_cache[key] = read_selection(path)
+
+    return selection
+
+
+def get_file_numbers(path: str) -> List[int]:
+    """ Get the numbers of the selected drawing files
+
+    Args:
+        path: path of the drawing file selection
+
+    Returns:
+        numbers of the selected drawing files, the first one is loaded as active foreground file
+    """
+
+    return list(get_selection(path).file_numbers)
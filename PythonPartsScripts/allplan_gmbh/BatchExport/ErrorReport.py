@@ -0,0 +1,83 @@
+""" Report of the errors occurred during the batch export
+
+In the interactive mode, an error is shown in a message box. In the headless mode, used when the
+export is started from the command line, no dialog may block the export. The errors are only
+collected and written to a JSON file next to the CSV file.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import datetime
+import json
+
+import NemAll_Python_Utility as AllplanUtil
+
+
+class ErrorReport():
+    """ Definition of class ErrorReport
+    """
+
+    def __init__(self,
+                 report_file: str,
+                 csv_file   : str,
+                 headless   : bool):
+        """ Initialization of class ErrorReport
+
+        Args:
+            report_file: path of the JSON report file
+            csv_file:    path of the CSV file with the export settings
+            headless:    collect the errors without showing a message box
+        """
+
+        self.report_file = report_file
+        self.csv_file    = csv_file
+        self.headless    = headless
+
+        self.errors: List[Dict[str, Any]] = []
+
+
+    def add(self,
+            category    : str,
+            message     : str,
+            show_message: bool = True,
+            **details   : Any):
+        """ Add an error
+
+        Args:
+            category:     category of the error, e.g. "project_not_exist"
+            message:      error message
+            show_message: show the message in a message box in the interactive mode
+            details:      additional values describing the error, e.g. the project name
+        """
+
+        self.errors.append({"time"    : datetime.datetime.now().isoformat(timespec = "seconds"),
+                            "category": category,
+                            "message" : message,
+                            **details})
+
+        if show_message and not self.headless:
+            AllplanUtil.ShowMessageBox(message, AllplanUtil.MB_OK)
+
+
+    def load(self):
+        """ Load the errors of the existing report file, used to continue the report of an interrupted run
+        """
+
+        try:
+            with open(self.report_file, "r", encoding = "UTF-8") as file:
+                self.errors = json.load(file).get("errors", []) + self.errors
+
+        except (OSError, ValueError, AttributeError):
+            pass
+
+
+    def write(self):
+        """ Write the report file
+        """
+
+        with open(self.report_file, "w", encoding = "UTF-8") as file:
+            json.dump({"csv_file": self.csv_file,
+                       "headless": self.headless,
+                       "errors"  : self.errors}, file, indent = 2)
@@ -0,0 +1,133 @@
+""" Event log of the batch export as JSON lines
+
+Each run appends its events to <CSV name>.events.jsonl next to the CSV file, one JSON object per line.
+All events of a run have the same run ID:
+
+    {"run_id": "...", "time": "...", "event": "run_started", "csv_file": "...", "export_type": "IFC", ...}
+    {"run_id": "...", "time": "...", "event": "row", "row_index": 3, "status": "exported",
+     "phases": {"open_project": 0.01, "load_drawing_files": 1.52, ...}, "output_size": 123456, ...}
+    {"run_id": "...", "time": "...", "event": "run_finished", "rows": 25, "exported": 24, ...}
+
+The phases of a row are measured by a PhaseTimer, the durations are given in seconds.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, TextIO
+
+import datetime
+import json
+import time
+import uuid
+
+
+def create_run_id() -> str:
+    """ Create the ID of a run
+
+    Returns:
+        run ID, starting with the start time for sorting
+    """
+
+    return datetime.datetime.now().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+
+
+class PhaseTimer():
+    """ Definition of class PhaseTimer
+    """
+
+    def __init__(self):
+        """ Initialization of class PhaseTimer
+        """
+
+        self.phases: Dict[str, float] = {}
+
+        self.start_time = self.lap_time = time.perf_counter()
+
+
+    def lap(self,
+            phase: str):
+        """ Add the time since the previous lap to a phase
+
+        Args:
+            phase: name of the phase
+        """
+
+        now = time.perf_counter()
+
+        self.phases[phase] = round(self.phases.get(phase, 0.0) + now - self.lap_time, 4)
+
+        self.lap_time = now
+
+
+    def skip(self):
+        """ Start the next lap without adding the time to a phase
+        """
+
+        self.lap_time = time.perf_counter()
+
+
+    @property
+    def total(self) -> float:
+        """ Get the time since the start
+
+        Returns:
+            total time in seconds
+        """
+
+        return round(time.perf_counter() - self.start_time, 4)
+
+
+class EventLog():
+    """ Definition of class EventLog
+    """
+
+    def __init__(self,
+                 event_file: str,
+                 run_id    : str):
+        """ Initialization of class EventLog
+
+        Args:
+            event_file: path of the JSON lines file, the events are appended
+            run_id:     ID of the run
+        """
+
+        self.event_file = event_file
+        self.run_id     = run_id
+
+        self.file: Optional[TextIO] = None
+
+
+    def open(self):
+        """ Open the event file
+        """
+
+        self.file = open(self.event_file, "a", encoding = "UTF-8")      # pylint: disable=consider-using-with
+
+
+    def close(self):
+        """ Close the event file
+        """
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+    def write(self,
+              event   : str,
+              **values: Any):
+        """ Write an event, the file is flushed after each event
+
+        Args:
+            event:  name of the event
+            values: values of the event
+        """
+
+        if not self.file:
+            return
+
+        self.file.write(json.dumps({"run_id": self.run_id,
+                                    "time"  : datetime.datetime.now().isoformat(timespec = "milliseconds"),
+                                    "event" : event,
+                                    **values}) + "\n")
+        self.file.flush()
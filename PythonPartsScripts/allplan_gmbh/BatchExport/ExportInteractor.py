@@ -0,0 +1,238 @@
+""" Interactor shared by the IFC, the DWG and the combined export scripts
+
+The scripts only differ in their name, the settings folder in <std>, the export type and the export
+function. Started from the command line, the interactor runs headless: it exports the CSV files or runs the
+spool daemon and closes Allplan, also after an unexpected error, which is written to the error report or the
+daemon log. Otherwise it shows the palette and exports by button click.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional
+
+import copy
+import sys
+import traceback
+
+import NemAll_Python_BaseElements as AllplanBaseElements
+import NemAll_Python_IFW_Input as AllplanIFW
+import NemAll_Python_Geometry as AllplanGeo
+import NemAll_Python_AllplanSettings as AllplanSettings
+
+from BuildingElement import BuildingElement
+from BuildingElementComposite import BuildingElementComposite
+from BuildingElementControlProperties import BuildingElementControlProperties
+from BuildingElementPaletteService import BuildingElementPaletteService
+
+from .ExportJob import ExportJob, get_settings_path
+from .ExportOptions import parse_command_line
+from .ExportRunner import ExportRunner
+from .ExportSession import ExportSession
+from .SpoolDaemon import SpoolDaemon
+
+
+class ExportInteractor():
+    """ Definition of class ExportInteractor
+    """
+
+    def __init__(self,
+                 coord_input              : AllplanIFW.CoordinateInput,
+                 build_ele_list           : List[BuildingElement],
+                 build_ele_composite      : BuildingElementComposite,
+                 build_ele_ctrl_props_list: List[BuildingElementControlProperties],
+                 script_name              : str,
+                 settings_folder          : str,
+                 export_type              : str,
+                 export_job               : Callable[[ExportSession, ExportJob, str], None]):
+        """ Initialization of class ExportInteractor
+
+        Args:
+            coord_input:               API object for the coordinate input, element selection, ... in the Allplan view
+            build_ele_list:            list with the building elements
+            build_ele_composite:       building element composite with the building element constraints
+            build_ele_ctrl_props_list: list with the building element control properties
+            script_name:               name of the script, e.g. "IFCExportByFileList"
+            settings_folder:           folder of the default CSV file in <std>, e.g. "IFCExport"
+            export_type:               "IFC" or "DWG", empty for the combined export
+            export_job:                function to export a job to the given file
+        """
+
+        self.coord_input               = coord_input
+        self.build_ele_list            = build_ele_list
+        self.build_ele_composite       = build_ele_composite
+        self.build_ele_ctrl_props_list = build_ele_ctrl_props_list
+        self.build_ele                 = build_ele_list[0]
+        self.export_type               = export_type
+        self.export_job                = export_job
+
+        #----------------- started from the command line: headless without palette and dialogs
+
+        self.options  = parse_command_line(sys.argv)
+        self.headless = bool(sys.argv) and sys.argv != ['']
+
+        self.palette_service: Optional[BuildingElementPaletteService] = None
+
+        if not self.headless:
+            self.palette_service = BuildingElementPaletteService(self.build_ele_list, self.build_ele_composite,
+                                                                 script_name, self.build_ele_ctrl_props_list, "")
+
+        self.settings_path = AllplanSettings.AllplanPaths.GetStdPath() + settings_folder + "\\"
+
+        self.build_ele.CvsFile.value = self.settings_path + settings_folder + ".csv"
+
+        if self.options.csv_file:
+            self.build_ele.CvsFile.value = self.options.csv_file
+            self.settings_path = get_settings_path(self.options.csv_file)
+
+        #----------------- the control is found by its name, its index changes with the parameters of the palette
+
+        for ctrl_props in self.build_ele_ctrl_props_list[0]:
+            if ctrl_props.value_name == "CvsFile":
+                ctrl_props.text = self.build_ele.CvsFile.value
+
+        #----------------- get the properties and start the input
+
+        if self.palette_service:
+            self.palette_service.show_palette("")
+
+            self.coord_input.InitFirstElementInput(AllplanIFW.InputStringConvert("Execute by button click"))
+
+            return
+
+        runner: Optional[ExportRunner] = None
+
+        try:
+            runner = self.run_daemon() if self.options.spool else self.export()
+
+        finally:
+            #----------------- the new process of a recycled session is started, when the run has ended
+
+            if runner:
+                runner.relaunch()
+
+            AllplanBaseElements.ProjectService.CloseAllplan()
+
+
+    def modify_element_property(self,
+                                page : int,
+                                name : str,
+                                value: Any):
+        """ Modify property of element
+
+        Args:
+            page:  page index of the modified property
+            name:  name of the modified property
+            value: new value
+        """
+
+        if self.palette_service:
+            self.palette_service.modify_element_property(page, name, value)
+
+        self.settings_path = get_settings_path(self.build_ele.CvsFile.value)
+
+
+    def on_cancel_function(self) -> bool:
+        """ Check for input function cancel in case of ESC
+
+        Returns:
+            True
+        """
+
+        if self.palette_service:
+            self.palette_service.close_palette()
+
+        return True
+
+
+    def on_preview_draw(self):
+        """ Handles the preview draw event
+        """
+
+
+    def on_mouse_leave(self):
+        """ Handles the mouse leave event
+        """
+
+
+    def on_control_event(self,
+                         _event_id: int):
+        """ On control event
+
+        Args:
+            _event_id: event id of the clicked button control
+        """
+
+        self.export()
+
+
+    def export(self) -> ExportRunner:
+        """ export the data, the combined export accepts several CSV files
+
+        A headless run only uses the command line options, the palette values are read from the last input and
+        would otherwise apply to every scheduled run.
+
+        Returns:
+            runner of the export
+        """
+
+        options = copy.copy(self.options)
+
+        full_reload = self.options.full_reload
+
+        if not self.headless:
+            options.force = self.options.force or self.build_ele.Force.value
+            full_reload   = self.options.full_reload or self.build_ele.FullReload.value
+
+        runner = ExportRunner(self.coord_input.GetInputViewDocument(), self.build_ele.CvsFile.value, self.settings_path,
+                              self.export_type, options, self.headless, full_reload,
+                              self.options.csv_files[1:] if not self.export_type else ())
+
+        try:
+            runner.export(runner.read_jobs(), self.export_job)
+
+        except Exception as error:
+            runner.error_report.add("run_failed", "Export failed: " + str(error), traceback = traceback.format_exc())
+            runner.error_report.write()
+
+            raise
+
+        return runner
+
+
+    def run_daemon(self) -> Optional[ExportRunner]:
+        """ run the spool daemon, an error ending the daemon is written to its log
+
+        Returns:
+            runner of the batch, which recycled the session, None if the daemon is stopped
+        """
+
+        daemon = SpoolDaemon(self.coord_input.GetInputViewDocument(), self.options.spool, self.export_type,
+                             self.options, self.options.full_reload, self.export_job)
+
+        try:
+            daemon.run()
+
+        except Exception as error:
+            daemon.write_log("Daemon failed: " + str(error) + "\n" + traceback.format_exc())
+
+            raise
+
+        return daemon.recycled_runner
+
+
+    def process_mouse_msg(self,
+                          _mouse_msg: int,
+                          _pnt      : AllplanGeo.Point2D,
+                          _msg_info : AllplanIFW.AddMsgInfo) -> bool:
+        """ Process the mouse message event
+
+        Args:
+            _mouse_msg: mouse message ID
+            _pnt:       input point in Allplan view coordinates
+            _msg_info:  additional mouse message info
+
+        Returns:
+            True
+        """
+
+        return True
@@ -0,0 +1,383 @@
+""" Export jobs read from the CSV file
+
+Each row of the CSV file is one export job. The jobs are read lazily, so that the resolved setting
+files and drawing file numbers of a row are kept in one record instead of parallel lists.
+
+A merged job file contains IFC and DWG rows. The column exportType gives the type of each row, the other
+columns are the ones of the IFC and the DWG CSV file, each row only needs the columns of its type.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import csv
+import os
+
+from .DrawingFileSelection import get_file_numbers
+from .JobScheduler import BACKGROUND, FOREGROUND, PASSIVE, get_load_states
+
+
+#----------------- columns of the CSV file by export type
+
+COLUMNS = {"IFC": {"version"        : "ifc_Version",
+                   "export_favorite": "ifcSetting",
+                   "filename"       : "ifcFilename"},
+           "DWG": {"version"        : "version",
+                   "export_favorite": "dwgSetting",
+                   "config_file"    : "cfgSetting",
+                   "filename"       : "filename"}}
+
+SETTING_FOLDERS = {"IFC": "ifcSettings",
+                   "DWG": "dwgSettings"}
+
+EXPORT_TYPE_COLUMN = "exportType"
+
+
+class ExportJob():
+    """ Definition of class ExportJob
+    """
+
+    __slots__ = ("row_index", "export_type", "host_name", "project_name", "df_selection_file", "file_numbers",
+                 "layer_favorite_file", "export_favorite_file", "config_file", "version", "destination_folder",
+                 "filename", "passive_files", "split_mode", "filename_template")
+
+    def __init__(self,
+                 row_index           : int,
+                 export_type         : str,
+                 host_name           : str,
+                 project_name        : str,
+                 df_selection_file   : str,
+                 file_numbers        : List[int],
+                 layer_favorite_file : str,
+                 export_favorite_file: str,
+                 config_file         : str,
+                 version             : str,
+                 destination_folder  : str,
+                 filename            : str,
+                 passive_files       : Sequence[int] = (),
+                 split_mode          : str = "",
+                 filename_template   : str = ""):
+        """ Initialization of class ExportJob
+
+        Args:
+            row_index:            index of the row in the CSV file, starting with 1 for the first data row
+            export_type:          "IFC" or "DWG"
+            host_name:            host name
+            project_name:         project name
+            df_selection_file:    path of the drawing file selection
+            file_numbers:         numbers of the selected drawing files, the first one is the active foreground file
+            layer_favorite_file:  path of the layer favorite
+            export_favorite_file: path of the IFC or DWG export favorite
+            config_file:          path of the DWG configuration file, empty for IFC
+            version:              IFC or DWG version as given in the CSV file
+            destination_folder:   destination folder, can contain $usr$, $std$ and $prj$
+            filename:             name of the exported file
+            passive_files:        numbers of the drawing files kept loaded as passive background, e.g. the files of
+                                  the other sub-jobs of a split row
+            split_mode:           split mode of the row, see RowExpansion.SPLIT_MODES, empty for one export
+            filename_template:    template of the filenames of a split row
+        """
+
+        self.row_index            = row_index
+        self.export_type          = export_type
+        self.host_name            = host_name
+        self.project_name         = project_name
+        self.df_selection_file    = df_selection_file
+        self.file_numbers         = file_numbers
+        self.layer_favorite_file  = layer_favorite_file
+        self.export_favorite_file = export_favorite_file
+        self.config_file          = config_file
+        self.version              = version
+        self.destination_folder   = destination_folder
+        self.filename             = filename
+        self.passive_files        = list(passive_files)
+        self.split_mode           = split_mode
+        self.filename_template    = filename_template
+
+
+    def __repr__(self) -> str:
+        """ Create the string representation
+
+        Returns:
+            string representation
+        """
+
+        return f"ExportJob(row {self.row_index}, {self.project_name}, {self.filename})"
+
+
+    @property
+    def project_key(self) -> Tuple[str, str]:
+        """ Get the project key
+
+        Returns:
+            host name and project name
+        """
+
+        return self.host_name, self.project_name
+
+
+    @property
+    def loaded_files(self) -> List[int]:
+        """ Get all drawing files loaded for the export
+
+        Returns:
+            numbers of the exported drawing files and of the passive background files
+        """
+
+        return self.file_numbers + self.passive_files
+
+
+    @property
+    def load_states(self) -> Dict[int, str]:
+        """ Get the load state of the drawing files of the job
+
+        Returns:
+            FOREGROUND, BACKGROUND or PASSIVE by drawing file number
+        """
+
+        return get_load_states(self.file_numbers, self.passive_files, FOREGROUND, BACKGROUND, PASSIVE)
+
+
+    @property
+    def session_key(self) -> Tuple:
+        """ Get the key of the loaded session, rows with the same key are exported with the same loaded files
+
+        Returns:
+            project, all loaded drawing files and layer favorite
+        """
+
+        return (self.host_name, self.project_name, tuple(sorted(self.loaded_files)), self.layer_favorite_file)
+
+
+    @property
+    def export_key(self) -> Tuple:
+        """ Get the key of the effective inputs of the export, rows with the same key export identical files
+
+        Returns:
+            project, exported and passive drawing files, setting files, type, version and file extension
+        """
+
+        return (self.host_name, self.project_name, tuple(self.file_numbers), tuple(sorted(self.passive_files)),
+                self.layer_favorite_file, self.export_favorite_file, self.config_file, self.export_type,
+                self.version, os.path.splitext(self.filename)[1].lower())
+
+
+def get_settings_path(csv_file: str) -> str:
+    """ Get the settings path of a CSV file, the setting files are in sub folders of it
+
+    Args:
+        csv_file: path of the CSV file
+
+    Returns:
+        path of the folder of the CSV file with a trailing backslash
+    """
+
+    return os.path.dirname(csv_file) + "\\"
+
+
+def get_setting_file(settings_path: str,
+                     setting_file : str,
+                     folder_name  : str,
+                     default_file : str = "") -> str:
+    """ Get the path of a setting file in the sub folder of the settings path
+
+    Args:
+        settings_path: path of the CSV file with a trailing backslash
+        setting_file:  name of the setting file from the CSV file
+        folder_name:   name of the sub folder
+        default_file:  path used for an empty name
+
+    Returns:
+        path of the setting file
+    """
+
+    return settings_path + folder_name + "\\" + setting_file if setting_file else default_file
+
+
+def get_export_type(csv_file: str) -> str:
+    """ Get the export type of a CSV file from its columns
+
+    Args:
+        csv_file: path of the CSV file
+
+    Returns:
+        "IFC" or "DWG", empty for a merged job file with the type in each row
+    """
+
+    with open(csv_file, "r", encoding = "utf-8-sig", newline = "") as file:
+        columns = {column.strip() for column in next(csv.reader(file), [])}
+
+    if EXPORT_TYPE_COLUMN not in columns:
+        for export_type, type_columns in COLUMNS.items():
+            if type_columns["export_favorite"] in columns:
+                return export_type
+
+    return ""
+
+
+def get_row_export_type(row        : Dict[str, str],
+                        export_type: str) -> str:
+    """ Get the export type of a row
+
+    Args:
+        row:         values of the row by column name
+        export_type: export type of the CSV file, empty for a merged job file
+
+    Returns:
+        "IFC" or "DWG"
+
+    Raises:
+        KeyError:   column exportType missing
+        ValueError: invalid export type
+    """
+
+    if export_type:
+        return export_type
+
+    if (row_type := row[EXPORT_TYPE_COLUMN].upper()) not in COLUMNS:
+        raise ValueError(row_type)
+
+    return row_type
+
+
+def read_rows(csv_file       : str,
+              first_row_index: int = 1) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """ Read the rows of the CSV file, the names and values are stripped
+
+    The file is read as UTF-8. Bytes of another encoding are kept as surrogates, so that one row with e.g. an
+    ANSI umlaut doesn't stop the reading of the other rows, see has_invalid_encoding.
+
+    Args:
+        csv_file:        path of the CSV file
+        first_row_index: index of the first data row
+
+    Yields:
+        index of the row,
+        values of the row by column name
+    """
+
+    with open(csv_file, "r", encoding = "utf-8-sig", errors = "surrogateescape", newline = "") as file:
+        for row_index, entry in enumerate(csv.DictReader(file), first_row_index):
+            yield row_index, {key.strip(): (value or "").strip() for key, value in entry.items() if key}
+
+
+def has_invalid_encoding(row: Dict[str, str]) -> bool:
+    """ Check, whether a row contains bytes which are not UTF-8
+
+    Args:
+        row: values of the row by column name
+
+    Returns:
+        True, if a name or value contains a surrogate of an undecodable byte
+    """
+
+    return any("\udc80" <= char <= "\udcff" for text in (*row.keys(), *row.values()) for char in text)
+
+
+def get_setting_files(row                   : Dict[str, str],
+                      settings_path         : str,
+                      export_type           : str,
+                      default_layer_favorite: str) -> Dict[str, str]:
+    """ Get the paths of the setting files of a row
+
+    Args:
+        row:                    values of the row by column name
+        settings_path:          path of the CSV file with a trailing backslash
+        export_type:            "IFC" or "DWG"
+        default_layer_favorite: layer favorite for rows without layer setting
+
+    Returns:
+        paths by attribute name of ExportJob, a missing column results in an empty path
+
+    Raises:
+        KeyError: column missing
+    """
+
+    columns = COLUMNS[export_type]
+
+    return {"df_selection_file"   : get_setting_file(settings_path, row.get("dfSelection", ""), "dfSettings"),
+            "layer_favorite_file" : get_setting_file(settings_path, row["layerSetting"], "layerSettings",
+                                                     default_layer_favorite),
+            "export_favorite_file": get_setting_file(settings_path, row[columns["export_favorite"]],
+                                                     SETTING_FOLDERS[export_type]),
+            "config_file"         : get_setting_file(settings_path, row[columns["config_file"]], "cfgSettings")
+                                    if "config_file" in columns else ""}
+
+
+def read_jobs(csv_file              : str,
+              settings_path         : str,
+              export_type           : str,
+              default_layer_favorite: str,
+              on_error              : Callable[..., None],
+              first_row_index       : int = 1) -> Iterator[ExportJob]:
+    """ Read the export jobs from the CSV file
+
+    The rows are read and resolved one by one. A row which is not UTF-8 encoded, with an invalid export type, a
+    missing or invalid drawing file selection, a missing column, an invalid DWG version or without selected
+    drawing files is reported by on_error and skipped.
+
+    Args:
+        csv_file:               path of the CSV file
+        settings_path:          path of the CSV file with a trailing backslash
+        export_type:            "IFC" or "DWG", empty for a merged job file
+        default_layer_favorite: layer favorite for rows without layer setting
+        on_error:               function called with the error category, message and details
+        first_row_index:        index of the first data row, used to number the rows of several CSV files
+
+    Yields:
+        export job of each valid row
+    """
+
+    for row_index, row in read_rows(csv_file, first_row_index):
+        if has_invalid_encoding(row):
+            on_error("row_encoding_invalid", "Row " + str(row_index) + " of " + os.path.basename(csv_file) +
+                     " is not UTF-8 encoded", row_index = row_index)
+            continue
+
+        try:
+            row_type = get_row_export_type(row, export_type)
+
+        except (KeyError, ValueError):
+            on_error("export_type_invalid", "Export type " + row.get(EXPORT_TYPE_COLUMN, "") + " is not IFC or DWG",
+                     row_index = row_index, project_name = row.get("projectName", ""))
+            continue
+
+        columns      = COLUMNS[row_type]
+        drawing_file = get_setting_file(settings_path, row.get("dfSelection", ""), "dfSettings")
+
+        try:
+            file_numbers = get_file_numbers(drawing_file)
+
+            job = ExportJob(row_index, row_type, row["hostName"], row["projectName"], file_numbers = file_numbers,
+                            version = row[columns["version"]], destination_folder = row["destinationFolder"],
+                            filename = row[columns["filename"]], split_mode = row.get("splitMode", "").lower(),
+                            filename_template = row.get("filenameTemplate", ""),
+                            **get_setting_files(row, settings_path, row_type, default_layer_favorite))
+
+        except OSError:
+            on_error("df_selection_not_found", "File " + drawing_file + " not found",
+                     row_index = row_index, project_name = row.get("projectName", ""), file = drawing_file)
+            continue
+
+        except (ValueError, SyntaxError):
+            on_error("df_selection_invalid", "File " + drawing_file + " is not a valid drawing file selection",
+                     row_index = row_index, project_name = row.get("projectName", ""), file = drawing_file)
+            continue
+
+        except KeyError as key:
+            on_error("column_missing", "Column " + str(key) + " missing in " + os.path.basename(csv_file),
+                     row_index = row_index)
+            continue
+
+        if row_type == "DWG" and not job.version.isdigit():
+            on_error("version_invalid", "Version " + job.version + " is not a valid DWG version",
+                     row_index = row_index, project_name = job.project_name)
+            continue
+
+        if not file_numbers:
+            on_error("no_drawing_file_selected", "No drawing file selected in " + drawing_file,
+                     row_index = row_index, project_name = job.project_name, file = drawing_file)
+            continue
+
+        yield job
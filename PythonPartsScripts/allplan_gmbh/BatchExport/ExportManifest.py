@@ -0,0 +1,212 @@
+""" Manifest of the exported files
+
+The manifest is stored as JSON file next to the CSV file. For each row it contains the fingerprint of
+all inputs of the export and the exported file. A row is skipped in the next run, if the fingerprint is
+unchanged and the exported file still exists.
+
+The fingerprint contains
+    - the content of the drawing file selection, the layer favorite, the export favorite and the configuration file
+    - the modification time and size of the selected drawing files in the project folder
+    - the export version
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import datetime
+import hashlib
+import json
+import os
+import time
+
+
+WRITE_INTERVAL = 2.0
+
+_hash_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+def get_file_hash(path: str) -> str:
+    """ Get the SHA-256 of a file, the result is cached by path, modification time and size
+
+    Args:
+        path: path of the file
+
+    Returns:
+        SHA-256 of the file, empty string for a missing file
+    """
+
+    try:
+        stat = os.stat(path)
+
+    except OSError:
+        return ""
+
+    key = (os.path.normcase(os.path.abspath(path)), stat.st_mtime_ns, stat.st_size)
+
+    if (file_hash := _hash_cache.get(key)) is None:
+        with open(path, "rb") as file:
+            file_hash = hashlib.sha256(file.read()).hexdigest()
+
+        _hash_cache[key] = file_hash
+
+    return file_hash
+
+
+def get_drawing_file_path(project_path: str,
+                          file_number : int) -> str:
+    """ Get the path of a drawing file in the project folder
+
+    Args:
+        project_path: path of the project
+        file_number:  number of the drawing file
+
+    Returns:
+        path of the drawing file
+    """
+
+    return os.path.join(project_path, f"tb{file_number:06d}.ndw")
+
+
+def compute_fingerprint(input_files : Sequence[str],
+                        project_path: str,
+                        file_numbers: Sequence[int],
+                        settings    : Sequence[Any],
+                        file_labels : Optional[Dict[str, str]] = None) -> str:
+    """ Compute the fingerprint of the inputs of an export
+
+    Args:
+        input_files:  paths of the setting files (drawing file selection, favorites, configuration file)
+        project_path: path of the project, empty string if not known
+        file_numbers: numbers of the exported drawing files
+        settings:     other settings of the export, e.g. the version
+        file_labels:  name of a setting file in the fingerprint instead of its path, e.g. for the layer state
+                      file, whose path depends on the Allplan instance
+
+    Returns:
+        SHA-256 of the inputs
+    """
+
+    fingerprint = hashlib.sha256()
+
+    for input_file in input_files:
+        label = (file_labels or {}).get(input_file, input_file)
+
+        fingerprint.update(f"{label}|{get_file_hash(input_file) if input_file else ''}\n".encode("UTF-8"))
+
+    for file_number in file_numbers:
+        try:
+            stat  = os.stat(get_drawing_file_path(project_path, file_number))
+            state = f"{stat.st_mtime_ns}|{stat.st_size}"
+
+        except OSError:
+            state = "missing" if project_path else "unknown"
+
+        fingerprint.update(f"{file_number}|{state}\n".encode("UTF-8"))
+
+    fingerprint.update("|".join(str(setting) for setting in settings).encode("UTF-8"))
+
+    return fingerprint.hexdigest()
+
+
+class ExportManifest():
+    """ Definition of class ExportManifest
+    """
+
+    def __init__(self,
+                 manifest_file: str):
+        """ Initialization of class ExportManifest
+
+        Args:
+            manifest_file: path of the JSON manifest file
+        """
+
+        self.manifest_file = manifest_file
+        self.write_time    = 0.0
+
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            with open(manifest_file, "r", encoding = "UTF-8") as file:
+                self.rows = json.load(file).get("rows", {})
+
+        except (OSError, ValueError, AttributeError):
+            self.rows = {}
+
+
+    @staticmethod
+    def get_row_key(host_name   : str,
+                    project_name: str,
+                    output_file : str) -> str:
+        """ Get the key of a row
+
+        Args:
+            host_name:    host name
+            project_name: project name
+            output_file:  path of the exported file
+
+        Returns:
+            key of the row
+        """
+
+        return host_name + "|" + project_name + "|" + os.path.normcase(output_file)
+
+
+    def is_unchanged(self,
+                     row_key    : str,
+                     fingerprint: str) -> bool:
+        """ Check, whether the row was already exported with the same inputs
+
+        Args:
+            row_key:     key of the row
+            fingerprint: fingerprint of the current inputs
+
+        Returns:
+            True, if the fingerprint is unchanged and the exported file exists
+        """
+
+        entry: Optional[Dict[str, Any]] = self.rows.get(row_key)
+
+        return entry is not None and entry.get("fingerprint") == fingerprint and \
+               os.path.isfile(entry.get("output_file", ""))
+
+
+    def update(self,
+               row_key    : str,
+               fingerprint: str,
+               output_file: str,
+               sha256     : str):
+        """ Update the entry of an exported row, called after the file is verified and published
+
+        The manifest is written at most every WRITE_INTERVAL seconds, writing it after each row costs more
+        than the export of the row for large CSV files. After the last row, write must be called.
+
+        Args:
+            row_key:     key of the row
+            fingerprint: fingerprint of the inputs
+            output_file: path of the exported file
+            sha256:      SHA-256 of the exported file
+        """
+
+        self.rows[row_key] = {"fingerprint": fingerprint,
+                              "output_file": output_file,
+                              "sha256"     : sha256,
+                              "exported"   : datetime.datetime.now().isoformat(timespec = "seconds")}
+
+        if time.monotonic() - self.write_time >= WRITE_INTERVAL:
+            self.write()
+
+
+    def write(self):
+        """ Write the manifest file, the previous file is replaced after the new one is complete
+        """
+
+        temp_file = self.manifest_file + ".tmp"
+
+        with open(temp_file, "w", encoding = "UTF-8") as file:
+            json.dump({"rows": self.rows}, file, indent = 2)
+
+        os.replace(temp_file, self.manifest_file)
+
+        self.write_time = time.monotonic()
+
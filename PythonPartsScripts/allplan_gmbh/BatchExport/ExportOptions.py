@@ -0,0 +1,138 @@
+""" Options of the batch export given by the command line
+
+The command line of a scheduled export is
+
+    Allplan_2026.exe -o "@<path>\\IFCExportByFileList.pyp" "<path>\\IFCExport.csv" [options]
+
+The arguments after the PythonPart are available in sys.argv, the first one is the CSV file. The combined
+export BatchExportByFileList.pyp accepts several CSV files before the options. With --spool, the scripts
+run as daemon and export the job files of a spool folder instead, see SpoolDaemon.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import argparse
+
+
+REDRAW_POLICIES = ("always", "required", "end", "never")
+
+PREFLIGHT_MODES = ("abort", "drop", "report")
+
+FAN_OUT_METHODS = ("copy", "link")
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """ Create the parser for the command line arguments
+
+    Returns:
+        argument parser
+    """
+
+    parser = argparse.ArgumentParser(prog = "BatchExport", exit_on_error = False, add_help = False)
+
+    parser.add_argument("csv_files", nargs = "*", default = [],
+                        help = "CSV file with the export settings, the combined export accepts several CSV files")
+    parser.add_argument("--full-reload", action = "store_true",
+                        help = "unload all drawing files and load the complete selection for each row")
+    parser.add_argument("--force", action = "store_true",
+                        help = "export all rows, also the rows with unchanged inputs in the manifest")
+    parser.add_argument("--restart", action = "store_true",
+                        help = "export all rows, also the rows completed by an interrupted run of the same CSV file")
+    parser.add_argument("--redraw", choices = REDRAW_POLICIES, default = "required",
+                        help = "redraw policy: always, required only before the export, once at the end or never")
+    parser.add_argument("--preflight", choices = PREFLIGHT_MODES, default = "drop",
+                        help = "rows with problems found before the export: abort the export, drop the rows or "
+                               "only report them")
+    parser.add_argument("--history", default = "",
+                        help = "SQLite database of the run history, default <usr>\\BatchExportHistory.sqlite")
+    parser.add_argument("--no-history", action = "store_true",
+                        help = "don't use and don't update the run history")
+    parser.add_argument("--regression-threshold", type = float, default = 0.5,
+                        help = "flag rows whose export takes longer than the history by this factor, e.g. 0.5")
+    parser.add_argument("--recycle-rows", type = int, default = 0,
+                        help = "continue in a new Allplan process after this number of exported rows, 0 for no limit")
+    parser.add_argument("--recycle-memory", type = float, default = 0,
+                        help = "continue in a new Allplan process above this memory in MB, 0 for no limit")
+    parser.add_argument("--no-relaunch", action = "store_true",
+                        help = "don't start the new Allplan process after recycling, e.g. under the coordinator")
+    parser.add_argument("--no-dedupe", action = "store_true",
+                        help = "export each row, also rows with the same inputs as another row")
+    parser.add_argument("--fan-out", choices = FAN_OUT_METHODS, default = "copy",
+                        help = "without staging, create the files of duplicate rows as copy or hard link")
+    parser.add_argument("--metrics-dir", default = "",
+                        help = "folder of the node_exporter textfile collector, default the folder of the CSV file")
+    parser.add_argument("--no-metrics", action = "store_true",
+                        help = "don't write the Prometheus metrics and the JSON status file")
+    parser.add_argument("--spool", default = "",
+                        help = "daemon mode: export the job files of this spool folder until it contains a stop file")
+    parser.add_argument("--poll-interval", type = float, default = 30,
+                        help = "daemon mode: seconds between two polls of the spool folder")
+    parser.add_argument("--idle-timeout", type = float, default = 0,
+                        help = "daemon mode: end after this number of seconds without job files, 0 for no limit")
+    parser.add_argument("--no-staging", action = "store_true",
+                        help = "export directly to the destination folder instead of a local staging folder")
+    parser.add_argument("--compress", action = "store_true",
+                        help = "publish IFC files as .ifczip and DWG/DXF files as .zip")
+
+    return parser
+
+
+def parse_command_line(argv: List[str]) -> argparse.Namespace:
+    """ Parse the command line arguments
+
+    Unknown arguments are ignored, so that a scheduled task with an outdated command line still runs. An option
+    with an invalid value is ignored too, it gets its default value and the error is kept in options.errors
+    for the log and the error report of the run.
+
+    Args:
+        argv: arguments from sys.argv
+
+    Returns:
+        parsed options
+    """
+
+    args   = [arg for arg in argv[1:] if arg]
+    errors = []
+
+    while True:
+        try:
+            options, _unknown = create_parser().parse_known_args(args)
+            break
+
+        except argparse.ArgumentError as error:
+            errors.append("Command line option ignored: " + str(error))
+
+            args = remove_option(args, error.argument_name or "")
+
+    options.csv_file = options.csv_files[0] if options.csv_files else ""
+    options.errors   = errors
+
+    return options
+
+
+def remove_option(args       : List[str],
+                  option_name: str) -> List[str]:
+    """ Remove an option with its value from the arguments
+
+    Args:
+        args:        command line arguments
+        option_name: option strings of the option, separated by "/"
+
+    Returns:
+        arguments without the option, without any option if the option isn't found
+    """
+
+    option_strings = option_name.split("/")
+
+    for index, arg in enumerate(args):
+        if arg in option_strings:
+            has_value = index + 1 < len(args) and not args[index + 1].startswith("-")
+
+            return args[:index] + args[index + (2 if has_value else 1):]
+
+        if arg.split("=", 1)[0] in option_strings:
+            return args[:index] + args[index + 1:]
+
+    return [arg for arg in args if not arg.startswith("-")]
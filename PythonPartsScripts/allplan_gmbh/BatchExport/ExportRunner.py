@@ -0,0 +1,1311 @@
+""" Execution of the export jobs
+
+The runner contains the export loop shared by the IFC, the DWG and the combined export. The jobs are
+scheduled, the projects are opened, the drawing files and layer favorites are loaded by the export session
+and the export function of the script is called for each job.
+
+The current layer state, also used for the rows without layer favorite, is saved to a file named after the
+CSV files, e.g. <usr>\\tmp\\CurrentLayerState.IFCExport.shard01.lfa, so that the Allplan instances of the
+coordinator don't overwrite the state of each other.
+
+A long headless run can recycle its session: at a project boundary after a row or memory limit, the run
+stops, its journal stays open and a new Allplan process resumes the run with the same command line.
+
+The combined export reads several CSV files or a merged job file. The rows of several CSV files are numbered
+one after another, the reports are named after all CSV files, e.g. IFCExport+DWGExport.log.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import argparse
+import functools
+import hashlib
+import os
+import sqlite3
+import time
+
+import NemAll_Python_BaseElements as AllplanBaseElements
+import NemAll_Python_IFW_ElementAdapter as AllplanEleAdapter
+import NemAll_Python_Utility as AllplanUtil
+import NemAll_Python_AllplanSettings as AllplanSettings
+
+from .CheckpointJournal import CheckpointJournal
+from .ErrorReport import ErrorReport
+from .EventLog import EventLog, PhaseTimer, create_run_id
+from .ExportJob import ExportJob, get_export_type, get_settings_path, read_jobs, read_rows
+from .ExportManifest import ExportManifest, compute_fingerprint, get_file_hash
+from .ExportSession import ExportSession
+from .JobScheduler import schedule_rows
+from .OutputVerifier import OutputVerifier
+from .Publisher import fan_out_file, get_published_name, publish_file
+from .Preflight import check_destinations, check_jobs, check_setting_files, write_report
+from .ProcessMonitor import ProcessMonitor, format_sample, get_command_line, relaunch
+from .RowExpansion import expand_jobs
+from .RunMetrics import RunMetrics
+from .RunHistory import HistoryKey, RemainingTime, RunHistory, format_duration, get_end_time, get_history_key
+
+
+VERIFY_WORKERS  = 2
+PUBLISH_WORKERS = 4
+
+MAX_REPORT_NAMES = 40
+
+MAX_REPORT_NAMES = 40
+
+
+def check_structure_settings(host_name   : str,
+                             project_name: str):
+    """ create the file with the structure settings
+
+    Args:
+        host_name:    host name
+        project_name: project name
+    """
+
+    error, path = AllplanBaseElements.ProjectService.GetProjectPath(host_name, project_name)
+
+    if error:
+        return
+
+    path += "\\BIM\\" + AllplanBaseElements.ProjectService.GetCurrentUserAsBwsPath() + "\\settings"
+
+    settings_file = path + "\\Structure_settings.xml"
+
+    if os.path.exists(settings_file):
+        return
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    with open(settings_file, "w", encoding = "UTF-8") as file:
+        file.write("<?xml version=\"1.0\" encoding=\"utf-8\"?>\n"
+                   "<NemetschekBIMStructureSettings Activated=\"1\">\n"
+                   "<Files>\n"
+                   "    <File ID=\"0001\" State=\"3\" Activated=\"1\" />\n"
+                   "</Files>\n"
+                   "</NemetschekBIMStructureSettings>")
+
+
+def get_report_path(csv_file  : str,
+                    more_files: Sequence[str]) -> str:
+    """ get the path of the reports of a run without extension
+
+    The reports of several CSV files are named after all CSV files, e.g. IFCExport+DWGExport. If the names of
+    the further CSV files are longer than MAX_REPORT_NAMES, they are replaced by a short hash of their names,
+    so that the paths of the reports stay short for any number of CSV files.
+
+    Args:
+        csv_file:   path of the first CSV file
+        more_files: paths of the further CSV files
+
+    Returns:
+        path of the reports
+    """
+
+    report_path = os.path.splitext(csv_file)[0]
+
+    if not more_files:
+        return report_path
+
+    names = "+".join(os.path.splitext(os.path.basename(path))[0] for path in more_files)
+
+    if len(names) > MAX_REPORT_NAMES:
+        names = hashlib.sha256("\n".join(sorted(os.path.basename(path).lower() for path in more_files))
+                               .encode("UTF-8")).hexdigest()[:12]
+
+    return report_path + "+" + names
+
+
+def get_job_history_key(job: ExportJob) -> HistoryKey:
+    """ get the history key of a job
+
+    Args:
+        job: export job
+
+    Returns:
+        history key
+    """
+
+    return get_history_key(job.host_name, job.project_name, job.file_numbers, job.export_favorite_file,
+                           job.export_type, job.version, job.filename)
+
+
+class ExportRunner():
+    """ Definition of class ExportRunner
+    """
+
+    def __init__(self,
+                 doc          : AllplanEleAdapter.DocumentAdapter,
+                 csv_file     : str,
+                 settings_path: str,
+                 export_type  : str,
+                 options      : argparse.Namespace,
+                 headless     : bool,
+                 full_reload  : bool,
+                 more_files   : Sequence[str] = (),
+                 session      : Optional[ExportSession] = None,
+                 report_path  : str = ""):
+        """ Initialization of class ExportRunner
+
+        Args:
+            doc:           document of the Allplan drawing files
+            csv_file:      path of the CSV file with the export settings
+            settings_path: path of the CSV file with a trailing backslash
+            export_type:   "IFC" or "DWG", empty to get the type from the columns of each CSV file
+            options:       options from the command line
+            headless:      run without palette, progress bar and message boxes
+            full_reload:   unload all drawing files and load the complete selection for each row
+            more_files:    paths of further CSV files exported in the same run, the setting files are in the
+                           folder of each CSV file
+            session:       session of a previous run, the opened project, drawing files and layer favorite are
+                           kept, e.g. by the spool daemon, None for a new session
+            report_path:   path of the reports without extension, e.g. of a daemon batch, empty for the path by
+                           the names of the CSV files
+        """
+
+        self.doc           = doc
+        self.csv_file      = csv_file
+        self.settings_path = settings_path
+        self.export_type   = export_type
+        self.options       = options
+        self.headless      = headless
+
+        self.csv_files            = [(csv_file, settings_path)] + [(path, get_settings_path(path))
+                                                                   for path in more_files]
+        self.report_path          = report_path or get_report_path(csv_file, more_files)
+        self.layer_state_label    = AllplanSettings.AllplanPaths.GetUsrPath() + "tmp\\CurrentLayerState.lfa"
+        self.save_layer_file_name = AllplanSettings.AllplanPaths.GetUsrPath() + "tmp\\CurrentLayerState." + \
+                                    os.path.basename(self.report_path) + ".lfa"
+        self.run_id               = create_run_id()
+
+        self.error_report = ErrorReport(self.report_path + ".errors.json", csv_file, headless)
+        self.event_log    = EventLog(self.report_path + ".events.jsonl", self.run_id)
+        self.journal      = CheckpointJournal(self.report_path + ".journal.jsonl")
+        self.history      = None if options.no_history else \
+                            RunHistory(options.history or
+                                       AllplanSettings.AllplanPaths.GetUsrPath() + "BatchExportHistory.sqlite")
+        self.session      = session or ExportSession(doc, full_reload, options.redraw)
+        self.monitor      = ProcessMonitor(options.recycle_rows, options.recycle_memory)
+        self.metrics      = RunMetrics("" if options.no_metrics else
+                                       os.path.join(options.metrics_dir, "batch_export_" +
+                                                    os.path.basename(self.report_path) + ".prom")
+                                       if options.metrics_dir else self.report_path + ".prom",
+                                       "" if options.no_metrics else self.report_path + ".status.json",
+                                       self.run_id, csv_file, export_type or "IFC+DWG")
+        self.log_file     = None
+        self.invalid_rows = 0
+        self.recycled     = ""
+
+        self.project_paths: Dict[Tuple[str, str], Tuple[bool, str]] = {}
+        self.final_paths  : Dict[str, str] = {}
+
+
+        #----------------- state of the export loop
+
+        self.manifest      : Optional[ExportManifest] = None
+        self.verifier      : Optional[OutputVerifier] = None
+        self.progress_bar  : Optional[AllplanUtil.ProgressBar] = None
+        self.remaining_time = RemainingTime([])
+        self.staging        = False
+        self.compression    = False
+        self.staging_path   = ""
+
+        self.remaining_exports: Dict[Tuple, int] = {}
+        self.fan_out_sources  : Dict[Tuple, Tuple[str, int]] = {}
+        self.pending_outputs  : Dict[Tuple[int, str], Tuple[str, str]] = {}
+        self.statuses         : Dict[str, int] = {}
+        self.verified         : Dict[str, int] = {}
+
+        self.duplicate_rows = 0
+        self.deduplicated   = 0
+        self.regressions    = 0
+        self.export_time    = 0.0
+
+
+    def add_error(self,
+                  category    : str,
+                  message     : str,
+                  show_message: bool = True,
+                  **details   : Any):
+        """ Add an error to the error report, the log file and the event log
+
+        Args:
+            category:     category of the error
+            message:      error message
+            show_message: show the message in a message box in the interactive mode
+            details:      additional values describing the error
+        """
+
+        if self.log_file:
+            self.log_file.write("\n" + message.replace("\n\n", " ") + " !!!\n\n")
+
+        self.error_report.add(category, message, show_message, **details)
+
+        self.event_log.write("error", category = category, message = message, **details)
+
+        self.metrics.add_error(category, message)
+
+
+    def get_sources(self) -> List[Tuple[str, str, str]]:
+        """ Get the CSV files with their settings path and export type
+
+        Returns:
+            path, settings path and export type of each CSV file, the export type is empty for a merged job file
+        """
+
+        return [(path, settings_path, self.export_type or get_export_type(path))
+                for path, settings_path in self.csv_files]
+
+
+    def read_jobs(self) -> Iterator[ExportJob]:
+        """ Read the export jobs from the CSV files
+
+        Yields:
+            export jobs
+        """
+
+        def on_error(category: str, message: str, **details: Any):
+            """ report an invalid row without message box
+
+            Args:
+                category: category of the error
+                message:  error message
+                details:  additional values describing the error
+            """
+            self.invalid_rows += 1
+
+            self.add_error(category, message, False, **details)
+
+        first_row_index = 1
+
+        for csv_file, settings_path, export_type in self.get_sources():
+            yield from expand_jobs(read_jobs(csv_file, settings_path, export_type, self.save_layer_file_name,
+                                             on_error, first_row_index), on_error)
+
+            first_row_index += sum(1 for _ in read_rows(csv_file))
+
+
+    def export(self,
+               jobs      : Iterable[ExportJob],
+               export_job: Callable[[ExportSession, ExportJob, str], None]):
+        """ Export the jobs
+
+        Args:
+            jobs:       export jobs
+            export_job: function to export a job to the given file
+        """
+
+        for csv_file, _ in self.csv_files:
+            if not os.path.isfile(csv_file):
+                self.error_report.add("csv_file_not_found", "Datei " + csv_file + " ist nicht vorhanden")
+                self.error_report.write()
+                return
+
+
+        #----------------- continue the journal, log and error report of an interrupted run of the same CSV files
+
+        resumed = self.journal.open(self.run_id, "+".join(get_file_hash(csv_file) for csv_file, _ in self.csv_files),
+                                    self.options.restart)
+
+        if resumed:
+            self.error_report.load()
+
+        self.log_file = open(self.report_path + ".log", "a" if resumed else "w",     # pylint: disable=consider-using-with
+                             encoding = "UTF-8")
+
+        self.log_file.write("Run ID: " + self.run_id + "\n")
+
+        if resumed:
+            self.log_file.write("Resumed run:    " + self.journal.resumed_from + ", " +
+                                str(sum(self.journal.completed.values())) + " rows already completed\n")
+
+        self.event_log.open()
+        self.event_log.write("run_started", csv_file = self.csv_file,
+                             more_files = [csv_file for csv_file, _ in self.csv_files[1:]],
+                             export_type = self.export_type or "IFC+DWG",
+                             headless = self.headless, options = vars(self.options),
+                             resumed_from = self.journal.resumed_from)
+
+        self.metrics.start()
+
+        for error in self.options.errors:
+            self.add_error("invalid_option", error, False)
+
+        run_state = "failed"
+
+        self.final_paths = {"$usr$": AllplanSettings.AllplanPaths.GetUsrPath(),
+                            "$std$": AllplanSettings.AllplanPaths.GetStdPath(),
+                            "$prj$": AllplanSettings.AllplanPaths.GetCurPrjPath()}
+
+        try:
+            file_exists: Dict[str, bool] = {}
+
+            for csv_file, settings_path, export_type in self.get_sources():
+                file_exists.update(check_setting_files(csv_file, settings_path, export_type,
+                                                       self.save_layer_file_name))
+
+            if (valid_jobs := self.validate(list(jobs), file_exists)) is not None:
+                self.execute(valid_jobs, export_job)
+
+            if self.recycled:
+                self.journal.recycle(self.run_id, self.recycled)
+            else:
+                self.journal.finish(self.run_id)
+
+            run_state = "recycled" if self.recycled else "finished" if valid_jobs is not None else "aborted"
+
+        finally:
+            self.metrics.finish(run_state)
+
+            self.journal.close()
+
+            if self.history:
+                self.history.close()
+
+            self.log_file.close()
+            self.log_file = None
+
+            self.event_log.close()
+
+            self.error_report.write()
+
+
+    def get_final_path(self,
+                       path: str) -> str:
+        """ get the final path
+
+        Args:
+            path: path, can contain $usr$, $std$ and $prj$
+
+        Returns:
+            final path
+        """
+
+        for key, value in self.final_paths.items():
+            path = path.replace(key, value)
+
+        return path.rstrip("\n")
+
+
+    def get_project_path(self,
+                         host_name   : str,
+                         project_name: str) -> Tuple[bool, str]:
+        """ Get the path of a project, the result is cached for the run
+
+        Args:
+            host_name:    host name
+            project_name: project name
+
+        Returns:
+            error,
+            path of the project
+        """
+
+        if (result := self.project_paths.get((host_name, project_name))) is None:
+            result = self.project_paths[host_name, project_name] = \
+                AllplanBaseElements.ProjectService.GetProjectPath(host_name, project_name)
+
+        return result
+
+
+    def relaunch(self):
+        """ Start a new Allplan process with the same command line, which resumes the recycled run
+
+        The relaunch is called after the export, immediately before Allplan is closed, so that the two processes
+        don't run side by side.
+        """
+
+        if not self.recycled or self.options.no_relaunch:
+            return
+
+        self.event_log.open()
+
+        try:
+            if not (arguments := get_command_line()):
+                self.add_error("session_not_relaunched", "The command line of Allplan is not available, the run is "
+                               "resumed by the next start", False)
+                return
+
+            try:
+                relaunch(arguments)
+
+            except OSError as error:
+                self.add_error("session_not_relaunched", "Allplan not started again: " + str(error), False)
+                return
+
+            self.event_log.write("session_relaunched", command_line = arguments)
+
+        finally:
+            self.event_log.close()
+
+            self.error_report.write()
+
+
+    def open_history(self):
+        """ Open the run history, the export continues without history, if the database can't be opened
+        """
+
+        if not self.history:
+            return
+
+        try:
+            self.history.open()
+
+        except sqlite3.Error as error:
+            self.add_error("history_not_available", "Run history " + self.history.history_file +
+                           " not available: " + str(error), False)
+
+            self.history.close()
+            self.history = None
+
+
+    def validate(self,
+                 jobs       : List[ExportJob],
+                 file_exists: Dict[str, bool]) -> Optional[List[ExportJob]]:
+        """ Validate the jobs before the export, the problems are written to <CSV name>.preflight.json
+
+        Args:
+            jobs:        export jobs
+            file_exists: existence of each setting file
+
+        Returns:
+            jobs to export, None if the export is aborted
+        """
+
+        assert self.log_file
+
+        timer = PhaseTimer()
+        mode  = self.options.preflight
+
+        destinations = {job.row_index: self.get_final_path(job.destination_folder) for job in jobs}
+
+        writable = check_destinations(destinations.values())
+
+        timer.lap("destinations")
+
+
+        #----------------- the Allplan API is only called from the main thread
+
+        project_exists = {key: not self.get_project_path(*key)[0]
+                          for key in dict.fromkeys(job.project_key for job in jobs)}
+
+        timer.lap("projects")
+
+        problems = check_jobs(jobs, file_exists, destinations, writable, project_exists)
+
+        write_report(self.report_path + ".preflight.json", self.csv_file, mode, jobs, self.invalid_rows, problems)
+
+        valid_rows = len({job.row_index for job in jobs}) - len(problems)
+
+        self.log_file.write(f"Pre-flight:     {valid_rows} valid rows, {len(problems)} rows with "
+                            f"problems, {self.invalid_rows} invalid rows ({mode})\n")
+
+        self.event_log.write("preflight", mode = mode, valid_rows = valid_rows,
+                             rows_with_problems = len(problems), invalid_rows = self.invalid_rows,
+                             phases = timer.phases, duration = timer.total)
+
+        if mode == "report" or not (problems or self.invalid_rows):
+            return jobs
+
+        jobs_by_row = {job.row_index: job for job in jobs}
+
+        for row_index, row_problems in sorted(problems.items()):
+            for category, message in row_problems:
+                self.add_error(category, message, False, row_index = row_index,
+                               host_name = jobs_by_row[row_index].host_name,
+                               project_name = jobs_by_row[row_index].project_name)
+
+        report_text = f"{len(problems) + self.invalid_rows} rows with problems, see " + \
+                      self.report_path + ".preflight.json"
+
+        if mode == "abort":
+            self.add_error("preflight_failed", "Export aborted: " + report_text)
+            return None
+
+        if problems:
+            self.add_error("preflight_rows_dropped", "Rows not exported: " + report_text,
+                           rows = sorted(problems))
+
+        return [job for job in jobs if job.row_index not in problems]
+
+
+    def execute(self,
+                jobs      : List[ExportJob],
+                export_job: Callable[[ExportSession, ExportJob, str], None]):
+        """ Execute the export of the jobs
+
+        Args:
+            jobs:       export jobs
+            export_job: function to export a job to the given file
+        """
+
+        jobs = self.schedule(jobs)
+
+
+        #----------------- save the current project, file and layer state, not needed in headless mode, Allplan
+        #                  is closed after the export. The layer state is only saved for rows without layer favorite.
+
+        current_project_name, current_host_name = AllplanBaseElements.ProjectService.GetCurrentProjectNameAndHost()
+
+        current_file_list = [] if self.headless else self.session.drawing_file_serv.GetFileState()
+
+        layer_path = AllplanSettings.AllplanPaths.GetUsrPath() + "tmp"
+
+        if not os.path.exists(layer_path):
+            os.makedirs(layer_path)
+
+        if (not self.headless or any(job.layer_favorite_file == self.save_layer_file_name for job in jobs)) and \
+                not AllplanBaseElements.LayerService.SaveToFavoriteFile(self.doc, self.save_layer_file_name):
+            self.error_report.add("layer_state_not_saved", "Not possible to save the current layer state")
+            return
+
+
+        #----------------- execute the export -------------------------------------------------------------------------
+
+        self.start_export(jobs)
+
+        assert self.verifier
+
+        start_time = time.perf_counter()
+
+        for job in jobs:
+            if not self.export_row(job, export_job):
+                break
+
+            for (row_index, row_key), result in self.verifier.collect():
+                self.handle_verification(row_index, row_key, result)
+
+        verification_wait_time = self.finish_export()
+
+        self.write_summary(len(jobs), time.perf_counter() - start_time, verification_wait_time)
+
+        if self.headless:
+            return
+
+
+        #----------------- reset the current drawing file and layer state
+
+        AllplanBaseElements.ProjectService.OpenProject(self.doc, current_project_name, current_host_name)
+
+        drawing_state_dict = {1 : AllplanBaseElements.DrawingFileLoadState.PassiveBackground,
+                              2 : AllplanBaseElements.DrawingFileLoadState.ActiveBackground,
+                              3 : AllplanBaseElements.DrawingFileLoadState.ActiveForeground}
+
+        for number, state in current_file_list:
+            self.session.drawing_file_serv.LoadFile(self.doc, number, drawing_state_dict[state])
+
+        if not AllplanBaseElements.LayerService.LoadFromFavoriteFile(self.doc, self.save_layer_file_name):
+            self.error_report.add("layer_state_not_loaded", "Not possible to load the current layer state")
+
+
+    def schedule(self,
+                 jobs: List[ExportJob]) -> List[ExportJob]:
+        """ Schedule the jobs grouped by project and ordered by drawing file similarity, the rows with the same
+            drawing files and layer favorite, e.g. an IFC and a DWG export, are exported together with one
+            loaded session
+
+        Args:
+            jobs: export jobs
+
+        Returns:
+            jobs in the execution order
+        """
+
+        assert self.log_file
+
+        order, saved_switches, operations_before, operations_after, session_count = \
+            schedule_rows([job.project_key for job in jobs], [job.load_states for job in jobs],
+                          [job.session_key for job in jobs])
+
+        jobs = [jobs[index] for index in order]
+
+        load_operations_text = "Predicted drawing file load operations: " + str(operations_before) + " before, " + \
+                               str(operations_after) + " after scheduling"
+
+        print(load_operations_text)
+
+        self.log_file.write("Project switches saved by scheduling: " + str(saved_switches) + "\n")
+        self.log_file.write(load_operations_text + "\n")
+        self.log_file.write(f"Loaded sessions: {session_count} for {len(jobs)} rows\n")
+
+
+        #----------------- a row with the same inputs as a previous row isn't exported again, the file of the
+        #                  previous row is fanned out to the row
+
+        if not self.options.no_dedupe:
+            for job in jobs:
+                self.remaining_exports[job.export_key] = self.remaining_exports.get(job.export_key, 0) + 1
+
+        self.duplicate_rows = sum(count - 1 for count in self.remaining_exports.values())
+
+        self.log_file.write(f"Duplicate rows: {self.duplicate_rows} with the same inputs as another row\n")
+
+        return jobs
+
+
+    def start_export(self,
+                     jobs: List[ExportJob]):
+        """ Start the export: create the progress bar, the staging folder and the verifier, and estimate the
+            duration of the rows by the run history
+
+        Args:
+            jobs: export jobs in the execution order
+        """
+
+        assert self.log_file
+
+        if not self.headless:
+            self.progress_bar = AllplanUtil.ProgressBar()
+            self.progress_bar.StartProgressbar(len(jobs), (self.export_type or "IFC+DWG") + " Batch Export", "",
+                                               True)
+
+        self.manifest = ExportManifest(self.report_path + ".manifest.json")
+
+
+        #----------------- the files are exported to a local staging folder and published by the verifier threads
+
+        self.staging      = not self.options.no_staging
+        self.compression  = self.staging and self.options.compress
+        self.staging_path = AllplanSettings.AllplanPaths.GetUsrPath() + "tmp\\BatchExportStaging\\" + self.run_id
+
+        if self.staging:
+            os.makedirs(self.staging_path, exist_ok = True)
+
+        self.verifier = OutputVerifier(PUBLISH_WORKERS if self.staging else VERIFY_WORKERS)
+
+
+        #----------------- estimate the duration of the rows by the run history
+
+        self.open_history()
+
+        estimates: List[Optional[float]] = []
+
+        first_exports = set()
+
+        for job in jobs:
+            if self.remaining_exports and job.export_key in first_exports:
+                estimates.append(0.0)
+                continue
+
+            first_exports.add(job.export_key)
+
+            estimates.append(self.history.estimate(get_job_history_key(job), len(job.file_numbers))
+                             if self.history else None)
+
+        self.remaining_time = RemainingTime(estimates)
+
+        self.metrics.plan(len(jobs), self.remaining_time.get_remaining())
+
+        if (estimated_time := self.remaining_time.get_remaining()) is not None:
+            estimate_text = "Estimated time: " + format_duration(estimated_time) + ", expected end " + \
+                            get_end_time(estimated_time)
+
+            print(estimate_text)
+
+            self.log_file.write(estimate_text + "\n")
+
+
+    def export_row(self,
+                   job       : ExportJob,
+                   export_job: Callable[[ExportSession, ExportJob, str], None]) -> bool:
+        """ Export a row: skip it, fan out the file of a row with the same inputs or load the session and export it
+
+        Args:
+            job:        export job
+            export_job: function to export a job to the given file
+
+        Returns:
+            False, if the session is recycled before the row, otherwise True
+        """
+
+        assert self.log_file and self.manifest
+
+        log_file = self.log_file
+        session  = self.session
+
+        host_name, project_name = job.project_key
+
+        timer = PhaseTimer()
+
+        if self.remaining_exports:
+            self.remaining_exports[job.export_key] -= 1
+
+
+        #---------------- skip the row, if the inputs are unchanged since the last export
+
+        export_path = self.get_final_path(job.destination_folder)
+
+        export_file_name = export_path + "\\" + get_published_name(job.filename, job.export_type, self.compression)
+
+        project_error, project_path = self.get_project_path(host_name, project_name)
+
+        self.metrics.start_row(job.row_index, job.project_key, export_file_name)
+
+        row_key     = ExportManifest.get_row_key(host_name, project_name, export_file_name)
+        fingerprint = compute_fingerprint([job.df_selection_file, job.layer_favorite_file,
+                                           job.export_favorite_file, job.config_file],
+                                          "" if project_error else project_path, job.file_numbers,
+                                          [job.export_type, job.version],
+                                          {self.save_layer_file_name: self.layer_state_label})
+
+        timer.lap("fingerprint")
+
+        if self.journal.is_completed(job.row_index, row_key):
+            log_file.write("-------------------------------------------------------------\n")
+            log_file.write("Completed by the interrupted run, skipped: " + export_file_name + "\n")
+
+            self.record_row(job, row_key, timer, "resumed", export_file_name)
+
+            return True
+
+        if not self.options.force and self.manifest.is_unchanged(row_key, fingerprint):
+            log_file.write("-------------------------------------------------------------\n")
+            log_file.write("Unchanged, skipped: " + export_file_name + "\n")
+
+            self.record_row(job, row_key, timer, "unchanged", export_file_name)
+
+            return True
+
+        if self.fan_out(job, row_key, fingerprint, timer, export_path, export_file_name):
+            return True
+
+        project_switch = session.project_key != job.project_key
+
+
+        #---------------- recycle the session of a headless run at the project boundary, a new Allplan process
+        #                 resumes the run with this row
+
+        if project_switch and session.project_key and self.headless and \
+                (recycle_reason := self.monitor.get_recycle_reason()):
+            self.recycled = recycle_reason
+
+            log_file.write("-------------------------------------------------------------\n")
+            log_file.write("Session recycled: " + recycle_reason + ", " + format_sample(self.monitor.sample) +
+                           ", continued by a new Allplan process\n")
+
+            self.event_log.write("session_recycled", reason = recycle_reason, rows = self.monitor.rows,
+                                 process = self.monitor.sample, next_row_index = job.row_index)
+            return False
+
+        load_operations = session.load_operations
+        layer_loads     = session.layer_loads
+
+        if (status := self.load_session(job, timer)):
+            self.record_row(job, row_key, timer, status, export_file_name)
+            return True
+
+
+        #---------------- export the file and submit it to the verification and publishing
+
+        status, target_file = self.export_file(job, export_job, timer, export_path, export_file_name)
+
+        if status == "destination_not_writable":
+            self.record_row(job, row_key, timer, status, export_file_name)
+            return True
+
+        output_size = 0
+
+        if status == "exported":
+            output_size = os.path.getsize(target_file)
+
+            if self.remaining_exports.get(job.export_key) and job.export_key not in self.fan_out_sources:
+                source_file = target_file
+
+                if self.staging:
+                    source_file = self.staging_path + "\\" + f"{job.row_index:05d}_source_" + job.filename
+
+                    try:
+                        fan_out_file(target_file, source_file, True)
+
+                    except OSError:
+                        source_file = ""
+
+                if source_file:
+                    self.fan_out_sources[job.export_key] = (source_file, job.row_index)
+
+            self.submit_output(job, row_key, fingerprint, target_file, export_file_name)
+
+        timer.lap("post_processing")
+
+        self.record_row(job, row_key, timer, status, export_file_name, output_size = output_size,
+                        project_switch = project_switch,
+                        load_operations = session.load_operations - load_operations,
+                        layer_loaded = session.layer_loads > layer_loads)
+
+        return True
+
+
+    def fan_out(self,
+                job             : ExportJob,
+                row_key         : str,
+                fingerprint     : str,
+                timer           : PhaseTimer,
+                export_path     : str,
+                export_file_name: str) -> bool:
+        """ Fan out the file of a row with the same inputs instead of exporting the row again
+
+        Args:
+            job:              export job
+            row_key:          key of the row
+            fingerprint:      fingerprint of the inputs of the row
+            timer:            timer of the phases of the row
+            export_path:      destination folder
+            export_file_name: path of the published file
+
+        Returns:
+            True, if the file was fanned out, False if the row is exported
+        """
+
+        assert self.log_file and self.verifier
+
+        if (source := self.fan_out_sources.get(job.export_key)) is None:
+            return False
+
+        source_file, source_row_index = source
+
+        target_file = self.staging_path + "\\" + f"{job.row_index:05d}_" + job.filename if self.staging else \
+                      export_file_name
+
+        try:
+            if not self.staging:
+                os.makedirs(export_path, exist_ok = True)
+
+                self.verifier.wait_for(export_file_name)
+
+            fan_out_method = fan_out_file(source_file, target_file, self.staging or self.options.fan_out == "link")
+
+        except OSError as error:
+            self.log_file.write("-------------------------------------------------------------\n")
+            self.log_file.write("Not fanned out: " + export_file_name + " (" + str(error) + "), exported\n")
+
+            fan_out_method = ""
+
+        self.release_source(job.export_key)
+
+        if not fan_out_method:
+            return False
+
+        self.log_file.write("-------------------------------------------------------------\n")
+        self.log_file.write(f"Same inputs as row {source_row_index}, {fan_out_method}: " + export_file_name + "\n")
+
+        self.deduplicated += 1
+
+        output_size = os.path.getsize(target_file)
+
+        self.submit_output(job, row_key, fingerprint, target_file, export_file_name)
+
+        timer.lap("post_processing")
+
+        self.record_row(job, row_key, timer, "deduplicated", export_file_name, output_size = output_size,
+                        source_row_index = source_row_index, fan_out = fan_out_method)
+
+        return True
+
+
+    def release_source(self,
+                       export_key: Tuple):
+        """ Remove the source file of the fan out, after the last row with the same inputs
+
+        Args:
+            export_key: key of the inputs of the export
+        """
+
+        if self.remaining_exports.get(export_key) or (source := self.fan_out_sources.pop(export_key, None)) is None:
+            return
+
+        if self.staging:
+            try:
+                os.remove(source[0])
+
+            except OSError:
+                pass
+
+
+    def load_session(self,
+                     job  : ExportJob,
+                     timer: PhaseTimer) -> str:
+        """ Open the project, load the drawing files and the layer favorite of a row
+
+        Args:
+            job:   export job
+            timer: timer of the phases of the row
+
+        Returns:
+            status of the failed row, empty if the session is loaded
+        """
+
+        session = self.session
+
+        host_name, project_name = job.project_key
+
+        check_structure_settings(host_name, project_name)
+
+        result = session.open_project(host_name, project_name)
+
+        timer.lap("open_project")
+
+        if result == "Project not exist":
+            self.add_error("project_not_exist", "Project " + project_name + "(" + host_name + ") doesn't exist",
+                           host_name = host_name, project_name = project_name, row_index = job.row_index)
+            return "project_not_exist"
+
+        if result == "Not possible to open the project":
+            self.add_error("project_not_opened",
+                           "Not possible to open the project " + project_name + "(" + host_name + ")",
+                           host_name = host_name, project_name = project_name, row_index = job.row_index)
+            return "project_not_opened"
+
+        if result != "Active project":
+            session.redraw(False)
+
+            timer.lap("redraw")
+
+
+        #---------------- load the drawing files
+
+        session.load_drawing_files(job.file_numbers, job.passive_files)
+
+        timer.lap("load_drawing_files")
+
+
+        #---------------- load the layer settings and draw all
+
+        if not session.load_layer_favorite(job.layer_favorite_file):
+            self.add_error("layer_favorite_not_loaded",
+                           "Loading for layer favorite not possible: " + "\n\n" + job.layer_favorite_file,
+                           host_name = host_name, project_name = project_name, row_index = job.row_index,
+                           file = job.layer_favorite_file)
+            return "layer_favorite_not_loaded"
+
+        timer.lap("load_layer_favorite")
+
+        session.redraw(True)
+
+        timer.lap("redraw")
+
+        return ""
+
+
+    def export_file(self,
+                    job             : ExportJob,
+                    export_job      : Callable[[ExportSession, ExportJob, str], None],
+                    timer           : PhaseTimer,
+                    export_path     : str,
+                    export_file_name: str) -> Tuple[str, str]:
+        """ Export the file of a row, to the staging folder with staging
+
+        Args:
+            job:              export job
+            export_job:       function to export a job to the given file
+            timer:            timer of the phases of the row
+            export_path:      destination folder
+            export_file_name: path of the published file
+
+        Returns:
+            status of the row, e.g. "exported" or "failed",
+            path of the exported file
+        """
+
+        assert self.log_file and self.verifier
+
+        log_file = self.log_file
+        session  = self.session
+
+        host_name, project_name = job.project_key
+
+        if self.staging:
+            target_file = self.staging_path + "\\" + f"{job.row_index:05d}_" + job.filename
+        else:
+            target_file = export_file_name
+
+            try:
+                os.makedirs(export_path, exist_ok = True)
+
+            except OSError as error:
+                self.add_error("destination_not_writable",
+                               "Destination " + export_path + " not writable: " + str(error), False,
+                               host_name = host_name, project_name = project_name, row_index = job.row_index)
+                return "destination_not_writable", target_file
+
+            self.verifier.wait_for(export_file_name)
+
+            try:
+                os.remove(export_file_name)
+
+            except OSError:
+                pass
+
+        log_file.write("-------------------------------------------------------------\n")
+        log_file.write("Export files:   " + str(job.file_numbers) + "\n")
+
+        if job.passive_files:
+            log_file.write("Passive files:  " + str(job.passive_files) + "\n")
+        log_file.write("Layer favorite: " + job.layer_favorite_file + " (changed layers: " +
+                       ("all" if session.changed_layers is None else str(session.changed_layers)) + ")\n")
+        log_file.write(f"{job.export_type} favorite:   " + job.export_favorite_file + "\n")
+
+        if job.config_file:
+            log_file.write("Config file:    " + job.config_file + "\n")
+
+        log_file.write("export_file:    " + export_file_name + "\n")
+
+        if self.staging:
+            log_file.write("Staged file:    " + target_file + "\n")
+
+        timer.skip()
+
+        try:
+            export_job(session, job, target_file)
+
+            status = "exported" if os.path.isfile(target_file) else "no_output"
+
+        except Exception as error:                                      # pylint: disable=broad-except
+            self.add_error("export_failed", "Export of " + export_file_name + " failed: " + str(error),
+                           False, host_name = host_name, project_name = project_name,
+                           row_index = job.row_index)
+
+            status = "failed"
+
+        if self.staging and status != "exported":
+            try:
+                os.remove(target_file)
+
+            except OSError:
+                pass
+
+        timer.lap("export")
+
+        self.export_time += timer.phases["export"]
+
+        if status == "exported" and self.history and \
+                (history_time := self.history.is_regression(get_job_history_key(job), timer.phases["export"],
+                                                            self.options.regression_threshold)) is not None:
+            self.regressions += 1
+
+            log_file.write(f"Regression:     export took {timer.phases['export']:.1f} s, "
+                           f"{history_time:.1f} s in the history\n")
+
+            self.event_log.write("regression", row_index = job.row_index, output_file = export_file_name,
+                                 export_time = timer.phases["export"], history_time = round(history_time, 4))
+
+        return status, target_file
+
+
+    def submit_output(self,
+                      job             : ExportJob,
+                      row_key         : str,
+                      fingerprint     : str,
+                      target_file     : str,
+                      export_file_name: str):
+        """ Start the verification and publishing of the exported file, the file is added to the manifest,
+            when it is verified and published
+
+        Args:
+            job:              export job
+            row_key:          key of the row
+            fingerprint:      fingerprint of the inputs of the row
+            target_file:      path of the exported file, in the staging folder with staging
+            export_file_name: path of the published file
+        """
+
+        assert self.verifier
+
+        self.pending_outputs[job.row_index, row_key] = (fingerprint, export_file_name)
+
+        if self.staging:
+            self.verifier.submit((job.row_index, row_key), target_file, job.export_type,
+                                 functools.partial(publish_file, target_file, export_file_name, self.compression,
+                                                   job.filename),
+                                 export_file_name)
+        else:
+            self.verifier.submit((job.row_index, row_key), target_file, job.export_type)
+
+
+    def handle_verification(self,
+                            row_index: int,
+                            row_key  : str,
+                            result   : Dict[str, Any]):
+        """ Handle the result of the verification and publishing of an exported file, the row is completed
+            in the journal and updated in the manifest, if the file is valid and published
+
+        Args:
+            row_index: index of the row
+            row_key:   key of the row
+            result:    result of the verification
+        """
+
+        assert self.log_file and self.manifest
+
+        self.verified[result["status"]] = self.verified.get(result["status"], 0) + 1
+
+        self.event_log.write("verification", row_index = row_index, **result)
+
+        self.journal.write_row(row_index, row_key, result["status"], result["sha256"], result["status"] == "ok")
+
+        fingerprint, output_file = self.pending_outputs.pop((row_index, row_key))
+
+        if result["status"] == "ok":
+            self.manifest.update(row_key, fingerprint, output_file, result["sha256"])
+            return
+
+        self.manifest.rows.pop(row_key, None)
+
+        if result["status"] == "publish_failed":
+            self.log_file.write("Not published:  " + result["output_file"] + " (" + result["message"] + ")\n")
+
+            self.add_error("output_not_published", "Exported file " + result["output_file"] +
+                           " not published: " + result["message"], False, row_index = row_index,
+                           file = result["output_file"])
+            return
+
+        self.log_file.write("Invalid output: " + result["output_file"] + " (" + result["message"] + ")\n")
+
+        self.add_error("output_invalid", "Exported file " + result["output_file"] + " is invalid: " +
+                       result["message"], False, row_index = row_index, file = result["output_file"],
+                       status = result["status"], size = result["size"])
+
+
+    def record_row(self,
+                   job             : ExportJob,
+                   row_key         : str,
+                   timer           : PhaseTimer,
+                   status          : str,
+                   export_file_name: str,
+                   **values        : Any):
+        """ Record a row: write its event, its status to the journal and its durations to the run history,
+            and update the progress bar and the remaining time
+
+        Args:
+            job:              export job
+            row_key:          key of the row
+            timer:            timer with the durations of the phases
+            status:           status of the row, e.g. "exported" or "unchanged"
+            export_file_name: path of the exported file
+            values:           additional values of the event
+        """
+
+        assert self.log_file
+
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+        if status != "resumed":
+            self.journal.write_row(job.row_index, row_key, status, "", status == "unchanged")
+
+        duration = timer.total
+
+        if self.history and status not in ("unchanged", "resumed"):
+            try:
+                self.history.add_row(self.run_id, get_job_history_key(job), len(job.file_numbers), status,
+                                     duration, timer.phases)
+
+            except sqlite3.Error as error:
+                self.add_error("history_not_written", "Run history not written: " + str(error), False)
+
+                self.history.close()
+                self.history = None
+
+        self.remaining_time.complete(duration, status == "exported")
+
+        sample = self.monitor.sample_row(status not in ("unchanged", "resumed"))
+
+        if sample and status not in ("unchanged", "resumed"):
+            self.log_file.write("Process:        " + format_sample(sample) + "\n")
+
+        remaining = self.remaining_time.get_remaining()
+
+        self.event_log.write("row", row_index = job.row_index, host_name = job.host_name,
+                             project_name = job.project_name, output_file = export_file_name, status = status,
+                             file_count = len(job.file_numbers), phases = timer.phases, duration = duration,
+                             remaining_time = None if remaining is None else round(remaining, 1),
+                             process = sample, **values)
+
+        self.metrics.add_row(status, timer.phases, values.get("output_size", 0), remaining, sample)
+
+        if remaining is not None and status not in ("unchanged", "resumed"):
+            self.log_file.write("Remaining time: " + format_duration(remaining) + ", expected end " +
+                                get_end_time(remaining) + "\n")
+
+        if self.progress_bar:
+            self.progress_bar.MakeStep(1)
+
+
+    def finish_export(self) -> float:
+        """ Collect the verification and publishing of the exported files, an invalid or not published file is
+            exported again next time, and remove the staging folder
+
+        Returns:
+            time waited for the verification in seconds
+        """
+
+        assert self.manifest and self.verifier
+
+        verification_start_time = time.perf_counter()
+
+        for (row_index, row_key), result in self.verifier.finish():
+            self.handle_verification(row_index, row_key, result)
+
+        verification_wait_time = time.perf_counter() - verification_start_time
+
+        for export_key in list(self.fan_out_sources):
+            self.remaining_exports[export_key] = 0
+
+            self.release_source(export_key)
+
+        if self.staging:
+            try:
+                os.rmdir(self.staging_path)
+
+            except OSError:
+                pass
+
+        self.manifest.write()
+
+        self.session.finish_redraw()
+
+        return verification_wait_time
+
+
+    def write_summary(self,
+                      row_count             : int,
+                      total_time            : float,
+                      verification_wait_time: float):
+        """ Write the summary of the run to the log and the event log
+
+        Args:
+            row_count:              number of rows
+            total_time:             duration of the export in seconds
+            verification_wait_time: time waited for the verification at the end in seconds
+        """
+
+        assert self.log_file
+
+        log_file = self.log_file
+        session  = self.session
+        verified = self.verified
+
+        log_file.write("-------------------------------------------------------------\n")
+        log_file.write("Unchanged rows skipped: " + str(self.statuses.get("unchanged", 0)) + "\n")
+        log_file.write("Drawing file load operations: " + str(session.load_operations) + "\n")
+        log_file.write("Layer favorite loads: " + str(session.layer_loads) + ", skipped: " +
+                       str(session.layer_loads_skipped) + "\n")
+        log_file.write(f"Redraw policy:  {session.redraw_policy}, "
+                       f"{session.redraw_count} redraws in {session.redraw_time:.2f} s\n")
+        log_file.write(f"Export time:    {self.export_time:.2f} s\n")
+        log_file.write(f"Exporter calls saved by deduplication: {self.deduplicated} of {self.duplicate_rows} "
+                       f"duplicate rows\n")
+        log_file.write(f"Regressed rows: {self.regressions} (threshold {self.options.regression_threshold:.0%})\n")
+        log_file.write("Peak process:   " + format_sample(self.monitor.peak) + "\n")
+        log_file.write(f"Verified files: {verified.get('ok', 0)} ok, {sum(verified.values()) - verified.get('ok', 0)} "
+                       f"invalid or not published, {verification_wait_time:.2f} s waited at the end\n")
+        log_file.write(f"Total time:     {total_time:.2f} s\n")
+
+        self.event_log.write("run_finished", rows = row_count, statuses = self.statuses,
+                             load_operations = session.load_operations, layer_loads = session.layer_loads,
+                             layer_loads_skipped = session.layer_loads_skipped, redraw_count = session.redraw_count,
+                             redraw_time = round(session.redraw_time, 4), export_time = round(self.export_time, 4),
+                             deduplicated = self.deduplicated, regressions = self.regressions,
+                             peak_process = self.monitor.peak, recycled = self.recycled, verified = verified,
+                             verification_wait_time = round(verification_wait_time, 4),
+                             total_time = round(total_time, 4))
@@ -0,0 +1,212 @@
+""" State of the Allplan session during the batch export
+
+The session tracks the opened project, the loaded drawing files and the loaded layer favorite by
+SessionState, so that only the differences to the previous row must be applied by the Allplan API. The
+redraws of the view are executed by the redraw policy, see SessionState.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+import time
+
+import NemAll_Python_BaseElements as AllplanBaseElements
+import NemAll_Python_IFW_ElementAdapter as AllplanEleAdapter
+
+from .LayerFavorite import get_changed_layers, get_layer_state
+from .SessionState import SessionState
+
+
+class ExportSession():
+    """ Definition of class ExportSession
+    """
+
+    def __init__(self,
+                 doc          : AllplanEleAdapter.DocumentAdapter,
+                 full_reload  : bool = False,
+                 redraw_policy: str = "required"):
+        """ Initialization of class ExportSession
+
+        Args:
+            doc:           document of the Allplan drawing files
+            full_reload:   unload all drawing files and load the complete selection for each row
+            redraw_policy: redraw policy, one of ExportOptions.REDRAW_POLICIES
+        """
+
+        self.doc               = doc
+        self.drawing_file_serv = AllplanBaseElements.DrawingFileService()
+
+        self.state = SessionState(full_reload, redraw_policy,
+                                  AllplanBaseElements.DrawingFileLoadState.ActiveForeground,
+                                  AllplanBaseElements.DrawingFileLoadState.ActiveBackground,
+                                  AllplanBaseElements.DrawingFileLoadState.PassiveBackground)
+
+        self.changed_layers: Optional[int] = None
+
+        self.load_operations     = 0
+        self.layer_loads         = 0
+        self.layer_loads_skipped = 0
+        self.redraw_count        = 0
+        self.redraw_time         = 0.0
+
+
+    @property
+    def project_key(self) -> Optional[tuple]:
+        """ Get the key of the opened project
+
+        Returns:
+            host name and project name, None if unknown
+        """
+
+        return self.state.project_key
+
+
+    @property
+    def redraw_policy(self) -> str:
+        """ Get the redraw policy
+
+        Returns:
+            redraw policy, one of ExportOptions.REDRAW_POLICIES
+        """
+
+        return self.state.redraw_policy
+
+
+    def open_project(self,
+                     host_name   : str,
+                     project_name: str) -> str:
+        """ Open the project
+
+        Args:
+            host_name:    host name
+            project_name: project name
+
+        Returns:
+            result of ProjectService.OpenProject
+        """
+
+        result = AllplanBaseElements.ProjectService.OpenProject(self.doc, host_name, project_name)
+
+        self.state.open_project((host_name, project_name), result == "Active project")
+
+        return result
+
+
+    def invalidate(self):
+        """ Forget the tracked state, the next row starts with a full reload
+        """
+
+        self.state.invalidate()
+
+
+    def load_drawing_files(self,
+                           file_numbers : List[int],
+                           passive_files: Sequence[int] = ()):
+        """ Load the drawing files, the first one as active foreground and the others as active background
+
+        Only the difference to the currently loaded files is applied. In case of a full reload or an unknown
+        state, all files are unloaded first.
+
+        Args:
+            file_numbers:  numbers of the drawing files
+            passive_files: numbers of the drawing files loaded as passive background, e.g. the files of the other
+                           sub-jobs of a split row, so that only the active files change between the sub-jobs
+        """
+
+        unload_all, first_loads, unloads, loads, target = self.state.change_drawing_files(file_numbers, passive_files)
+
+        if unload_all:
+            self.drawing_file_serv.UnloadAll(self.doc)
+            self.load_operations += 1
+
+
+        #----------------- the foreground file first, a loaded file can't be unloaded without a new foreground file
+
+        for number in first_loads:
+            self.drawing_file_serv.LoadFile(self.doc, number, target[number])
+            self.load_operations += 1
+
+        for number in unloads:
+            self.drawing_file_serv.UnloadFile(self.doc, number)
+            self.load_operations += 1
+
+        for number in loads:
+            self.drawing_file_serv.LoadFile(self.doc, number, target[number])
+            self.load_operations += 1
+
+
+    def load_layer_favorite(self,
+                            layer_favorite_file: str) -> bool:
+        """ Load the layer favorite
+
+        The favorite is not loaded, if the file content is the same as of the currently loaded favorite,
+        e.g. for the same file or a copy of it. The layer API allows no change of single layer states, so a
+        different favorite is always loaded completely.
+
+        Args:
+            layer_favorite_file: path of the layer favorite file
+
+        Returns:
+            True, if the layer states of the favorite are loaded
+        """
+
+        try:
+            layer_state, layer_hash = get_layer_state(layer_favorite_file)
+
+        except (OSError, ValueError):
+            layer_state, layer_hash = None, ""
+
+        if self.state.is_layer_favorite_loaded(layer_hash):
+            self.layer_loads_skipped += 1
+            self.changed_layers       = 0
+
+            return True
+
+        self.changed_layers = None if self.state.layer_state is None or layer_state is None else \
+                              len(get_changed_layers(self.state.layer_state, layer_state))
+
+        self.state.set_layer_favorite(None, "")
+
+        if not AllplanBaseElements.LayerService.LoadFromFavoriteFile(self.doc, layer_favorite_file):
+            return False
+
+        self.layer_loads += 1
+
+        self.state.set_layer_favorite(layer_state, layer_hash)
+
+        return True
+
+
+    def redraw(self,
+               required: bool):
+        """ Redraw the view by the redraw policy
+
+        Args:
+            required: the redraw is needed by the export, it is skipped if the view is unchanged
+        """
+
+        if self.state.redraw(required):
+            self.redraw_all()
+
+
+    def finish_redraw(self):
+        """ Execute the redraw deferred by the redraw policy "end"
+        """
+
+        if self.state.redraw_pending:
+            self.redraw_all()
+
+
+    def redraw_all(self):
+        """ Redraw the view and measure the time
+        """
+
+        start_time = time.perf_counter()
+
+        AllplanBaseElements.DrawingService.RedrawAll(self.doc)
+
+        self.redraw_time  += time.perf_counter() - start_time
+        self.redraw_count += 1
+
+        self.state.set_redrawn()
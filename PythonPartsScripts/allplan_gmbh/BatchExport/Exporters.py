@@ -0,0 +1,75 @@
+""" Export functions of the IFC and the DWG export
+
+The export functions are called by the runner with the loaded session. The combined export calls the
+function of the export type of each job, so that the IFC and the DWG export of the same drawing files
+use the same loaded session.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+import NemAll_Python_BaseElements as AllplanBaseElements
+import NemAll_Python_AllplanSettings as AllplanSettings
+
+from .DerivedFavorites import get_derived_favorite
+from .ExportJob import ExportJob
+from .ExportSession import ExportSession
+
+
+def export_ifc(session         : ExportSession,
+               job             : ExportJob,
+               export_file_name: str):
+    """ Export the loaded drawing files to IFC
+
+    Args:
+        session:          export session with the loaded drawing files
+        job:              export job
+        export_file_name: path of the IFC file
+    """
+
+    version = getattr(AllplanBaseElements, job.version, None)
+
+    session.drawing_file_serv.ExportIFC(session.doc, job.file_numbers,
+                                        version if version else AllplanBaseElements.Ifc_4,
+                                        export_file_name, job.export_favorite_file)
+
+
+def export_dwg(session         : ExportSession,
+               job             : ExportJob,
+               export_file_name: str):
+    """ Export the loaded drawing files to DWG or DXF
+
+    The configuration file is set in a derived copy of the favorite, the original favorite is unchanged.
+
+    Args:
+        session:          export session with the loaded drawing files
+        job:              export job
+        export_file_name: path of the DWG or DXF file
+    """
+
+    favorite_file = job.export_favorite_file
+
+    if job.config_file:
+        favorite_file = get_derived_favorite(favorite_file, job.config_file,
+                                             AllplanSettings.AllplanPaths.GetUsrPath() + "tmp\\DerivedFavorites")
+
+    session.drawing_file_serv.ExportDWGByTheme(session.doc, export_file_name, favorite_file, int(job.version))
+
+
+EXPORT_FUNCTIONS: Dict[str, Callable[[ExportSession, ExportJob, str], None]] = {"IFC": export_ifc,
+                                                                                "DWG": export_dwg}
+
+
+def export_job(session         : ExportSession,
+               job             : ExportJob,
+               export_file_name: str):
+    """ Export the loaded drawing files by the export type of the job
+
+    Args:
+        session:          export session with the loaded drawing files
+        job:              export job
+        export_file_name: path of the exported file
+    """
+
+    EXPORT_FUNCTIONS[job.export_type](session, job, export_file_name)
@@ -0,0 +1,295 @@
+""" Scheduling of the export rows
+
+The rows of the CSV file are reordered before the export, so that rows of the same project are
+executed one after another and the project must only be opened once. Inside a project, the rows
+are ordered by the similarity of their drawing file selections, so that as few drawing files as
+possible must be loaded and unloaded between two rows. Rows with the same drawing file selection and layer
+favorite, e.g. the IFC and DWG export of the same files, are executed together with one loaded session.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+FOREGROUND = "foreground"
+BACKGROUND = "background"
+PASSIVE    = "passive"
+
+
+def count_project_switches(project_keys: Sequence[Hashable]) -> int:
+    """ Count the project switches needed to process the rows in the given order
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+
+    Returns:
+        number of project switches, the opening of the first project included
+    """
+
+    switches = 0
+    previous = None
+
+    for index, key in enumerate(project_keys):
+        if index == 0 or key != previous:
+            switches += 1
+
+        previous = key
+
+    return switches
+
+
+def group_by_project(project_keys: Sequence[Hashable]) -> List[int]:
+    """ Get the row order grouped by project
+
+    The groups are ordered by the first occurrence of the project, the file order inside a group is kept.
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+
+    Returns:
+        indices of the rows in the scheduled order
+    """
+
+    groups: Dict[Hashable, List[int]] = {}
+
+    for index, key in enumerate(project_keys):
+        groups.setdefault(key, []).append(index)
+
+    return [index for group in groups.values() for index in group]
+
+
+def schedule_by_project(project_keys: Sequence[Hashable]) -> Tuple[List[int], int]:
+    """ Schedule the rows grouped by project
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+
+    Returns:
+        indices of the rows in the scheduled order,
+        number of project switches saved compared with the input order
+    """
+
+    order = group_by_project(project_keys)
+
+    saved_switches = count_project_switches(project_keys) - \
+                     count_project_switches([project_keys[index] for index in order])
+
+    return order, saved_switches
+
+
+def get_load_states(file_numbers : Sequence[int],
+                    passive_files: Sequence[int],
+                    foreground   : T,
+                    background   : T,
+                    passive      : T) -> Dict[int, T]:
+    """ Get the load state of each drawing file of a row
+
+    Args:
+        file_numbers:  numbers of the exported drawing files, the first one is the foreground file
+        passive_files: numbers of the drawing files loaded as passive background
+        foreground:    state of the active foreground file
+        background:    state of an active background file
+        passive:       state of a passive background file
+
+    Returns:
+        load state by drawing file number
+    """
+
+    states = dict.fromkeys(passive_files, passive)
+
+    states.update(dict.fromkeys(file_numbers, background))
+
+    if file_numbers:
+        states[file_numbers[0]] = foreground
+
+    return states
+
+
+def get_load_changes(loaded    : Dict[int, T],
+                     target    : Dict[int, T],
+                     foreground: T) -> Tuple[List[int], List[int], List[int]]:
+    """ Get the load and unload operations to change from the loaded files to the target states
+
+    A changed foreground file is loaded first, a loaded file can't be unloaded without a new foreground file.
+
+    Args:
+        loaded:     load state of the loaded drawing files
+        target:     load state of the drawing files of the row
+        foreground: state of the active foreground file
+
+    Returns:
+        files loaded before the unloads,
+        files to unload,
+        files loaded after the unloads
+    """
+
+    changed = [number for number, state in target.items() if loaded.get(number) != state]
+
+    changed.sort(key = lambda number: target[number] != foreground)
+
+    first_loads = changed[:1] if changed and target[changed[0]] == foreground else []
+
+    return first_loads, [number for number in loaded if number not in target], changed[len(first_loads):]
+
+
+def transition_cost(loaded: Optional[Dict[int, Hashable]],
+                    target: Dict[int, Hashable]) -> int:
+    """ Get the number of load operations to change from the loaded files to the load states of a row
+
+    The operations are counted like in ExportSession.load_drawing_files, the passive background files included.
+
+    Args:
+        loaded: load state of the loaded files, None for an unknown state after a project switch
+        target: load state of the drawing files of the row by get_load_states with FOREGROUND, BACKGROUND and
+                PASSIVE
+
+    Returns:
+        number of unload, load and state change operations
+    """
+
+    if loaded is None:
+        return len(target) + 1
+
+    return sum(len(files) for files in get_load_changes(loaded, target, FOREGROUND))
+
+
+def count_load_operations(project_keys: Sequence[Hashable],
+                          load_states : Sequence[Dict[int, Hashable]]) -> int:
+    """ Predict the number of drawing file load operations for the rows in the given order
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+        load_states:  load state of the drawing files of each row
+
+    Returns:
+        number of load operations, the full loads after each project switch included
+    """
+
+    operations = 0
+    previous   = None
+
+    for index, (key, target) in enumerate(zip(project_keys, load_states)):
+        loaded = None if index == 0 or key != project_keys[index - 1] else previous
+
+        operations += transition_cost(loaded, target)
+
+        previous = target
+
+    return operations
+
+
+def order_by_file_sets(project_keys: Sequence[Hashable],
+                       load_states : Sequence[Dict[int, Hashable]],
+                       order       : Sequence[int]) -> List[int]:
+    """ Order the rows of each project by the similarity of their drawing file selections
+
+    Greedy nearest neighbour: each project starts with its first row, the next row is always the one
+    with the fewest load operations from the current selection. Equal costs keep the given order.
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+        load_states:  load state of the drawing files of each row
+        order:        row order grouped by project
+
+    Returns:
+        indices of the rows in the optimized order
+    """
+
+    result: List[int] = []
+
+    start = 0
+
+    while start < len(order):
+        end = start
+
+        while end < len(order) and project_keys[order[end]] == project_keys[order[start]]:
+            end += 1
+
+        remaining = list(order[start + 1:end])
+        current   = order[start]
+
+        result.append(current)
+
+        while remaining:
+            nearest = min(remaining, key = lambda index: transition_cost(load_states[current], load_states[index]))
+
+            remaining.remove(nearest)
+            result.append(nearest)
+
+            current = nearest
+
+        start = end
+
+    return result
+
+
+def predict_load_operations(project_keys: Sequence[Hashable],
+                            load_states : Sequence[Dict[int, Hashable]],
+                            order       : Sequence[int]) -> int:
+    """ Predict the drawing file load operations of the rows in the given order
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+        load_states:  load state of the drawing files of each row
+        order:        row order
+
+    Returns:
+        number of load operations
+    """
+
+    return count_load_operations([project_keys[index] for index in order], [load_states[index] for index in order])
+
+
+def group_by_session(session_keys: Sequence[Hashable],
+                     order       : Sequence[int]) -> Tuple[List[int], int]:
+    """ Group the rows sharing one loaded session
+
+    The rows with the same session key (project, drawing file selection, layer favorite) are moved behind the
+    first row of their group, the order of the groups is kept.
+
+    Args:
+        session_keys: session key of each row
+        order:        scheduled row order
+
+    Returns:
+        indices of the rows in the grouped order,
+        number of groups
+    """
+
+    groups: Dict[Hashable, List[int]] = {}
+
+    for index in order:
+        groups.setdefault(session_keys[index], []).append(index)
+
+    return [index for group in groups.values() for index in group], len(groups)
+
+
+def schedule_rows(project_keys: Sequence[Hashable],
+                  load_states : Sequence[Dict[int, Hashable]],
+                  session_keys: Sequence[Hashable]) -> Tuple[List[int], int, int, int, int]:
+    """ Schedule the rows: grouped by project, ordered by drawing file similarity and grouped by loaded session
+
+    Args:
+        project_keys: project key (host name, project name) of each row
+        load_states:  load state of the drawing files of each row, see get_load_states
+        session_keys: session key of each row
+
+    Returns:
+        indices of the rows in the scheduled order,
+        number of project switches saved compared with the input order,
+        predicted load operations of the rows grouped by project,
+        predicted load operations of the scheduled order,
+        number of loaded sessions
+    """
+
+    order, saved_switches = schedule_by_project(project_keys)
+
+    operations_before = predict_load_operations(project_keys, load_states, order)
+
+    order, session_count = group_by_session(session_keys, order_by_file_sets(project_keys, load_states, order))
+
+    return order, saved_switches, operations_before, \
+           predict_load_operations(project_keys, load_states, order), session_count
@@ -0,0 +1,112 @@
+""" Reading of the layer favorite files (.lfa)
+
+A layer favorite contains a header line and one or more sections with the layer states. Each line
+of a section contains the first layer ID of a block and the states of the 256 layers of the block
+as hexadecimal bit mask:
+
+    # V1.00  17:03:2021 17.12.32
+    @     0@0000000100000000000000000000000000000000000000000000000000000000@
+    @  2048@0008000000000000000000000000000000000000000000000000000000000000@
+
+A new section starts when the layer ID of a block doesn't increase. The layer states are only read to count
+the changed layers. Whether two favorites are equal is decided by the hash of the raw file content, so also
+a change of a part which isn't read here causes a new load.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import hashlib
+import os
+
+
+LAYERS_PER_BLOCK = 256
+
+LayerState = Tuple[Dict[int, int], ...]
+
+_state_cache: Dict[Tuple[str, int, int], Tuple[LayerState, str]] = {}
+
+
+def read_layer_state(path: str) -> LayerState:
+    """ Read the layer states from a layer favorite file
+
+    Args:
+        path: path of the layer favorite file
+
+    Returns:
+        bit mask of each layer block, one dictionary for each section
+    """
+
+    sections: List[Dict[int, int]] = []
+
+    previous_id = -1
+
+    with open(path, "r", encoding = "UTF-8", errors = "replace") as file:
+        for line in file:
+            parts = line.strip().split("@")
+
+            if len(parts) < 3 or not parts[1].strip().isdigit():
+                continue
+
+            block_id = int(parts[1])
+
+            if not sections or block_id <= previous_id:
+                sections.append({})
+
+            if (bits := int(parts[2] or "0", 16)):
+                sections[-1][block_id] = bits
+
+            previous_id = block_id
+
+    return tuple(sections)
+
+
+def get_layer_state(path: str) -> Tuple[LayerState, str]:
+    """ Get the layer states and the hash of the file, the result is cached by path, modification time and size
+
+    Args:
+        path: path of the layer favorite file
+
+    Returns:
+        layer states,
+        SHA-256 of the raw file content
+    """
+
+    stat = os.stat(path)
+
+    key = (os.path.normcase(os.path.abspath(path)), stat.st_mtime_ns, stat.st_size)
+
+    if (cached := _state_cache.get(key)) is None:
+        with open(path, "rb") as file:
+            file_hash = hashlib.sha256(file.read()).hexdigest()
+
+        cached = _state_cache[key] = (read_layer_state(path), file_hash)
+
+    return cached
+
+
+def get_changed_layers(state_1: LayerState,
+                       state_2: LayerState) -> List[int]:
+    """ Get the IDs of the layers with a different state
+
+    Args:
+        state_1: first layer states
+        state_2: second layer states
+
+    Returns:
+        sorted layer IDs
+    """
+
+    changed = set()
+
+    for index in range(max(len(state_1), len(state_2))):
+        section_1 = state_1[index] if index < len(state_1) else {}
+        section_2 = state_2[index] if index < len(state_2) else {}
+
+        for block_id in section_1.keys() | section_2.keys():
+            diff = section_1.get(block_id, 0) ^ section_2.get(block_id, 0)
+
+            changed.update(block_id + LAYERS_PER_BLOCK - 1 - bit for bit in range(LAYERS_PER_BLOCK) if diff >> bit & 1)
+
+    return sorted(changed)
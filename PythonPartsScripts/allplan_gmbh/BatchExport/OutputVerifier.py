@@ -0,0 +1,291 @@
+""" Verification of the exported files
+
+The exported files are verified by a thread pool while Allplan exports the next row. Each file is read
+once in blocks, the SHA-256 and the number of entities are computed on the way:
+
+    IFC:     header ISO-10303-21; and trailer END-ISO-10303-21;, the entities are the lines starting with #
+    IFCZIP:  ZIP signature
+    DWG:     version signature AC10xx in the first bytes
+    DXF:     SECTION at the start and EOF at the end, the entities are the records of the ENTITIES section
+
+The verification of a file is only waited for, if the same file is exported again or at the end of the run.
+A file exported to the staging folder is published by the same thread after a successful verification.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import hashlib
+import os
+import re
+
+
+MAX_WORKERS = 2
+BLOCK_SIZE  = 1 << 20
+TAIL_SIZE   = 4096
+
+DWG_VERSIONS = {b"AC1009": "R12",
+                b"AC1012": "R13",
+                b"AC1014": "R14",
+                b"AC1015": "2000",
+                b"AC1018": "2004",
+                b"AC1021": "2007",
+                b"AC1024": "2010",
+                b"AC1027": "2013",
+                b"AC1032": "2018"}
+
+IFC_SCHEMA = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'")
+
+
+def count_dxf_entities(path: str) -> int:
+    """ Count the entities of an ASCII DXF file
+
+    Args:
+        path: path of the DXF file
+
+    Returns:
+        number of records with group code 0 in the ENTITIES section
+    """
+
+    entities   = 0
+    in_section = False
+
+    with open(path, "r", encoding = "ascii", errors = "replace") as file:
+        while (code := file.readline()):
+            value = file.readline().strip()
+
+            if code.strip() != "0":
+                continue
+
+            if value == "SECTION":
+                name_code, name = file.readline().strip(), file.readline().strip()
+                in_section      = name_code == "2" and name == "ENTITIES"
+            elif value == "ENDSEC":
+                in_section = False
+            elif in_section:
+                entities += 1
+
+    return entities
+
+
+def verify_output(path       : str,
+                  export_type: str) -> Dict[str, Any]:
+    """ Verify an exported file
+
+    Args:
+        path:        path of the exported file
+        export_type: "IFC" or "DWG"
+
+    Returns:
+        result with status ("ok", "missing", "empty" or "invalid"), size, SHA-256, format, entity count
+        and the message of a failed check
+    """
+
+    result: Dict[str, Any] = {"output_file": path, "status": "ok", "size": 0, "sha256": "", "format": "",
+                              "entities": None, "message": ""}
+
+    try:
+        result["size"] = os.path.getsize(path)
+
+    except OSError:
+        return dict(result, status = "missing", message = "File not found")
+
+    if not result["size"]:
+        return dict(result, status = "empty", message = "File is empty")
+
+    file_hash = hashlib.sha256()
+    head      = b""
+    tail      = b""
+    entities  = 0
+    last_byte = b"\n"
+
+    try:
+        with open(path, "rb") as file:
+            while (block := file.read(BLOCK_SIZE)):
+                file_hash.update(block)
+
+                if not head:
+                    head = block[:TAIL_SIZE]
+
+                entities += block.count(b"\n#") + (last_byte == b"\n" and block[:1] == b"#")
+
+                last_byte = block[-1:]
+                tail      = (tail + block)[-TAIL_SIZE:]
+
+    except OSError as error:
+        return dict(result, status = "invalid", message = str(error))
+
+    result["sha256"] = file_hash.hexdigest()
+
+    extension = os.path.splitext(path)[1].lower()
+    content   = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+
+    message = ""
+
+    if extension == ".ifczip":
+        result["format"] = "IFCZIP"
+
+        if not content.startswith(b"PK\x03\x04"):
+            message = "No ZIP signature"
+
+    elif export_type == "IFC" or extension == ".ifc":
+        schema = IFC_SCHEMA.search(head)
+
+        result["format"]   = "IFC " + schema.group(1).decode("ascii", "replace") if schema else "IFC"
+        result["entities"] = entities
+
+        if not content.startswith(b"ISO-10303-21;"):
+            message = "Header ISO-10303-21; missing"
+        elif not tail.rstrip().endswith(b"END-ISO-10303-21;"):
+            message = "Trailer END-ISO-10303-21; missing, file truncated"
+
+    elif extension == ".dxf":
+        if content.startswith(b"AutoCAD Binary DXF"):
+            result["format"] = "DXF binary"
+
+        elif re.match(rb"0\s+SECTION", content):
+            result["format"]   = "DXF"
+            result["entities"] = count_dxf_entities(path)
+
+            if not re.search(rb"0\s+EOF\s*$", tail):
+                message = "EOF missing, file truncated"
+        else:
+            message = "No DXF section signature"
+
+    elif (version := DWG_VERSIONS.get(head[:6])) is not None:
+        result["format"] = "DWG " + version
+
+    else:
+        message = "No DWG version signature"
+
+    if message:
+        result["status"]  = "invalid"
+        result["message"] = message
+
+    return result
+
+
+def verify_and_publish(path       : str,
+                       export_type: str,
+                       publish    : Optional[Callable[[], Dict[str, Any]]]) -> Dict[str, Any]:
+    """ Verify an exported file and publish it, if it is valid
+
+    Args:
+        path:        path of the exported file
+        export_type: "IFC" or "DWG"
+        publish:     function to publish the file, returning the values added to the result
+
+    Returns:
+        result of the verification and the publishing, the status is "publish_failed" for a valid file
+        which couldn't be published
+    """
+
+    result = verify_output(path, export_type)
+
+    if publish is None or result["status"] != "ok":
+        return result
+
+    try:
+        result.update(publish())
+
+    except OSError as error:
+        result["status"]  = "publish_failed"
+        result["message"] = str(error) + ", the file is kept in " + path
+
+    return result
+
+
+class OutputVerifier():
+    """ Definition of class OutputVerifier
+    """
+
+    def __init__(self,
+                 max_workers: int = MAX_WORKERS):
+        """ Initialization of class OutputVerifier
+
+        Args:
+            max_workers: number of threads
+        """
+
+        self.executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "OutputVerifier")
+
+        self.pending: Dict[str, Tuple[Any, Future]] = {}
+        self.results: List[Tuple[Any, Dict[str, Any]]] = []
+
+
+    def submit(self,
+               key        : Any,
+               path       : str,
+               export_type: str,
+               publish    : Optional[Callable[[], Dict[str, Any]]] = None,
+               output_file: str = ""):
+        """ Start the verification of an exported file
+
+        Args:
+            key:         key of the row, returned with the result
+            path:        path of the exported file
+            export_type: "IFC" or "DWG"
+            publish:     function to publish the file after a successful verification
+            output_file: path of the published file, if the file is published
+        """
+
+        self.wait_for(output_file or path)
+
+        self.pending[os.path.normcase(output_file or path)] = \
+            (key, self.executor.submit(verify_and_publish, path, export_type, publish))
+
+
+    def wait_for(self,
+                 path: str) -> Optional[Dict[str, Any]]:
+        """ Wait for the verification of a file, before the file is removed or exported again
+
+        Args:
+            path: path of the exported file
+
+        Returns:
+            result of the verification, None if the file is not verified
+        """
+
+        if (entry := self.pending.pop(os.path.normcase(path), None)) is None:
+            return None
+
+        key, future = entry
+
+        result = future.result()
+
+        self.results.append((key, result))
+
+        return result
+
+
+    def collect(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """ Get the results of the finished verifications without waiting for the others
+
+        Returns:
+            key of the row and result of each verification finished since the previous call
+        """
+
+        for path, (_, future) in list(self.pending.items()):
+            if future.done():
+                self.wait_for(path)
+
+        results, self.results = self.results, []
+
+        return results
+
+
+    def finish(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """ Wait for all verifications and stop the threads
+
+        Returns:
+            key of the row and result of each verification not yet collected
+        """
+
+        for path in list(self.pending):
+            self.wait_for(path)
+
+        self.executor.shutdown()
+
+        return self.collect()
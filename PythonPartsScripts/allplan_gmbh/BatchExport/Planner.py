@@ -0,0 +1,628 @@
+""" Dry-run planner of the batch export
+
+The planner shows what a run of CSV files would do, without Allplan. The CSV files, the drawing file
+selections and the favorites are read like by the runner, the rows are expanded, validated, scheduled, grouped
+and deduplicated by the same functions. The session is simulated row by row and the execution plan is printed:
+
+    - the project switch points and the session recycling by --recycle-rows
+    - the drawing files loaded and unloaded by each step, the full reload after a project switch
+    - the loads of the layer favorites, the loads skipped for the same layer states
+    - the redraws by the redraw policy
+    - the exporter calls and the rows fanned out from the file of a duplicate row
+
+The cost of each step is estimated by fixed timings of the Allplan operations, see DEFAULT_COSTS, changed
+e.g. by --cost RedrawAll=1.5. With --history, an exporter call is estimated by the median export time of
+the row in the run history. With --json, the plan is written as JSON without timestamps, and the setting
+files, also in the messages of the invalid rows and problems, are relative to the folder of their CSV file, so the
+plans of two versions of a CSV file can be compared in a code review.
+
+The project paths, the destination folders and the manifest of the unchanged rows are only available in
+Allplan, so all rows are planned as exported like with --force, and the projects and destinations are not
+validated.
+
+Usage:
+
+    python -m allplan_gmbh.BatchExport.Planner <csv files> [--type IFC|DWG] [--json] [--output <file>]
+                                               [--history <sqlite file>] [--cost NAME=SECONDS] [export options]
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from .ExportJob import ExportJob, get_export_type, get_settings_path, read_jobs, read_rows
+from .ExportOptions import create_parser
+from .JobScheduler import BACKGROUND, FOREGROUND, PASSIVE, schedule_rows
+from .LayerFavorite import get_layer_state
+from .Preflight import check_jobs, check_setting_files
+from .Publisher import get_published_name
+from .RowExpansion import expand_jobs
+from .RunHistory import RunHistory, format_duration, get_history_key
+from .SessionState import SessionState
+
+
+#----------------- default timings in seconds, the exports have an additional time for each drawing file
+
+DEFAULT_COSTS = {"OpenProject"          : 6.0,
+                 "UnloadAll"            : 1.0,
+                 "LoadFile"             : 0.8,
+                 "UnloadFile"           : 0.3,
+                 "LoadFromFavoriteFile" : 0.5,
+                 "SaveToFavoriteFile"   : 0.2,
+                 "RedrawAll"            : 2.0,
+                 "ExportIFC"            : 4.0,
+                 "ExportIFC.file"       : 0.5,
+                 "ExportDWGByTheme"     : 2.0,
+                 "ExportDWGByTheme.file": 0.3,
+                 "FanOut"               : 0.1,
+                 "Relaunch"             : 60.0}
+
+EXPORT_CALLS = {"IFC": "ExportIFC",
+                "DWG": "ExportDWGByTheme"}
+
+CURRENT_LAYER_STATE = "$usr$tmp\\CurrentLayerState.lfa"
+
+
+def get_relative_path(path          : str,
+                      settings_paths: Sequence[str]) -> str:
+    """ Get the path of a setting file relative to the folder of its CSV file
+
+    Args:
+        path:           path of the setting file
+        settings_paths: paths of the CSV files with a trailing separator
+
+    Returns:
+        relative path, the path itself outside of the folders
+    """
+
+    for settings_path in settings_paths:
+        if path.startswith(settings_path):
+            return path[len(settings_path):]
+
+    return path
+
+
+def get_relative_message(message       : str,
+                         settings_paths: Sequence[str]) -> str:
+    """ Get a message with the paths of the setting files relative to the folder of their CSV file
+
+    Args:
+        message:        message of an invalid row or a problem
+        settings_paths: paths of the CSV files with a trailing separator
+
+    Returns:
+        message with relative paths
+    """
+
+    for settings_path in settings_paths:
+        message = message.replace(settings_path, "")
+
+    return message
+
+
+def parse_cost(entry: str) -> Tuple[str, float]:
+    """ Parse the timing of an operation from the command line
+
+    Args:
+        entry: timing as NAME=SECONDS
+
+    Returns:
+        name and timing of the operation in seconds
+
+    Raises:
+        argparse.ArgumentTypeError: the entry has no name or no valid number of seconds
+    """
+
+    name, _, value = entry.partition("=")
+
+    try:
+        seconds = float(value)
+
+    except ValueError:
+        seconds = -1.0
+
+    if not name or not 0 <= seconds < float("inf"):
+        raise argparse.ArgumentTypeError(f"invalid timing {entry!r}, expected NAME=SECONDS, e.g. RedrawAll=1.5")
+
+    return name, seconds
+
+
+def read_plan_jobs(csv_files  : Sequence[str],
+                   export_type: str) -> Tuple[List[ExportJob], List[Dict[str, Any]]]:
+    """ Read the export jobs of the CSV files like the runner
+
+    Args:
+        csv_files:   paths of the CSV files
+        export_type: "IFC" or "DWG", empty for the type by the columns of each CSV file
+
+    Returns:
+        export jobs,
+        row index, category and message of each invalid row
+    """
+
+    jobs        : List[ExportJob]      = []
+    invalid_rows: List[Dict[str, Any]] = []
+
+    def on_error(category: str, message: str, **details: Any):
+        """ collect an invalid row
+
+        Args:
+            category: category of the error
+            message:  error message
+            details:  additional values describing the error
+        """
+        invalid_rows.append({"row_index": details.get("row_index"), "category": category, "message": message})
+
+    first_row_index = 1
+
+    for csv_file in csv_files:
+        jobs.extend(expand_jobs(read_jobs(csv_file, get_settings_path(csv_file),
+                                          export_type or get_export_type(csv_file), CURRENT_LAYER_STATE,
+                                          on_error, first_row_index), on_error))
+
+        first_row_index += sum(1 for _ in read_rows(csv_file))
+
+    return jobs, invalid_rows
+
+
+class PlannedSession():
+    """ Definition of class PlannedSession
+    """
+
+    def __init__(self,
+                 full_reload  : bool,
+                 redraw_policy: str):
+        """ Initialization of class PlannedSession
+
+        Args:
+            full_reload:   unload all drawing files and load the complete selection for each row
+            redraw_policy: redraw policy, one of ExportOptions.REDRAW_POLICIES
+        """
+
+        self.state = SessionState(full_reload, redraw_policy, FOREGROUND, BACKGROUND, PASSIVE)
+
+
+    def open_project(self,
+                     project_key: Tuple[str, str]) -> bool:
+        """ Simulate the opening of the project like ExportSession.open_project
+
+        Args:
+            project_key: host name and project name
+
+        Returns:
+            True, if the project is switched
+        """
+
+        return self.state.open_project(project_key, project_key == self.state.project_key)
+
+
+    def invalidate(self):
+        """ Forget the state, e.g. after the session is recycled
+        """
+
+        self.state.invalidate()
+
+
+    def load_drawing_files(self,
+                           file_numbers : List[int],
+                           passive_files: Sequence[int]) -> Tuple[bool, List[Tuple[int, str]], List[int]]:
+        """ Simulate the loading of the drawing files like ExportSession.load_drawing_files
+
+        Args:
+            file_numbers:  numbers of the drawing files
+            passive_files: numbers of the drawing files loaded as passive background
+
+        Returns:
+            all files are unloaded first,
+            loaded files with their state in the order of loading,
+            unloaded files
+        """
+
+        unload_all, first_loads, unloads, loads, target = self.state.change_drawing_files(file_numbers, passive_files)
+
+        return unload_all, [(number, target[number]) for number in first_loads + loads], unloads
+
+
+    def load_layer_favorite(self,
+                            layer_favorite_file: str) -> bool:
+        """ Simulate the loading of the layer favorite like ExportSession.load_layer_favorite
+
+        Args:
+            layer_favorite_file: path of the layer favorite file
+
+        Returns:
+            True, if the favorite is loaded, False if the load is skipped for the same layer states
+        """
+
+        if layer_favorite_file == CURRENT_LAYER_STATE:
+            layer_hash = CURRENT_LAYER_STATE
+        else:
+            try:
+                _, layer_hash = get_layer_state(layer_favorite_file)
+
+            except (OSError, ValueError):
+                layer_hash = ""
+
+        if self.state.is_layer_favorite_loaded(layer_hash):
+            return False
+
+        self.state.set_layer_favorite(None, layer_hash)
+
+        return True
+
+
+    def redraw(self,
+               required: bool) -> int:
+        """ Simulate a redraw by the redraw policy like ExportSession.redraw
+
+        Args:
+            required: the redraw is needed by the export
+
+        Returns:
+            number of redraws
+        """
+
+        if not self.state.redraw(required):
+            return 0
+
+        self.state.set_redrawn()
+
+        return 1
+
+
+def create_plan(csv_files  : Sequence[str],
+                export_type: str,
+                options    : argparse.Namespace,
+                costs      : Dict[str, float],
+                history    : Optional[RunHistory]) -> Dict[str, Any]:
+    """ Create the execution plan of the CSV files
+
+    Args:
+        csv_files:   paths of the CSV files
+        export_type: "IFC" or "DWG", empty for the type by the columns of each CSV file
+        options:     export options
+        costs:       timing of each operation in seconds
+        history:     opened run history for the export times, None for the fixed timings
+
+    Returns:
+        execution plan
+    """
+
+    settings_paths = [get_settings_path(csv_file) for csv_file in csv_files]
+
+    file_types = {export_type or get_export_type(csv_file) for csv_file in csv_files}
+
+    jobs, invalid_rows = read_plan_jobs(csv_files, export_type)
+
+
+    #----------------- pre-flight validation of the setting files, the projects and destinations need Allplan
+
+    file_exists: Dict[str, bool] = {}
+
+    for csv_file, settings_path in zip(csv_files, settings_paths):
+        file_exists.update(check_setting_files(csv_file, settings_path, export_type or get_export_type(csv_file),
+                                               CURRENT_LAYER_STATE))
+
+    problems = check_jobs(jobs, file_exists, {job.row_index: job.destination_folder for job in jobs}, {}, {})
+
+    aborted = options.preflight == "abort" and bool(problems or invalid_rows)
+
+    if aborted:
+        jobs = []
+
+    elif options.preflight == "drop":
+        jobs = [job for job in jobs if job.row_index not in problems]
+
+
+    #----------------- scheduling and deduplication like in ExportRunner.execute
+
+    order, saved_switches, operations_before, operations_after, session_count = \
+        schedule_rows([job.project_key for job in jobs], [job.load_states for job in jobs],
+                      [job.session_key for job in jobs])
+
+    jobs = [jobs[index] for index in order]
+
+    first_rows: Dict[Tuple, int] = {}
+
+
+    #----------------- simulate the session
+
+    session = PlannedSession(options.full_reload, options.redraw)
+
+    calls: Dict[str, int] = {}
+
+    def add_calls(name: str, count: int = 1) -> float:
+        """ count the calls of an operation
+
+        Args:
+            name:  name of the operation
+            count: number of calls
+
+        Returns:
+            estimated time of the calls
+        """
+        if count:
+            calls[name] = calls.get(name, 0) + count
+
+        return costs.get(name, 0.0) * count
+
+    steps: List[Dict[str, Any]] = []
+
+    total_cost = 0.0
+
+    if any(job.layer_favorite_file == CURRENT_LAYER_STATE for job in jobs):
+        total_cost += add_calls("SaveToFavoriteFile")
+
+    executed_rows = 0
+
+    for job in jobs:
+        step: Dict[str, Any] = {"step"        : len(steps) + 1,
+                                "row_index"   : job.row_index,
+                                "export_type" : job.export_type,
+                                "host_name"   : job.host_name,
+                                "project_name": job.project_name,
+                                "output_file" : job.destination_folder + "\\" +
+                                                get_published_name(job.filename, job.export_type,
+                                                                   not options.no_staging and options.compress)}
+
+        executed_rows += 1
+
+        if not options.no_dedupe and job.export_key in first_rows:
+            cost = add_calls("FanOut")
+
+            step.update(call = "FanOut", fan_out_from = first_rows[job.export_key], cost = round(cost, 3))
+            steps.append(step)
+
+            total_cost += cost
+            continue
+
+        first_rows.setdefault(job.export_key, job.row_index)
+
+        cost = 0.0
+
+        recycled = bool(session.state.project_key and job.project_key != session.state.project_key and
+                        options.recycle_rows and executed_rows - 1 >= options.recycle_rows)
+
+        if recycled:
+            session.invalidate()
+
+            executed_rows = 1
+
+            cost += add_calls("Relaunch")
+
+        project_switch = session.open_project(job.project_key)
+
+        redraws = session.redraw(False) if project_switch else 0
+
+        cost += add_calls("OpenProject", int(project_switch))
+
+        unload_all, loads, unloads = session.load_drawing_files(job.file_numbers, job.passive_files)
+
+        cost += add_calls("UnloadAll", int(unload_all)) + add_calls("LoadFile", len(loads)) + \
+                add_calls("UnloadFile", len(unloads))
+
+        layer_load = session.load_layer_favorite(job.layer_favorite_file)
+
+        cost += add_calls("LoadFromFavoriteFile", int(layer_load))
+
+        redraws += session.redraw(True)
+
+        cost += add_calls("RedrawAll", redraws)
+
+        call = EXPORT_CALLS[job.export_type]
+
+        export_cost = history.estimate_export(get_history_key(job.host_name, job.project_name, job.file_numbers,
+                                                              job.export_favorite_file, job.export_type,
+                                                              job.version, job.filename)) if history else None
+
+        cost_source = "history" if export_cost is not None else "fixed"
+
+        if export_cost is None:
+            export_cost = costs.get(call, 0.0) + costs.get(call + ".file", 0.0) * len(job.file_numbers)
+
+        calls[call] = calls.get(call, 0) + 1
+
+        cost += export_cost
+
+        step.update(recycled       = recycled,
+                    project_switch = project_switch,
+                    files          = job.file_numbers,
+                    passive_files  = list(job.passive_files),
+                    unload_all     = unload_all,
+                    load           = [[number, state] for number, state in loads],
+                    unload         = unloads,
+                    layer_favorite = get_relative_path(job.layer_favorite_file, settings_paths),
+                    layer_load     = layer_load,
+                    redraws        = redraws,
+                    call           = call,
+                    cost           = round(cost, 3),
+                    cost_source    = cost_source)
+        steps.append(step)
+
+        total_cost += cost
+
+    if session.state.redraw_pending:
+        total_cost += add_calls("RedrawAll")
+
+    return {"csv_files"   : [os.path.basename(csv_file) for csv_file in csv_files],
+            "export_type" : "IFC+DWG" if "" in file_types else "+".join(sorted(file_types, reverse = True)),
+            "options"     : {"full_reload" : options.full_reload,
+                             "redraw"      : options.redraw,
+                             "preflight"   : options.preflight,
+                             "dedupe"      : not options.no_dedupe,
+                             "recycle_rows": options.recycle_rows,
+                             "history"     : history is not None},
+            "aborted"     : aborted,
+            "invalid_rows": [dict(invalid_row, message = get_relative_message(invalid_row["message"], settings_paths))
+                             for invalid_row in invalid_rows],
+            "problems"    : [{"row_index": row_index, "category": category,
+                              "message"  : get_relative_message(message, settings_paths)}
+                             for row_index, row_problems in sorted(problems.items())
+                             for category, message in row_problems],
+            "schedule"    : {"saved_switches"        : saved_switches,
+                             "load_operations_before": operations_before,
+                             "load_operations_after" : operations_after,
+                             "sessions"              : session_count},
+            "steps"       : steps,
+            "totals"      : {"steps"              : len(steps),
+                             "project_switches"   : sum(1 for step in steps if step.get("project_switch")),
+                             "recycles"           : sum(1 for step in steps if step.get("recycled")),
+                             "load_operations"    : sum(int(step.get("unload_all", False)) + len(step.get("load", [])) +
+                                                        len(step.get("unload", [])) for step in steps),
+                             "layer_loads"        : sum(1 for step in steps if step.get("layer_load")),
+                             "layer_loads_skipped": sum(1 for step in steps if step.get("layer_load") is False),
+                             "redraws"            : calls.get("RedrawAll", 0),
+                             "exporter_calls"     : sum(1 for step in steps if step["call"] != "FanOut"),
+                             "fan_outs"           : sum(1 for step in steps if step["call"] == "FanOut"),
+                             "calls"              : dict(sorted(calls.items())),
+                             "estimated_time"     : round(total_cost, 3)}}
+
+
+def format_loads(step: Dict[str, Any]) -> str:
+    """ Format the drawing file operations of a step
+
+    Args:
+        step: step of the plan
+
+    Returns:
+        operations as text, e.g. "unload all, +12F +13 +20P -7"
+    """
+
+    texts = ["unload all"] if step["unload_all"] else []
+
+    changes = [f"+{number}" + {FOREGROUND: "F", BACKGROUND: "", PASSIVE: "P"}[state] for number, state in step["load"]]
+    changes.extend(f"-{number}" for number in step["unload"])
+
+    if changes:
+        texts.append(" ".join(changes))
+
+    return ", ".join(texts) if texts else "unchanged"
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    """ Format the plan as text
+
+    Args:
+        plan: execution plan
+
+    Returns:
+        plan as text
+    """
+
+    schedule = plan["schedule"]
+    totals   = plan["totals"]
+
+    lines = ["Execution plan: " + ", ".join(plan["csv_files"]) + " (" + plan["export_type"] + ")",
+             f"Scheduling:     {schedule['saved_switches']} project switches saved, load operations "
+             f"{schedule['load_operations_before']} before and {schedule['load_operations_after']} after scheduling, "
+             f"{schedule['sessions']} loaded sessions"]
+
+    for invalid_row in plan["invalid_rows"]:
+        lines.append(f"Invalid row {invalid_row['row_index']}: {invalid_row['message']}")
+
+    for problem in plan["problems"]:
+        lines.append(f"Row {problem['row_index']} ({plan['options']['preflight']}): {problem['message']}")
+
+    if plan["aborted"]:
+        lines.append("Export aborted by the pre-flight validation")
+
+    lines.append("")
+    lines.append(f"{'Step':>5} {'Row':>5}  {'Call':<17} {'Layer':<5} {'Redraw':>6} {'Cost s':>8}  Drawing files")
+
+    for step in plan["steps"]:
+        if step.get("recycled"):
+            lines.append("      Session recycled, continued by a new Allplan process")
+
+        if step.get("project_switch"):
+            lines.append("      Project " + step["project_name"] + " (" + step["host_name"] + ")")
+
+        if step["call"] == "FanOut":
+            lines.append(f"{step['step']:>5} {step['row_index']:>5}  {'FanOut':<17} {'':<5} {'':>6} {step['cost']:>8.1f}"
+                         f"  same inputs as row {step['fan_out_from']}")
+            continue
+
+        lines.append(f"{step['step']:>5} {step['row_index']:>5}  {step['call']:<17} "
+                     f"{'load' if step['layer_load'] else 'kept':<5} {step['redraws']:>6} {step['cost']:>8.1f}"
+                     f"{'H' if step['cost_source'] == 'history' else ' '} " + format_loads(step))
+
+    lines.append("")
+    lines.append(f"Project switches:     {totals['project_switches']}" +
+                 (f", {totals['recycles']} session recycles" if totals["recycles"] else ""))
+    lines.append(f"Load operations:      {totals['load_operations']}")
+    lines.append(f"Layer favorite loads: {totals['layer_loads']}, {totals['layer_loads_skipped']} skipped")
+    lines.append(f"Redraws:              {totals['redraws']}")
+    lines.append(f"Exporter calls:       {totals['exporter_calls']}, {totals['fan_outs']} rows fanned out")
+    lines.append("Estimated time:       " + format_duration(totals["estimated_time"]) +
+                 (", H: exporter call estimated by the run history" if plan["options"]["history"] else ""))
+
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: List[str]) -> int:
+    """ Run the planner
+
+    Args:
+        argv: command line arguments without the program name
+
+    Returns:
+        exit code, 0 if the plan is created for valid rows, 1 if rows are invalid or have problems, or the export
+        would be aborted
+    """
+
+    parser = argparse.ArgumentParser(prog = "Planner", parents = [create_parser()],
+                                     description = "Execution plan of the batch export without Allplan")
+
+    parser.add_argument("--type", choices = sorted(EXPORT_CALLS), default = "",
+                        help = "export type, default by the columns of each CSV file")
+    parser.add_argument("--json", action = "store_true", help = "write the plan as JSON")
+    parser.add_argument("--output", default = "", help = "file of the plan, default the standard output")
+    parser.add_argument("--cost", action = "append", default = [], metavar = "NAME=SECONDS", type = parse_cost,
+                        help = "timing of an operation, e.g. RedrawAll=1.5")
+
+    options = parser.parse_args(argv)
+
+    if not options.csv_files:
+        parser.error("no CSV file given")
+
+    costs = dict(DEFAULT_COSTS)
+    costs.update(options.cost)
+
+    history = None
+
+    if options.history and not options.no_history:
+        history = RunHistory(options.history)
+
+        try:
+            history.open()
+
+        except sqlite3.Error as error:
+            print("Run history not available: " + str(error), file = sys.stderr)
+
+            history = None
+
+        finally:
+            if history:
+                history.close()
+
+    plan = create_plan([os.path.abspath(csv_file) for csv_file in options.csv_files], options.type, options,
+                       costs, history)
+
+    text = json.dumps(plan, indent = 2) + "\n" if options.json else format_plan(plan)
+
+    if options.output:
+        with open(options.output, "w", encoding = "UTF-8", newline = "\n") as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+
+    return 1 if plan["aborted"] or plan["invalid_rows"] or plan["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,229 @@
+""" Pre-flight validation of the export jobs
+
+Before the first project is opened, the inputs of all rows are checked, so that a missing file doesn't stop
+a row hours after the start:
+
+    - the drawing file selections, layer favorites, export favorites and configuration files exist
+    - the drawing file selections and layer favorites can be read, the results are cached for the export
+    - the destination folders can be created and are writable
+    - the projects exist
+
+The files and destination folders are checked by a thread pool, on a network share the accesses are mainly
+waiting for the server. The projects are checked by the caller, the Allplan API is only called from the
+main thread. The problems of all rows are written to one report file.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import json
+import os
+import tempfile
+
+from .DrawingFileSelection import get_selection
+from .ExportJob import ExportJob, get_row_export_type, get_setting_files, read_rows
+from .LayerFavorite import get_layer_state
+
+
+MAX_WORKERS = 16
+
+Problem = Tuple[str, str]
+
+
+def check_file(path: str) -> bool:
+    """ Check whether a setting file exists, drawing file selections and layer favorites are read into the cache
+
+    Args:
+        path: path of the setting file
+
+    Returns:
+        True, if the file exists
+    """
+
+    try:
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == ".xml":
+            get_selection(path)
+        elif extension == ".lfa":
+            get_layer_state(path)
+        else:
+            os.stat(path)
+
+    except OSError:
+        return False
+
+    except (ValueError, SyntaxError):
+        return True
+
+    return True
+
+
+def check_destination(path: str) -> str:
+    """ Check whether a destination folder can be created and is writable
+
+    Args:
+        path: path of the destination folder
+
+    Returns:
+        error message, empty if the folder is writable
+    """
+
+    try:
+        os.makedirs(path, exist_ok = True)
+
+        with tempfile.TemporaryFile(dir = path):
+            pass
+
+    except OSError as error:
+        return str(error)
+
+    return ""
+
+
+def check_setting_files(csv_file              : str,
+                        settings_path         : str,
+                        export_type           : str,
+                        default_layer_favorite: str,
+                        max_workers           : int = MAX_WORKERS) -> Dict[str, bool]:
+    """ Check the setting files of all rows of the CSV file in parallel
+
+    Each file is only checked once, also if it is used by several rows.
+
+    Args:
+        csv_file:               path of the CSV file
+        settings_path:          path of the CSV file with a trailing backslash
+        export_type:            "IFC" or "DWG", empty for a merged job file
+        default_layer_favorite: layer favorite for rows without layer setting
+        max_workers:            number of threads
+
+    Returns:
+        existence of each setting file
+    """
+
+    paths = set()
+
+    for _, row in read_rows(csv_file):
+        try:
+            paths.update(path for path in get_setting_files(row, settings_path, get_row_export_type(row, export_type),
+                                                            default_layer_favorite).values() if path)
+
+        except (KeyError, ValueError):
+            continue
+
+    paths.discard(default_layer_favorite)
+
+    return check_parallel(check_file, sorted(paths), max_workers)
+
+
+def check_destinations(paths      : Iterable[str],
+                       max_workers: int = MAX_WORKERS) -> Dict[str, str]:
+    """ Check the destination folders in parallel
+
+    Args:
+        paths:       paths of the destination folders
+        max_workers: number of threads
+
+    Returns:
+        error message of each destination folder, empty if the folder is writable
+    """
+
+    return check_parallel(check_destination, sorted(set(paths)), max_workers)
+
+
+def check_parallel(check      : Callable,
+                   paths      : Sequence[str],
+                   max_workers: int) -> dict:
+    """ Execute a check for each path in a thread pool
+
+    Args:
+        check:       check function
+        paths:       paths
+        max_workers: number of threads
+
+    Returns:
+        result of each path
+    """
+
+    if not paths:
+        return {}
+
+    with ThreadPoolExecutor(max_workers = min(max_workers, len(paths))) as executor:
+        return dict(zip(paths, executor.map(check, paths)))
+
+
+def check_jobs(jobs          : Sequence[ExportJob],
+               file_exists   : Dict[str, bool],
+               destinations  : Dict[str, str],
+               writable      : Dict[str, str],
+               project_exists: Dict[Tuple[str, str], bool]) -> Dict[int, List[Problem]]:
+    """ Collect the problems of the jobs
+
+    Args:
+        jobs:           export jobs
+        file_exists:    existence of each setting file
+        destinations:   final destination folder of each job by row index
+        writable:       error message of each destination folder, empty if writable
+        project_exists: existence of each project
+
+    Returns:
+        category and message of each problem by row index, only rows with problems are included
+    """
+
+    problems: Dict[int, List[Problem]] = {}
+
+    for job in jobs:
+        row_problems: List[Problem] = []
+
+        for category, path in (("layer_favorite_not_found",  job.layer_favorite_file),
+                               ("export_favorite_not_found", job.export_favorite_file),
+                               ("config_file_not_found",     job.config_file)):
+            if path and not file_exists.get(path, True):
+                row_problems.append((category, "File " + path + " not found"))
+
+        if (error := writable.get(destinations[job.row_index], "")):
+            row_problems.append(("destination_not_writable",
+                                 "Destination " + destinations[job.row_index] + " not writable: " + error))
+
+        if not project_exists.get(job.project_key, True):
+            row_problems.append(("project_not_exist",
+                                 "Project " + job.project_name + "(" + job.host_name + ") doesn't exist"))
+
+        if row_problems:
+            problems[job.row_index] = row_problems
+
+    return problems
+
+
+def write_report(report_file : str,
+                 csv_file    : str,
+                 mode        : str,
+                 jobs        : Sequence[ExportJob],
+                 invalid_rows: int,
+                 problems    : Dict[int, List[Problem]]):
+    """ Write the report of the pre-flight validation
+
+    Args:
+        report_file:  path of the JSON report file
+        csv_file:     path of the CSV file
+        mode:         pre-flight mode, one of ExportOptions.PREFLIGHT_MODES
+        jobs:         export jobs, a split row has several jobs
+        invalid_rows: number of rows which couldn't be read
+        problems:     problems by row index
+    """
+
+    jobs_by_row = {job.row_index: job for job in jobs}
+
+    with open(report_file, "w", encoding = "UTF-8") as file:
+        json.dump({"csv_file"    : csv_file,
+                   "mode"        : mode,
+                   "valid_rows"  : len(jobs_by_row) - len(problems),
+                   "invalid_rows": invalid_rows + len(problems),
+                   "rows"        : [{"row_index"   : row_index,
+                                     "project_name": jobs_by_row[row_index].project_name,
+                                     "filename"    : jobs_by_row[row_index].filename,
+                                     "problems"    : [{"category": category, "message": message}
+                                                      for category, message in row_problems]}
+                                    for row_index, row_problems in sorted(problems.items())]}, file, indent = 2)
@@ -0,0 +1,241 @@
+""" Memory sampling and session recycling of the Allplan process
+
+A long batch grows the memory of Allplan and the late rows are exported slower. After each row, the working
+set (RSS), the number of handles and the number of GDI and USER objects of the process are sampled with the
+Windows API by ctypes. On other systems, the RSS and the open file descriptors are read from /proc, so the
+benchmark runs on Linux as well.
+
+With a row limit or a memory limit, the session is recycled: the runner stops at the next project boundary,
+so the restart never causes an additional project switch. The journal of the run stays open and gets a
+"recycled" record, and a new Allplan process is started with the same command line. The new process resumes
+the run from the journal.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import ctypes
+import os
+import subprocess
+import sys
+
+
+MEGABYTE = 1024 * 1024
+
+GR_GDIOBJECTS  = 0
+GR_USEROBJECTS = 1
+
+
+class ProcessMemoryCounters(ctypes.Structure):
+    """ Definition of the Windows structure PROCESS_MEMORY_COUNTERS
+    """
+
+    _fields_ = [("cb",                         ctypes.c_ulong),
+                ("PageFaultCount",             ctypes.c_ulong),
+                ("PeakWorkingSetSize",         ctypes.c_size_t),
+                ("WorkingSetSize",             ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage",    ctypes.c_size_t),
+                ("QuotaPagedPoolUsage",        ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage",     ctypes.c_size_t),
+                ("PagefileUsage",              ctypes.c_size_t),
+                ("PeakPagefileUsage",          ctypes.c_size_t)]
+
+
+def sample_windows_process() -> Dict[str, int]:
+    """ Sample the current process with the Windows API
+
+    Returns:
+        RSS in bytes, number of handles, GDI objects and USER objects
+    """
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error = True)     # type: ignore[attr-defined]
+    user32   = ctypes.WinDLL("user32", use_last_error = True)       # type: ignore[attr-defined]
+
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+
+    process = ctypes.c_void_p(kernel32.GetCurrentProcess())
+
+    sample: Dict[str, int] = {}
+
+    counters    = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+
+    if kernel32.K32GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        sample["rss"] = counters.WorkingSetSize
+
+    handles = ctypes.c_ulong()
+
+    if kernel32.GetProcessHandleCount(process, ctypes.byref(handles)):
+        sample["handles"] = handles.value
+
+    sample["gdi_objects"]  = user32.GetGuiResources(process, GR_GDIOBJECTS)
+    sample["user_objects"] = user32.GetGuiResources(process, GR_USEROBJECTS)
+
+    return sample
+
+
+def sample_proc_process() -> Dict[str, int]:
+    """ Sample the current process from /proc
+
+    Returns:
+        RSS in bytes, number of open file descriptors as handles
+    """
+
+    with open("/proc/self/statm", "r", encoding = "ascii") as file:
+        rss_pages = int(file.read().split()[1])
+
+    return {"rss"    : rss_pages * os.sysconf("SC_PAGE_SIZE"),
+            "handles": len(os.listdir("/proc/self/fd"))}
+
+
+def sample_process() -> Dict[str, int]:
+    """ Sample the memory and the handles of the current process
+
+    Returns:
+        available values: rss in bytes, handles, gdi_objects, user_objects; empty if sampling is not supported
+    """
+
+    try:
+        if sys.platform == "win32":
+            return sample_windows_process()
+
+        return sample_proc_process()
+
+    except (OSError, AttributeError, ValueError, IndexError):
+        return {}
+
+
+def get_command_line() -> List[str]:
+    """ Get the command line of the current Allplan process
+
+    Returns:
+        arguments of the command line including the executable, empty if not available
+    """
+
+    if sys.platform != "win32":
+        return []
+
+    kernel32 = ctypes.WinDLL("kernel32")        # type: ignore[attr-defined]
+    shell32  = ctypes.WinDLL("shell32")         # type: ignore[attr-defined]
+
+    kernel32.GetCommandLineW.restype   = ctypes.c_wchar_p
+    shell32.CommandLineToArgvW.restype = ctypes.POINTER(ctypes.c_wchar_p)
+    kernel32.LocalFree.argtypes        = [ctypes.c_void_p]
+
+    count = ctypes.c_int()
+
+    if not (arguments := shell32.CommandLineToArgvW(kernel32.GetCommandLineW(), ctypes.byref(count))):
+        return []
+
+    try:
+        return [arguments[index] for index in range(count.value)]
+
+    finally:
+        kernel32.LocalFree(arguments)
+
+
+def relaunch(arguments: List[str]):
+    """ Start a new Allplan process, which continues the run
+
+    The option --restart is removed, so that the new process resumes the journal instead of exporting all
+    rows again.
+
+    Args:
+        arguments: command line of the current process
+
+    Raises:
+        OSError: the process can't be started
+    """
+
+    subprocess.Popen([argument for argument in arguments if argument != "--restart"],     # pylint: disable=consider-using-with
+                     creationflags = getattr(subprocess, "DETACHED_PROCESS", 0), close_fds = True)
+
+
+class ProcessMonitor():
+    """ Definition of class ProcessMonitor
+    """
+
+    def __init__(self,
+                 recycle_rows  : int,
+                 recycle_memory: float):
+        """ Initialization of class ProcessMonitor
+
+        Args:
+            recycle_rows:   recycle the session after this number of exported rows, 0 for no limit
+            recycle_memory: recycle the session, if the RSS exceeds this limit in MB, 0 for no limit
+        """
+
+        self.recycle_rows   = recycle_rows
+        self.recycle_memory = recycle_memory
+
+        self.rows = 0
+
+        self.sample: Dict[str, int] = {}
+        self.peak  : Dict[str, int] = {}
+
+
+    def sample_row(self,
+                   executed: bool) -> Dict[str, int]:
+        """ Sample the process after a row
+
+        Args:
+            executed: the row was processed by Allplan, skipped rows are not counted for the row limit
+
+        Returns:
+            sample of the process
+        """
+
+        if executed:
+            self.rows += 1
+
+        self.sample = sample_process()
+
+        for name, value in self.sample.items():
+            self.peak[name] = max(self.peak.get(name, 0), value)
+
+        return self.sample
+
+
+    def get_recycle_reason(self) -> str:
+        """ Check, whether the session should be recycled
+
+        Returns:
+            reason of the recycling, empty if the limits are not reached
+        """
+
+        if self.recycle_rows and self.rows >= self.recycle_rows:
+            return f"{self.rows} rows exported"
+
+        if self.recycle_memory and self.sample.get("rss", 0) >= self.recycle_memory * MEGABYTE:
+            return f"{self.sample['rss'] / MEGABYTE:.0f} MB memory used"
+
+        return ""
+
+
+def format_sample(sample: Dict[str, int]) -> str:
+    """ Format a sample for the log
+
+    Args:
+        sample: sample of the process
+
+    Returns:
+        sample as text, e.g. 812 MB, 1432 handles, 311 GDI objects, 95 USER objects
+    """
+
+    texts = []
+
+    if "rss" in sample:
+        texts.append(f"{sample['rss'] / MEGABYTE:.0f} MB")
+
+    if "handles" in sample:
+        texts.append(f"{sample['handles']} handles")
+
+    if "gdi_objects" in sample:
+        texts.append(f"{sample['gdi_objects']} GDI objects")
+
+    if "user_objects" in sample:
+        texts.append(f"{sample['user_objects']} USER objects")
+
+    return ", ".join(texts) if texts else "not available"
@@ -0,0 +1,163 @@
+""" Publishing of the staged exported files to the destination folder
+
+Allplan exports each file to a local staging folder. After the verification, the file is copied to the
+destination folder by the thread pool of the OutputVerifier, so the export loop never waits for a network
+share. The file is copied to a temporary file next to the destination file and renamed, so that the previous
+file stays in place until the new one is complete and nobody sees a half-written file. Errors of the copy,
+e.g. a share which is temporarily not available, are retried with an increasing delay.
+
+With compression, an IFC file is published as .ifczip, a DWG or DXF file as .zip.
+
+A row with the same inputs as a row exported before in the same run isn't exported again, the exported file
+is fanned out to the row by a hard link or a copy and published like an exported file.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+import os
+import shutil
+import time
+import zipfile
+
+
+RETRIES     = 5
+BACKOFF     = 1.0
+MAX_BACKOFF = 30.0
+
+
+def get_published_name(filename   : str,
+                       export_type : str,
+                       compression : bool) -> str:
+    """ Get the name of the published file
+
+    Args:
+        filename:    name of the exported file
+        export_type: "IFC" or "DWG"
+        compression: publish the file compressed
+
+    Returns:
+        name of the published file
+    """
+
+    if not compression:
+        return filename
+
+    if export_type == "IFC":
+        return os.path.splitext(filename)[0] + ".ifczip"
+
+    return filename + ".zip"
+
+
+def compress_file(path        : str,
+                  archive_file: str,
+                  member_name : str):
+    """ Compress a file into a ZIP archive
+
+    Args:
+        path:         path of the file
+        archive_file: path of the ZIP archive
+        member_name:  name of the file inside the archive
+    """
+
+    with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.write(path, member_name)
+
+
+def fan_out_file(source_file: str,
+                 target_file: str,
+                 hard_link  : bool) -> str:
+    """ Create the file of a duplicate row from the file of an identical export
+
+    Args:
+        source_file: path of the exported file
+        target_file: path of the file of the duplicate row
+        hard_link:   create a hard link, a copy is made if the link is not possible, e.g. on another drive
+
+    Returns:
+        "link" or "copy"
+
+    Raises:
+        OSError: the file couldn't be created
+    """
+
+    if hard_link:
+        try:
+            os.link(source_file, target_file)
+
+            return "link"
+
+        except OSError:
+            pass
+
+    shutil.copyfile(source_file, target_file)
+
+    return "copy"
+
+
+def publish_file(staged_file: str,
+                 output_file: str,
+                 compression: bool,
+                 member_name: str = "",
+                 retries    : int = RETRIES,
+                 backoff    : float = BACKOFF,
+                 sleep      : Callable[[float], None] = time.sleep) -> Dict[str, Any]:
+    """ Publish a staged file to the destination folder, the staged file is removed after publishing
+
+    Args:
+        staged_file: path of the staged file
+        output_file: path of the published file
+        compression: compress the file into a ZIP archive
+        member_name: name of the file inside the archive, the name of the staged file if empty
+        retries:     number of attempts
+        backoff:     delay after the first failed attempt in seconds, doubled for each further attempt
+        sleep:       function to wait between the attempts
+
+    Returns:
+        published file, number of attempts and duration
+
+    Raises:
+        OSError: the file couldn't be published, the staged file is kept
+    """
+
+    start_time = time.perf_counter()
+
+    source_file = staged_file
+
+    if compression:
+        source_file = staged_file + ".zip"
+
+        compress_file(staged_file, source_file, member_name or os.path.basename(staged_file))
+
+    temp_file = output_file + ".publishing"
+
+    for attempt in range(1, retries + 1):
+        try:
+            os.makedirs(os.path.dirname(output_file) or ".", exist_ok = True)
+
+            shutil.copyfile(source_file, temp_file)
+
+            os.replace(temp_file, output_file)
+
+            break
+
+        except OSError:
+            try:
+                os.remove(temp_file)
+
+            except OSError:
+                pass
+
+            if attempt == retries:
+                raise
+
+            sleep(min(backoff * 2 ** (attempt - 1), MAX_BACKOFF))
+
+    for path in {staged_file, source_file}:
+        os.remove(path)
+
+    return {"output_file" : output_file,
+            "published"   : True,
+            "attempts"    : attempt,
+            "publish_time": round(time.perf_counter() - start_time, 4)}
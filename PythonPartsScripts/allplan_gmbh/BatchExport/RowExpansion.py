@@ -0,0 +1,191 @@
+""" Expansion of a CSV row into one export per drawing file or storey
+
+A row with the column splitMode is expanded into sub-jobs:
+
+    file:    one export per selected drawing file
+    node:    one export per selected node, the selected nodes of a drawing file selection are drawing files
+    storey:  one export per expanded storey of the drawing file selection
+
+The drawing file selection doesn't contain the assignment of the drawing files to the storeys. A drawing file
+belongs to the storey whose name is contained in the name of the drawing file, the longest storey name wins,
+e.g. "Walls Ground floor" belongs to "Ground floor". The files without a storey are exported together with
+the storey name "unassigned". The storey split needs the drawing file names, they are only contained in a
+favorite of the IFC export window.
+
+The IFC sub-jobs of a row keep all files of the row loaded, the files of the other sub-jobs as passive
+background, so that only the active files are switched between the exports. ExportDWGByTheme exports all
+loaded drawing files, so a DWG sub-job loads only its own files and the files of the other sub-jobs are
+unloaded. The name of each exported file is given by
+the column filenameTemplate, e.g. {project}-{storey}-{file}.ifc, with the placeholders
+
+    {host}, {project}:  host and project name
+    {storey}:           name of the storey, empty for the split by file
+    {file}, {name}:     numbers and names of the exported drawing files, joined by "_"
+    {index}:            number of the sub-job, starting with 1
+    {filename}:         filename of the row without extension
+
+Without template, the storey or the drawing file number is appended to the filename of the row.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import os
+import re
+
+from .DrawingFileSelection import DrawingFileSelection, get_selection
+from .ExportJob import ExportJob
+
+
+SPLIT_MODES = ("file", "node", "storey")
+
+UNASSIGNED_STOREY = "unassigned"
+
+INVALID_FILENAME_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def get_storey_files(selection: DrawingFileSelection) -> List[Tuple[str, List[int]]]:
+    """ Assign the selected drawing files to the expanded storeys by their names
+
+    Args:
+        selection: drawing file selection
+
+    Returns:
+        storey name and drawing file numbers of each storey with files, in the order of the storeys,
+        the files without storey at the end with the name UNASSIGNED_STOREY
+
+    Raises:
+        ValueError: no storeys or no drawing file names in the selection
+    """
+
+    if not selection.storeys or not selection.file_names:
+        raise ValueError("The drawing file selection contains no storeys or no drawing file names")
+
+    storeys = sorted(set(selection.storeys), key = len, reverse = True)
+
+    storey_files: Dict[str, List[int]] = {storey: [] for storey in [*selection.storeys, UNASSIGNED_STOREY]}
+
+    for file_number in selection.file_numbers:
+        file_name = selection.file_names.get(file_number, "").lower()
+
+        storey = next((storey for storey in storeys if storey and storey.lower() in file_name), UNASSIGNED_STOREY)
+
+        storey_files[storey].append(file_number)
+
+    return [(storey, files) for storey, files in storey_files.items() if files]
+
+
+def get_filename(template: str,
+                 job     : ExportJob,
+                 storey  : str,
+                 files   : List[int],
+                 names   : List[str],
+                 index   : int) -> str:
+    """ Get the filename of a sub-job from the template
+
+    Args:
+        template: filename template, e.g. {project}-{storey}-{file}.ifc
+        job:      export job of the row
+        storey:   storey name
+        files:    numbers of the exported drawing files
+        names:    names of the exported drawing files
+        index:    number of the sub-job
+
+    Returns:
+        filename, characters not allowed in a filename are replaced by "_"
+
+    Raises:
+        KeyError:   unknown placeholder
+        ValueError: invalid template
+    """
+
+    values = {"host"    : job.host_name,
+              "project" : job.project_name,
+              "storey"  : storey,
+              "file"    : "_".join(f"{number:04d}" for number in files),
+              "name"    : "_".join(name for name in names if name),
+              "index"   : index,
+              "filename": os.path.splitext(job.filename)[0]}
+
+    return INVALID_FILENAME_CHARACTERS.sub("_", template.format(**values)).strip()
+
+
+def expand_job(job       : ExportJob,
+               selection : DrawingFileSelection,
+               split_mode: str,
+               template  : str) -> List[ExportJob]:
+    """ Expand the job of a row into sub-jobs
+
+    Args:
+        job:        export job of the row
+        selection:  drawing file selection of the row
+        split_mode: one of SPLIT_MODES
+        template:   filename template, empty for the filename of the row with the storey or file number
+
+    Returns:
+        sub-jobs in the order of the files or storeys
+
+    Raises:
+        KeyError:   unknown placeholder in the template
+        ValueError: invalid split mode or template, or no storeys or drawing file names for the storey split
+    """
+
+    if split_mode not in SPLIT_MODES:
+        raise ValueError("Split mode " + split_mode + " is not one of " + ", ".join(SPLIT_MODES))
+
+    if split_mode == "storey":
+        groups = get_storey_files(selection)
+    else:
+        groups = [("", [file_number]) for file_number in job.file_numbers]
+
+    if not template:
+        stem, extension = os.path.splitext(job.filename.replace("{", "{{").replace("}", "}}"))
+
+        template = stem + ("-{storey}" if split_mode == "storey" else "-{file}") + extension
+
+    sub_jobs = []
+
+    #----------------- a DWG export contains all loaded files, the other files of the row aren't kept loaded
+
+    keep_loaded = job.export_type != "DWG"
+
+    for index, (storey, files) in enumerate(groups, 1):
+        sub_job = ExportJob(job.row_index, job.export_type, job.host_name, job.project_name, job.df_selection_file,
+                            files, job.layer_favorite_file, job.export_favorite_file, job.config_file, job.version,
+                            job.destination_folder,
+                            get_filename(template, job, storey, files,
+                                         [selection.file_names.get(number, "") for number in files], index),
+                            passive_files = [number for number in job.file_numbers
+                                             if keep_loaded and number not in files])
+
+        sub_jobs.append(sub_job)
+
+    return sub_jobs
+
+
+def expand_jobs(jobs    : Iterable[ExportJob],
+                on_error: Callable[..., None]) -> Iterator[ExportJob]:
+    """ Expand the jobs of the rows with split mode, the other jobs are passed unchanged
+
+    A row with an invalid split mode or template is reported by on_error and skipped.
+
+    Args:
+        jobs:     export jobs of the rows
+        on_error: function called with the error category, message and details
+
+    Yields:
+        export jobs
+    """
+
+    for job in jobs:
+        if not job.split_mode:
+            yield job
+            continue
+
+        try:
+            yield from expand_job(job, get_selection(job.df_selection_file), job.split_mode, job.filename_template)
+
+        except (KeyError, IndexError, ValueError) as error:
+            on_error("split_invalid", "Row " + str(job.row_index) + " can't be split: " + str(error),
+                     row_index = job.row_index, project_name = job.project_name)
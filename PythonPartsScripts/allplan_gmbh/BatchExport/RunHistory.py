@@ -0,0 +1,368 @@
+""" Run history of the batch export in an SQLite database
+
+The duration and the phases of each row are stored in the database, by default <usr>\\BatchExportHistory.sqlite,
+so that all CSV files and all instances of a coordinated export share one history. A row is identified by
+the history key:
+
+    host name, project name, hash of the drawing file set, export favorite, format (type, version, extension)
+
+The history is used as cost model:
+
+    - the duration of a row is estimated by the median of its last exports, for an unknown row by the
+      average time per drawing file of the same format
+    - the remaining time of a run is the sum of the estimates of the remaining rows, corrected by the ratio
+      of the measured and the estimated durations of the rows already exported in this run
+    - a row is flagged as regressed, if its export took longer than the median of its last exports plus the
+      regression threshold
+    - the coordinator distributes the projects by their estimated duration instead of their row count
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import datetime
+import hashlib
+import os
+import sqlite3
+import statistics
+
+
+HISTORY_SIZE = 10
+HISTORY_RUNS = 100
+
+REGRESSION_THRESHOLD = 0.5
+MIN_REGRESSION_TIME  = 1.0
+
+MIN_CORRECTION = 0.25
+MAX_CORRECTION = 4.0
+
+HistoryKey = Tuple[str, str, str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (id           INTEGER PRIMARY KEY,
+                                 run_id       TEXT,
+                                 time         TEXT,
+                                 host_name    TEXT,
+                                 project_name TEXT,
+                                 file_set     TEXT,
+                                 favorite     TEXT,
+                                 format       TEXT,
+                                 file_count   INTEGER,
+                                 status       TEXT,
+                                 duration     REAL);
+CREATE TABLE IF NOT EXISTS phases (row_id   INTEGER REFERENCES rows(id),
+                                   phase    TEXT,
+                                   duration REAL);
+CREATE TABLE IF NOT EXISTS runs (id        INTEGER PRIMARY KEY,
+                                 run_id    TEXT UNIQUE,
+                                 first_row INTEGER);
+DROP INDEX IF EXISTS rows_key;
+CREATE INDEX IF NOT EXISTS rows_key_time ON rows (host_name, project_name, file_set, favorite, format, time);
+CREATE INDEX IF NOT EXISTS phases_row ON phases (row_id);
+"""
+
+
+def get_history_key(host_name    : str,
+                    project_name : str,
+                    file_numbers : Sequence[int],
+                    favorite_file: str,
+                    export_type  : str,
+                    version      : str,
+                    filename     : str) -> HistoryKey:
+    """ Get the history key of a row
+
+    Args:
+        host_name:     host name
+        project_name:  project name
+        file_numbers:  numbers of the exported drawing files
+        favorite_file: path of the export favorite, only the name is used
+        export_type:   "IFC" or "DWG"
+        version:       IFC or DWG version
+        filename:      name of the exported file, only the extension is used
+
+    Returns:
+        history key
+    """
+
+    file_set = hashlib.sha1(",".join(str(number) for number in sorted(file_numbers)).encode("ascii")).hexdigest()
+
+    return (host_name, project_name, file_set[:16], os.path.basename(favorite_file.replace("\\", "/")).lower(),
+            f"{export_type} {version} {os.path.splitext(filename)[1].lower()}")
+
+
+class RunHistory():
+    """ Definition of class RunHistory
+    """
+
+    def __init__(self,
+                 history_file: str):
+        """ Initialization of class RunHistory
+
+        Args:
+            history_file: path of the SQLite database
+        """
+
+        self.history_file = history_file
+
+        self.connection: Optional[sqlite3.Connection] = None
+
+        self.durations   : Dict[HistoryKey, List[float]] = {}
+        self.export_times: Dict[HistoryKey, List[float]] = {}
+        self.file_times  : Dict[str, Tuple[float, int]]  = {}
+
+
+    def open(self):
+        """ Open the database and load the durations of the last exports of each row from the last HISTORY_RUNS runs
+        """
+
+        self.connection = sqlite3.connect(self.history_file, timeout = 30)
+        self.connection.executescript(SCHEMA)
+
+        self.durations.clear()
+        self.export_times.clear()
+        self.file_times.clear()
+
+        #----------------- only the rows of the last HISTORY_RUNS runs are read, a history written before the
+        #                  runs table existed gets its runs once
+
+        with self.connection:
+            if self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 0:
+                self.connection.execute("INSERT INTO runs (run_id, first_row) SELECT run_id, MIN(id) FROM rows "
+                                        "GROUP BY run_id ORDER BY MIN(id)")
+
+        first_row = self.connection.execute(
+            "SELECT MIN(first_row) FROM (SELECT first_row FROM runs ORDER BY id DESC LIMIT ?)",
+            (HISTORY_RUNS,)).fetchone()[0] or 0
+
+        cursor = self.connection.execute(
+            "SELECT host_name, project_name, file_set, favorite, format, file_count, duration, "
+            "(SELECT SUM(duration) FROM phases WHERE row_id = rows.id AND phase = 'export') "
+            "FROM rows WHERE id >= ? AND status = 'exported' ORDER BY id DESC", (first_row,))
+
+        for host_name, project_name, file_set, favorite, export_format, file_count, duration, export_time in cursor:
+            key = (host_name, project_name, file_set, favorite, export_format)
+
+            if len(durations := self.durations.setdefault(key, [])) < HISTORY_SIZE:
+                durations.append(duration)
+
+                if export_time is not None:
+                    self.export_times.setdefault(key, []).append(export_time)
+
+            total_time, total_files = self.file_times.get(export_format, (0.0, 0))
+
+            self.file_times[export_format] = (total_time + duration, total_files + max(file_count, 1))
+
+
+    def close(self):
+        """ Close the database
+        """
+
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+    def add_row(self,
+                run_id    : str,
+                key       : HistoryKey,
+                file_count: int,
+                status    : str,
+                duration  : float,
+                phases    : Dict[str, float]):
+        """ Add a row to the history
+
+        Args:
+            run_id:     ID of the run
+            key:        history key of the row
+            file_count: number of exported drawing files
+            status:     status of the row, only exported rows are used for the estimates
+            duration:   duration of the row in seconds
+            phases:     duration of each phase in seconds
+        """
+
+        if not self.connection:
+            return
+
+        with self.connection:
+            row_id = self.connection.execute(
+                "INSERT INTO rows (run_id, time, host_name, project_name, file_set, favorite, format, file_count, "
+                "status, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, datetime.datetime.now().isoformat(timespec = "seconds"), *key, file_count, status,
+                 duration)).lastrowid
+
+            self.connection.execute("INSERT OR IGNORE INTO runs (run_id, first_row) VALUES (?, ?)", (run_id, row_id))
+
+            self.connection.executemany("INSERT INTO phases (row_id, phase, duration) VALUES (?, ?, ?)",
+                                        [(row_id, phase, phase_time) for phase, phase_time in phases.items()])
+
+
+    def estimate(self,
+                 key       : HistoryKey,
+                 file_count: int) -> Optional[float]:
+        """ Estimate the duration of a row
+
+        Args:
+            key:        history key of the row
+            file_count: number of exported drawing files
+
+        Returns:
+            median of the last exports of the row, the average time per drawing file of the format for an
+            unknown row, None without history of the format
+        """
+
+        if (durations := self.durations.get(key)):
+            return statistics.median(durations)
+
+        if (file_time := self.file_times.get(key[4])) is not None:
+            return file_time[0] / file_time[1] * max(file_count, 1)
+
+        return None
+
+
+    def estimate_export(self,
+                        key: HistoryKey) -> Optional[float]:
+        """ Estimate the duration of the export call of a row
+
+        Args:
+            key: history key of the row
+
+        Returns:
+            median export time of the last exports of the row, None without history of the row
+        """
+
+        if (export_times := self.export_times.get(key)):
+            return statistics.median(export_times)
+
+        return None
+
+
+    def is_regression(self,
+                      key        : HistoryKey,
+                      export_time: float,
+                      threshold  : float = REGRESSION_THRESHOLD) -> Optional[float]:
+        """ Check, whether the export of a row took longer than in the history
+
+        Args:
+            key:         history key of the row
+            export_time: duration of the export phase in seconds
+            threshold:   allowed relative increase
+
+        Returns:
+            median export time of the history, if the export time regressed, otherwise None
+        """
+
+        if not (export_times := self.export_times.get(key)):
+            return None
+
+        median = statistics.median(export_times)
+
+        if export_time > median * (1 + threshold) and export_time - median >= MIN_REGRESSION_TIME:
+            return median
+
+        return None
+
+
+class RemainingTime():
+    """ Definition of class RemainingTime
+    """
+
+    def __init__(self,
+                 estimates: Sequence[Optional[float]]):
+        """ Initialization of class RemainingTime
+
+        Args:
+            estimates: estimated duration of each row in the execution order, None if unknown
+        """
+
+        self.estimates = list(estimates)
+        self.completed = 0
+
+        self.measured_time  = 0.0
+        self.estimated_time = 0.0
+        self.exported_rows  = 0
+
+
+    def complete(self,
+                 duration: float,
+                 exported: bool):
+        """ Complete the next row
+
+        Args:
+            duration: measured duration of the row in seconds
+            exported: the row was exported, skipped and failed rows don't correct the estimates
+        """
+
+        estimate = self.estimates[self.completed] if self.completed < len(self.estimates) else None
+
+        self.completed += 1
+
+        if not exported:
+            return
+
+        self.exported_rows += 1
+        self.measured_time += duration
+
+        if estimate:
+            self.estimated_time += estimate
+
+
+    def get_remaining(self) -> Optional[float]:
+        """ Get the estimated remaining time
+
+        Rows without estimate are estimated by the average duration of the rows exported in this run.
+
+        Returns:
+            remaining time in seconds, None if no row can be estimated
+        """
+
+        remaining = self.estimates[self.completed:]
+
+        known = [estimate for estimate in remaining if estimate is not None]
+
+        correction = 1.0
+
+        if self.estimated_time:
+            correction = min(max(self.measured_time / self.estimated_time, MIN_CORRECTION), MAX_CORRECTION)
+
+        if self.exported_rows:
+            fallback: Optional[float] = self.measured_time / self.exported_rows
+        elif known:
+            fallback = sum(known) / len(known)
+        else:
+            fallback = None
+
+        if fallback is None:
+            return None if remaining else 0.0
+
+        return sum(estimate * correction if estimate is not None else fallback for estimate in remaining)
+
+
+def format_duration(seconds: float) -> str:
+    """ Format a duration as hours, minutes and seconds
+
+    Args:
+        seconds: duration in seconds
+
+    Returns:
+        duration as H:MM:SS
+    """
+
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes   = divmod(minutes, 60)
+
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def get_end_time(remaining: float) -> str:
+    """ Get the expected end time
+
+    Args:
+        remaining: remaining time in seconds
+
+    Returns:
+        end time as HH:MM
+    """
+
+    return (datetime.datetime.now() + datetime.timedelta(seconds = remaining)).strftime("%H:%M")
+
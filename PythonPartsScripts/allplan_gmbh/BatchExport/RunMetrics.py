@@ -0,0 +1,434 @@
+""" Metrics and live status of a running batch export
+
+While a run is active, two files are rewritten by a background thread every STATUS_INTERVAL seconds and
+after each row:
+
+    <CSV name>.prom          Prometheus text format for the textfile collector of node_exporter, with
+                             --metrics-dir written as batch_export_<CSV name>.prom into that folder
+    <CSV name>.status.json   status for a dashboard: state, current row, rows by status, remaining time,
+                             expected end and last error
+
+Both files are written to a temporary file in the same folder and renamed, so a scraper never reads a
+partial file. The counters start with each run, Prometheus handles the reset of a counter.
+
+The rows are counted by status and result: "done" for exported and deduplicated rows, "skipped" for
+unchanged and resumed rows, "failed" for all other statuses. The duration of each phase of a row, e.g.
+load_drawing_files or export, is recorded in a histogram.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+STATUS_INTERVAL = 5.0
+
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+DONE_STATUSES    = ("exported", "deduplicated")
+SKIPPED_STATUSES = ("unchanged", "resumed")
+
+
+def write_atomic(path: str,
+                 text: str):
+    """ Write a file atomically by a unique temporary file in the same folder
+
+    Args:
+        path: path of the file
+        text: content of the file
+    """
+
+    handle, temp_file = tempfile.mkstemp(prefix = os.path.basename(path) + ".", suffix = ".tmp",
+                                         dir = os.path.dirname(path) or ".")
+
+    try:
+        with os.fdopen(handle, "w", encoding = "UTF-8", newline = "\n") as file:
+            file.write(text)
+
+        os.replace(temp_file, path)
+
+    except OSError:
+        try:
+            os.remove(temp_file)
+
+        except OSError:
+            pass
+
+        raise
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """ Format the labels of a metric
+
+    Args:
+        labels: label values by name
+
+    Returns:
+        labels in the Prometheus text format, e.g. {csv="IFCExport",status="exported"}
+    """
+
+    values = [name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+              for name, value in labels.items()]
+
+    return "{" + ",".join(values) + "}" if values else ""
+
+
+def get_result(status: str) -> str:
+    """ Get the result of a row status
+
+    Args:
+        status: status of the row
+
+    Returns:
+        "done", "skipped" or "failed"
+    """
+
+    if status in DONE_STATUSES:
+        return "done"
+
+    return "skipped" if status in SKIPPED_STATUSES else "failed"
+
+
+class PhaseHistogram():
+    """ Definition of class PhaseHistogram
+    """
+
+    def __init__(self):
+        """ Initialization of class PhaseHistogram
+        """
+
+        self.buckets = [0] * len(PHASE_BUCKETS)
+        self.count   = 0
+        self.sum     = 0.0
+
+
+    def observe(self,
+                value: float):
+        """ Add a duration
+
+        Args:
+            value: duration in seconds
+        """
+
+        for index, bound in enumerate(PHASE_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+
+        self.count += 1
+        self.sum   += value
+
+
+class RunMetrics():
+    """ Definition of class RunMetrics
+    """
+
+    def __init__(self,
+                 metrics_file: str,
+                 status_file : str,
+                 run_id      : str,
+                 csv_file    : str,
+                 export_type : str):
+        """ Initialization of class RunMetrics
+
+        Args:
+            metrics_file: path of the Prometheus text file, empty for no metrics
+            status_file:  path of the JSON status file, empty for no status
+            run_id:       ID of the run
+            csv_file:     path of the CSV file
+            export_type:  type of the export, e.g. "IFC" or "IFC+DWG"
+        """
+
+        self.metrics_file = metrics_file
+        self.status_file  = status_file
+        self.run_id       = run_id
+        self.csv_file     = csv_file
+        self.export_type  = export_type
+
+        self.labels = {"csv": os.path.splitext(os.path.basename(csv_file))[0], "export_type": export_type}
+
+        self.state        = "starting"
+        self.start_time   = time.time()
+        self.rows_planned = 0
+        self.bytes        = 0
+        self.remaining: Optional[float] = None
+
+        self.rows      : Dict[Tuple[str, str], int] = {}
+        self.errors    : Dict[str, int]             = {}
+        self.phases    : Dict[str, PhaseHistogram]  = {}
+        self.process   : Dict[str, int]             = {}
+        self.current   : Dict[str, Any]             = {}
+        self.last_error: Dict[str, Any]             = {}
+
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+        self.thread: Optional[threading.Thread] = None
+
+
+    def start(self):
+        """ Start the periodic writing of the files
+        """
+
+        if not self.metrics_file and not self.status_file:
+            return
+
+        self.state = "running"
+
+        self.write()
+
+        self.thread = threading.Thread(target = self.run_writer, name = "RunMetrics", daemon = True)
+        self.thread.start()
+
+
+    def run_writer(self):
+        """ Write the files every STATUS_INTERVAL seconds until the run is finished
+        """
+
+        while not self.stop.wait(STATUS_INTERVAL):
+            self.write()
+
+
+    def finish(self,
+               state: str):
+        """ Stop the periodic writing and write the final state
+
+        Args:
+            state: final state of the run, e.g. "finished", "recycled" or "failed"
+        """
+
+        self.stop.set()
+
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+        with self.lock:
+            self.state   = state
+            self.current = {}
+
+        self.write()
+
+
+    def plan(self,
+             rows_planned: int,
+             remaining   : Optional[float]):
+        """ Set the number of rows of the run after the scheduling
+
+        Args:
+            rows_planned: number of scheduled rows
+            remaining:    estimated duration of the run in seconds, None if unknown
+        """
+
+        with self.lock:
+            self.rows_planned = rows_planned
+            self.remaining    = remaining
+
+
+    def start_row(self,
+                  row_index  : int,
+                  project_key: Tuple[str, str],
+                  output_file: str):
+        """ Set the current row
+
+        Args:
+            row_index:   index of the row
+            project_key: host and project name
+            output_file: path of the exported file
+        """
+
+        with self.lock:
+            self.current = {"row_index"   : row_index,
+                            "host_name"   : project_key[0],
+                            "project_name": project_key[1],
+                            "output_file" : output_file,
+                            "started"     : datetime.datetime.now().isoformat(timespec = "seconds")}
+
+
+    def add_row(self,
+                status     : str,
+                phases     : Dict[str, float],
+                output_size: int,
+                remaining  : Optional[float],
+                process    : Dict[str, int]):
+        """ Add a finished row and write the files
+
+        Args:
+            status:      status of the row
+            phases:      duration of each phase in seconds
+            output_size: size of the exported file in bytes
+            remaining:   estimated remaining time in seconds, None if unknown
+            process:     sample of the Allplan process
+        """
+
+        with self.lock:
+            key = (status, get_result(status))
+
+            self.rows[key] = self.rows.get(key, 0) + 1
+
+            for phase, duration in phases.items():
+                self.phases.setdefault(phase, PhaseHistogram()).observe(duration)
+
+            self.bytes     += output_size
+            self.remaining  = remaining
+            self.process    = dict(process)
+
+        self.write()
+
+
+    def add_error(self,
+                  category: str,
+                  message : str):
+        """ Add an error
+
+        Args:
+            category: category of the error
+            message:  error message
+        """
+
+        with self.lock:
+            self.errors[category] = self.errors.get(category, 0) + 1
+
+            self.last_error = {"category": category,
+                               "message" : message,
+                               "time"    : datetime.datetime.now().isoformat(timespec = "seconds")}
+
+
+    def write(self):
+        """ Write the metrics and the status file, errors are ignored to not disturb the export
+
+        The files are written under the lock, so the writer thread and the main thread never replace a file
+        with an older state.
+        """
+
+        with self.lock:
+            for path, get_text in ((self.metrics_file, self.get_metrics_text),
+                                   (self.status_file,  lambda: json.dumps(self.get_status(), indent = 2))):
+                if not path:
+                    continue
+
+                try:
+                    write_atomic(path, get_text())
+
+                except OSError:
+                    pass
+
+
+    def get_metrics_text(self) -> str:
+        """ Get the metrics in the Prometheus text format
+
+        Returns:
+            metrics
+        """
+
+        lines: List[str] = []
+
+        def add_metric(name       : str,
+                       metric_type: str,
+                       help_text  : str,
+                       samples    : List[Tuple[str, Dict[str, str], float]]):
+            """ add a metric with its samples
+
+            Args:
+                name:        name of the metric
+                metric_type: counter, gauge or histogram
+                help_text:   description
+                samples:     suffix, additional labels and value of each sample
+            """
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for suffix, labels, value in samples:
+                lines.append(name + suffix + format_labels({**self.labels, **labels}) + " " + repr(float(value)))
+
+        add_metric("batch_export_running", "gauge", "1 while the run is active",
+                   [("", {"state": self.state}, 1 if self.state == "running" else 0)])
+        add_metric("batch_export_run_start_timestamp_seconds", "gauge", "Start time of the run",
+                   [("", {}, self.start_time)])
+        add_metric("batch_export_last_update_timestamp_seconds", "gauge", "Time of the last update",
+                   [("", {}, time.time())])
+        add_metric("batch_export_rows_planned", "gauge", "Scheduled rows of the run",
+                   [("", {}, self.rows_planned)])
+        add_metric("batch_export_rows_total", "counter", "Rows by status and result (done, skipped, failed)",
+                   [("", {"status": status, "result": result}, count)
+                    for (status, result), count in sorted(self.rows.items())])
+        add_metric("batch_export_errors_total", "counter", "Errors by category",
+                   [("", {"category": category}, count) for category, count in sorted(self.errors.items())])
+        add_metric("batch_export_bytes_written_total", "counter", "Size of the exported files",
+                   [("", {}, self.bytes)])
+
+        if self.remaining is not None:
+            add_metric("batch_export_remaining_seconds", "gauge", "Estimated remaining time",
+                       [("", {}, round(self.remaining, 1))])
+
+        if self.current:
+            add_metric("batch_export_current_project_info", "gauge", "Project of the current row",
+                       [("", {"host_name"   : self.current["host_name"],
+                              "project_name": self.current["project_name"]}, 1)])
+            add_metric("batch_export_current_row", "gauge", "Index of the current row",
+                       [("", {}, self.current["row_index"])])
+
+        if "rss" in self.process:
+            add_metric("batch_export_process_resident_bytes", "gauge", "Memory of the Allplan process",
+                       [("", {}, self.process["rss"])])
+
+        if "handles" in self.process:
+            add_metric("batch_export_process_handles", "gauge", "Handles of the Allplan process",
+                       [("", {}, self.process["handles"])])
+
+        samples: List[Tuple[str, Dict[str, str], float]] = []
+
+        for phase, histogram in sorted(self.phases.items()):
+            samples.extend(("_bucket", {"phase": phase, "le": str(bound)}, count)
+                           for bound, count in zip(PHASE_BUCKETS, histogram.buckets))
+            samples.append(("_bucket", {"phase": phase, "le": "+Inf"}, histogram.count))
+            samples.append(("_sum", {"phase": phase}, round(histogram.sum, 4)))
+            samples.append(("_count", {"phase": phase}, histogram.count))
+
+        add_metric("batch_export_phase_seconds", "histogram", "Duration of the phases of the rows", samples)
+
+        return "\n".join(lines) + "\n"
+
+
+    def get_status(self) -> Dict[str, Any]:
+        """ Get the status of the run
+
+        Returns:
+            status for the JSON status file
+        """
+
+        rows: Dict[str, int] = {}
+        results = {"done": 0, "skipped": 0, "failed": 0}
+
+        for (status, result), count in self.rows.items():
+            rows[status]     = rows.get(status, 0) + count
+            results[result] += count
+
+        expected_end = None
+
+        if self.remaining is not None and self.state == "running":
+            expected_end = (datetime.datetime.now() +
+                            datetime.timedelta(seconds = self.remaining)).isoformat(timespec = "seconds")
+
+        return {"run_id"           : self.run_id,
+                "csv_file"         : self.csv_file,
+                "export_type"      : self.export_type,
+                "state"            : self.state,
+                "started"          : datetime.datetime.fromtimestamp(self.start_time).isoformat(timespec = "seconds"),
+                "updated"          : datetime.datetime.now().isoformat(timespec = "seconds"),
+                "rows_planned"     : self.rows_planned,
+                "rows"             : rows,
+                "results"          : results,
+                "bytes_written"    : self.bytes,
+                "current_row"      : self.current or None,
+                "remaining_seconds": None if self.remaining is None else round(self.remaining, 1),
+                "expected_end"     : expected_end,
+                "last_error"       : self.last_error or None,
+                "process"          : self.process}
@@ -0,0 +1,182 @@
+""" Tracked state of the Allplan session
+
+The state of the opened project, the loaded drawing files and the loaded layer favorite decides, which
+operations a row needs: only the differences to the previous row are applied, a layer favorite with the same
+layer states is not loaded again, and the view is redrawn by the redraw policy:
+
+    always:   after each project switch and before each export
+    required: only before an export, if the drawing files or the layer favorite changed since the last redraw
+    end:      once after the last export
+    never:    no redraw
+
+The decisions are made without Allplan, so the export session (ExportSession) executes them by the Allplan
+API and the planner (Planner) simulates them with the same rules.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from .JobScheduler import get_load_changes, get_load_states
+
+
+T = TypeVar("T")
+
+
+class SessionState(Generic[T]):
+    """ Definition of class SessionState
+    """
+
+    def __init__(self,
+                 full_reload  : bool,
+                 redraw_policy: str,
+                 foreground   : T,
+                 background   : T,
+                 passive      : T):
+        """ Initialization of class SessionState
+
+        Args:
+            full_reload:   unload all drawing files and load the complete selection for each row
+            redraw_policy: redraw policy, one of ExportOptions.REDRAW_POLICIES
+            foreground:    state of the active foreground file
+            background:    state of an active background file
+            passive:       state of a passive background file
+        """
+
+        self.full_reload   = full_reload
+        self.redraw_policy = redraw_policy
+        self.foreground    = foreground
+        self.background    = background
+        self.passive       = passive
+
+        self.project_key : Optional[tuple]        = None
+        self.loaded_files: Optional[Dict[int, T]] = None
+        self.layer_state : Any = None
+        self.layer_hash  = ""
+
+        self.view_changed   = True
+        self.redraw_pending = False
+
+
+    def open_project(self,
+                     project_key: Tuple[str, str],
+                     active     : bool) -> bool:
+        """ Set the opened project, the state is reset for a different or not active project
+
+        Args:
+            project_key: host name and project name
+            active:      the project was already opened
+
+        Returns:
+            True, if the state is reset
+        """
+
+        reset = not active or project_key != self.project_key
+
+        if reset:
+            self.loaded_files = None
+            self.layer_state  = None
+            self.layer_hash   = ""
+            self.view_changed = True
+
+        self.project_key = project_key
+
+        return reset
+
+
+    def invalidate(self):
+        """ Forget the state, the next row starts with a full reload
+        """
+
+        self.project_key  = None
+        self.loaded_files = None
+        self.layer_state  = None
+        self.layer_hash   = ""
+
+
+    def change_drawing_files(self,
+                             file_numbers : Sequence[int],
+                             passive_files: Sequence[int]) -> Tuple[bool, List[int], List[int], List[int], Dict[int, T]]:
+        """ Get the operations to load the drawing files of a row and set them as loaded
+
+        Args:
+            file_numbers:  numbers of the drawing files, the first one is the foreground file
+            passive_files: numbers of the drawing files loaded as passive background
+
+        Returns:
+            all files are unloaded first, for a full reload or an unknown state,
+            files loaded before the unloads,
+            files to unload,
+            files loaded after the unloads,
+            load state by drawing file number
+        """
+
+        target = get_load_states(file_numbers, passive_files, self.foreground, self.background, self.passive)
+
+        unload_all = self.full_reload or self.loaded_files is None
+
+        loaded = {} if unload_all or self.loaded_files is None else self.loaded_files
+
+        first_loads, unloads, loads = get_load_changes(loaded, target, self.foreground)
+
+        self.view_changed = self.view_changed or unload_all or target != loaded
+        self.loaded_files = target
+
+        return unload_all, first_loads, unloads, loads, target
+
+
+    def is_layer_favorite_loaded(self,
+                                 layer_hash: str) -> bool:
+        """ Check, whether a layer favorite with the same layer states is loaded
+
+        Args:
+            layer_hash: hash of the layer states of the favorite, empty if unknown
+
+        Returns:
+            True, if the load can be skipped
+        """
+
+        return bool(layer_hash) and layer_hash == self.layer_hash and not self.full_reload
+
+
+    def set_layer_favorite(self,
+                           layer_state: Any,
+                           layer_hash : str):
+        """ Set the loaded layer favorite, also a failed load may have changed the layer states of the view
+
+        Args:
+            layer_state: layer states of the favorite, None if unknown or not loaded
+            layer_hash:  hash of the layer states, empty if unknown or not loaded
+        """
+
+        self.layer_state  = layer_state
+        self.layer_hash   = layer_hash
+        self.view_changed = True
+
+
+    def redraw(self,
+               required: bool) -> bool:
+        """ Check, whether the view must be redrawn by the redraw policy
+
+        Args:
+            required: the redraw is needed by the export, it is skipped if the view is unchanged
+
+        Returns:
+            True, if the view must be redrawn now
+        """
+
+        if self.redraw_policy == "always" or (required and self.view_changed and self.redraw_policy == "required"):
+            return True
+
+        if self.redraw_policy == "end":
+            self.redraw_pending = True
+
+        return False
+
+
+    def set_redrawn(self):
+        """ Set the view as redrawn
+        """
+
+        self.redraw_pending = False
+        self.view_changed   = False
@@ -0,0 +1,405 @@
+""" Daemon mode of the batch export watching a spool folder
+
+Instead of one CSV file, Allplan is started once with a spool folder:
+
+    Allplan_2026.exe -o "@<path>\\BatchExportByFileList.pyp" --spool "\\\\server\\BatchExport\\Spool" [options]
+
+The daemon polls the spool folder for job files, IFCExport*.csv for the IFC export, DWGExport*.csv for the
+DWG export and both for the combined export. All job files found by a poll are exported as one batch with the
+same runner, so the rows of different job files for the same project are scheduled together. The setting
+files of a job file are in the sub folders of the spool folder, like next to a CSV file. The batches run
+back to back in the same Allplan session, the opened project, the loaded drawing files and the layer
+favorite of the previous batch are kept.
+
+The reports of a batch are named after the daemon, e.g. <spool folder>\\BatchIFC.log, and the job files of
+the batch are listed in BatchIFC.jobs.txt. A batch, which was recycled or interrupted, is resumed with the same
+job files from its journal, also if further job files were copied to the spool folder meanwhile.
+
+After a batch, each job file is moved to done\\<run ID> or failed\\<run ID> together with the reports of
+the batch. A job file fails, if one of its rows or the whole batch has an error. A job file is only taken,
+if it wasn't modified for MIN_FILE_AGE seconds, so a file which is still copied to the spool folder isn't
+exported half. A job file which can't be moved, e.g. because it is locked, isn't exported again, its move
+is retried with each poll. The daemon ends, when the file "stop" is created in the spool folder, after the
+idle timeout or when the session is recycled, the new Allplan process started by the runner of the recycled
+batch (recycled_runner) continues the daemon.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import argparse
+import datetime
+import fnmatch
+import os
+import shutil
+import time
+
+import NemAll_Python_IFW_ElementAdapter as AllplanEleAdapter
+
+from .ExportJob import ExportJob, get_settings_path, read_rows
+from .ExportRunner import ExportRunner
+from .ExportSession import ExportSession
+
+
+SPOOL_PATTERNS = {"IFC": ("IFCExport*.csv",),
+                  "DWG": ("DWGExport*.csv",),
+                  ""   : ("IFCExport*.csv", "DWGExport*.csv")}
+
+DONE_FOLDER   = "done"
+FAILED_FOLDER = "failed"
+STOP_FILE     = "stop"
+DAEMON_LOG    = "BatchExportDaemon.log"
+BATCH_NAME    = "Batch"
+BATCH_JOBS    = ".jobs.txt"
+
+MIN_FILE_AGE = 10.0
+
+REPORT_EXTENSIONS = (".log", ".errors.json", ".events.jsonl", ".preflight.json", ".manifest.json",
+                     ".journal.jsonl", ".status.json", ".prom")
+
+BATCH_ERRORS = ("csv_file_not_found", "preflight_failed", "layer_state_not_saved")
+
+
+def find_job_files(spool_path : str,
+                   export_type: str,
+                   min_age    : float = MIN_FILE_AGE) -> List[str]:
+    """ Find the job files in the spool folder
+
+    Args:
+        spool_path:  path of the spool folder
+        export_type: "IFC", "DWG" or empty for the combined export
+        min_age:     minimum time since the last modification in seconds
+
+    Returns:
+        paths of the job files, the oldest first
+    """
+
+    now = time.time()
+
+    job_files = []
+
+    try:
+        entries = list(os.scandir(spool_path))
+
+    except OSError:
+        return []
+
+    for entry in entries:
+        if not entry.is_file() or not any(fnmatch.fnmatch(entry.name.lower(), pattern.lower())
+                                          for pattern in SPOOL_PATTERNS[export_type]):
+            continue
+
+        if ".shard" in entry.name.lower():
+            continue
+
+        try:
+            modified = entry.stat().st_mtime
+
+        except OSError:
+            continue
+
+        if now - modified >= min_age:
+            job_files.append((modified, entry.path))
+
+    return [path for _, path in sorted(job_files)]
+
+
+def get_row_ranges(job_files: List[str]) -> List[Tuple[int, int]]:
+    """ Get the row indices of the job files, numbered one after another like by the runner
+
+    Args:
+        job_files: paths of the job files
+
+    Returns:
+        first and last row index of each job file
+    """
+
+    row_ranges = []
+
+    first_row_index = 1
+
+    for job_file in job_files:
+        try:
+            row_count = sum(1 for _ in read_rows(job_file))
+
+        except (OSError, UnicodeDecodeError):
+            row_count = 0
+
+        row_ranges.append((first_row_index, first_row_index + row_count - 1))
+
+        first_row_index += row_count
+
+    return row_ranges
+
+
+def get_failed_files(job_files: List[str],
+                     errors   : List[Dict]) -> Set[str]:
+    """ Get the job files with errors
+
+    Args:
+        job_files: paths of the job files of the batch
+        errors:    errors of the batch
+
+    Returns:
+        paths of the failed job files, all job files for an error of the whole batch
+    """
+
+    if any(error.get("category") in BATCH_ERRORS for error in errors):
+        return set(job_files)
+
+    row_indices = {error["row_index"] for error in errors if isinstance(error.get("row_index"), int)}
+
+    return {job_file for job_file, (first, last) in zip(job_files, get_row_ranges(job_files))
+            if any(first <= row_index <= last for row_index in row_indices)}
+
+
+def move_job_files(job_files   : List[str],
+                   failed_files: Set[str],
+                   report_path : str,
+                   spool_path  : str,
+                   run_id      : str) -> Dict[str, str]:
+    """ Move the job files to the done or failed folder together with the reports of the batch
+
+    Args:
+        job_files:    paths of the job files of the batch
+        failed_files: paths of the failed job files
+        report_path:  path of the reports of the batch without extension
+        spool_path:   path of the spool folder
+        run_id:       ID of the run of the batch
+
+    Returns:
+        target folder of each job file
+    """
+
+    targets = {job_file: os.path.join(spool_path, FAILED_FOLDER if job_file in failed_files else DONE_FOLDER,
+                                      run_id) for job_file in job_files}
+
+    report_files = [report_path + extension for extension in REPORT_EXTENSIONS
+                    if os.path.isfile(report_path + extension)]
+
+    for target in set(targets.values()):
+        os.makedirs(target, exist_ok = True)
+
+        for report_file in report_files:
+            shutil.copy2(report_file, target)
+
+    for job_file, target in targets.items():
+        shutil.move(job_file, os.path.join(target, os.path.basename(job_file)))
+
+    for report_file in report_files:
+        os.remove(report_file)
+
+    return targets
+
+
+class SpoolDaemon():
+    """ Definition of class SpoolDaemon
+    """
+
+    def __init__(self,
+                 doc        : AllplanEleAdapter.DocumentAdapter,
+                 spool_path : str,
+                 export_type: str,
+                 options    : argparse.Namespace,
+                 full_reload: bool,
+                 export_job : Callable[[ExportSession, ExportJob, str], None]):
+        """ Initialization of class SpoolDaemon
+
+        Args:
+            doc:         document of the Allplan drawing files
+            spool_path:  path of the spool folder
+            export_type: "IFC", "DWG" or empty for the combined export
+            options:     options from the command line
+            full_reload: unload all drawing files and load the complete selection for each row
+            export_job:  function to export a job to the given file
+        """
+
+        self.doc         = doc
+        self.spool_path  = spool_path.rstrip("\\/")
+        self.export_type = export_type
+        self.options     = options
+        self.full_reload = full_reload
+        self.export_job  = export_job
+
+        self.session = ExportSession(doc, full_reload, options.redraw)
+        self.batches = 0
+
+        self.unmoved: Dict[str, str] = {}
+
+        self.batch_path = os.path.join(self.spool_path, BATCH_NAME + export_type)
+
+        self.recycled_runner: Optional[ExportRunner] = None
+
+
+    def run(self):
+        """ Export the job files of the spool folder until the daemon is stopped
+        """
+
+        idle_start = time.monotonic()
+
+        self.write_log("Daemon started, spool folder " + self.spool_path)
+
+        for error in self.options.errors:
+            self.write_log(error)
+
+        while True:
+            if os.path.exists(stop_file := os.path.join(self.spool_path, STOP_FILE)):
+                os.remove(stop_file)
+
+                self.write_log("Daemon stopped by " + stop_file)
+                return
+
+            self.retry_moves()
+
+            if (job_files := self.read_batch_files() or
+                             [job_file for job_file in find_job_files(self.spool_path, self.export_type)
+                              if job_file not in self.unmoved]):
+                runner = self.run_batch(job_files)
+
+                if runner and runner.recycled:
+                    self.write_log("Session recycled: " + runner.recycled)
+
+                    self.recycled_runner = runner
+                    return
+
+                idle_start = time.monotonic()
+                continue
+
+            if self.options.idle_timeout and time.monotonic() - idle_start >= self.options.idle_timeout:
+                self.write_log(f"Daemon stopped after {self.options.idle_timeout:.0f} s without job files")
+                return
+
+            time.sleep(self.options.poll_interval)
+
+
+    def run_batch(self,
+                  job_files: List[str]) -> Optional[ExportRunner]:
+        """ Export the job files as one batch and move them to the done or failed folder
+
+        Args:
+            job_files: paths of the job files
+
+        Returns:
+            runner of the batch, None if the batch failed with an exception
+        """
+
+        self.batches += 1
+
+        self.write_log(f"Batch {self.batches}: " + ", ".join(os.path.basename(job_file) for job_file in job_files))
+
+        with open(self.batch_path + BATCH_JOBS, "w", encoding = "UTF-8") as file:
+            file.write("".join(os.path.basename(job_file) + "\n" for job_file in job_files))
+
+        runner = ExportRunner(self.doc, job_files[0], get_settings_path(job_files[0]), self.export_type,
+                              self.options, True, self.full_reload, job_files[1:], self.session, self.batch_path)
+
+        try:
+            runner.export(runner.read_jobs(), self.export_job)
+
+        except Exception as error:                                      # pylint: disable=broad-except
+            self.session.invalidate()
+
+            runner.error_report.add("batch_failed", "Batch failed: " + str(error), False)
+            runner.error_report.write()
+
+            self.write_log("Batch failed: " + str(error))
+
+            self.move_job_files(runner, job_files, set(job_files))
+
+            return None
+
+        if runner.recycled:
+            return runner
+
+        self.move_job_files(runner, job_files, get_failed_files(job_files, runner.error_report.errors))
+
+        return runner
+
+
+    def move_job_files(self,
+                       runner      : ExportRunner,
+                       job_files   : List[str],
+                       failed_files: Set[str]):
+        """ Move the job files of a batch to the done or failed folder
+
+        A job file, which can't be moved, stays in the spool folder and is moved with the next poll.
+
+        Args:
+            runner:       runner of the batch
+            job_files:    paths of the job files
+            failed_files: paths of the failed job files
+        """
+
+        try:
+            os.remove(self.batch_path + BATCH_JOBS)
+
+        except OSError:
+            pass
+
+        try:
+            targets = move_job_files(job_files, failed_files, runner.report_path, self.spool_path, runner.run_id)
+
+        except OSError as error:
+            self.write_log("Job files not moved: " + str(error) + ", retried with the next poll")
+
+            for job_file in job_files:
+                if os.path.exists(job_file):
+                    self.unmoved[job_file] = os.path.join(self.spool_path, FAILED_FOLDER if job_file in failed_files
+                                                          else DONE_FOLDER, runner.run_id)
+            return
+
+        for job_file, target in targets.items():
+            self.write_log(os.path.basename(job_file) + " -> " + target)
+
+
+    def read_batch_files(self) -> List[str]:
+        """ Read the job files of a recycled or interrupted batch
+
+        Returns:
+            paths of the job files of the batch, which are still in the spool folder, empty without such batch
+        """
+
+        try:
+            with open(self.batch_path + BATCH_JOBS, encoding = "UTF-8") as file:
+                names = file.read().splitlines()
+
+        except OSError:
+            return []
+
+        return [job_file for name in names
+                if name and os.path.isfile(job_file := os.path.join(self.spool_path, name)) and
+                job_file not in self.unmoved]
+
+
+    def retry_moves(self):
+        """ Retry the move of the job files which couldn't be moved after their batch
+        """
+
+        for job_file, target in list(self.unmoved.items()):
+            try:
+                if os.path.exists(job_file):
+                    os.makedirs(target, exist_ok = True)
+
+                    shutil.move(job_file, os.path.join(target, os.path.basename(job_file)))
+
+                    self.write_log(os.path.basename(job_file) + " -> " + target)
+
+            except OSError:
+                continue
+
+            del self.unmoved[job_file]
+
+
+    def write_log(self,
+                  message: str):
+        """ Write a message to the log of the daemon in the spool folder
+
+        Args:
+            message: message
+        """
+
+        print(message)
+
+        with open(os.path.join(self.spool_path, DAEMON_LOG), "a", encoding = "UTF-8") as file:
+            file.write(datetime.datetime.now().isoformat(timespec = "seconds") + " " + message + "\n")
@@ -0,0 +1,2 @@
+""" Shared modules of the batch IFC and DWG export scripts
+"""
@@ -0,0 +1,103 @@
+""" Script for BatchExportByFileList
+
+The combined export runs the IFC and DWG exports of one or more CSV files in one Allplan session. The CSV
+file can be an IFC or DWG CSV file or a merged job file with the column exportType. Rows with the same
+project, drawing files and layer favorite are exported together, the drawing files and the layer favorite
+are only loaded once for all their IFC and DWG exports.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import NemAll_Python_IFW_Input as AllplanIFW
+import NemAll_Python_IFW_ElementAdapter as AllplanEleAdapter
+
+from BuildingElement import BuildingElement
+from BuildingElementComposite import BuildingElementComposite
+from BuildingElementControlProperties import BuildingElementControlProperties
+from CreateElementResult import CreateElementResult
+from StringTableService import StringTableService
+
+from allplan_gmbh.BatchExport.Exporters import export_job
+from allplan_gmbh.BatchExport.ExportInteractor import ExportInteractor
+
+print('Load BatchExportByFileList.py')
+
+
+def check_allplan_version(_build_ele: BuildingElement,
+                          _version  : type) -> bool:
+    """ Check the current Allplan version
+
+    Args:
+        _build_ele: building element with the parameter properties
+        _version:   the current Allplan version
+
+    Returns:
+        True
+    """
+
+    # Support all versions
+    return True
+
+
+def create_element(_build_ele: BuildingElement,
+                   _doc      : AllplanEleAdapter.DocumentAdapter) -> CreateElementResult:
+    """ Creation of element (only necessary for the library preview)
+
+    Args:
+        _build_ele: building element with the parameter properties
+        _doc:       document of the Allplan drawing files
+
+    Returns:
+        created element result
+    """
+
+    return CreateElementResult()
+
+
+def create_interactor(coord_input              : AllplanIFW.CoordinateInput,
+                      _pyp_path                : str,
+                      _global_str_table_service: StringTableService,
+                      build_ele_list           : List[BuildingElement],
+                      build_ele_composite      : BuildingElementComposite,
+                      build_ele_ctrl_props_list: List[BuildingElementControlProperties],
+                      _modify_uuid_list        : List[str]) -> object:
+    """ Create the interactor
+
+    Args:
+        coord_input:               API object for the coordinate input, element selection, ... in the Allplan view
+        _pyp_path:                 path of the pyp file
+        _global_str_table_service: global string table service
+        build_ele_list:            list with the building elements
+        build_ele_composite:       building element composite with the building element constraints
+        build_ele_ctrl_props_list: list with the building element control properties
+        _modify_uuid_list:         list with the UUIDs of the modified elements
+
+    Returns:
+        created interactor
+    """
+
+    return BatchExportByFileList(coord_input, build_ele_list, build_ele_composite,  build_ele_ctrl_props_list)
+
+
+class BatchExportByFileList(ExportInteractor):
+    """ Definition of class BatchExportByFileList
+    """
+
+    def __init__(self,
+                 coord_input              : AllplanIFW.CoordinateInput,
+                 build_ele_list           : List[BuildingElement],
+                 build_ele_composite      : BuildingElementComposite,
+                 build_ele_ctrl_props_list: List[BuildingElementControlProperties]):
+        """ Initialization of class BatchExportByFileList
+
+        Args:
+            coord_input:               API object for the coordinate input, element selection, ... in the Allplan view
+            build_ele_list:            list with the building elements
+            build_ele_composite:       building element composite with the building element constraints
+            build_ele_ctrl_props_list: list with the building element control properties
+        """
+
+        super().__init__(coord_input, build_ele_list, build_ele_composite, build_ele_ctrl_props_list,
+                         "BatchExportByFileList", "BatchExport", "", export_job)
@@ -0,0 +1,91 @@
+""" Stand-in for the Allplan executable with the simulated Allplan API
+
+The stand-in accepts the command line of a scheduled export and exports the CSV files headless with the
+export loop of the scripts (ExportRunner) and the simulated API of the folder SimulatedAllplan:
+
+    python benchmarks/AllplanStandIn.py -o "@<path>\\IFCExportByFileList.pyp" "<path>\\IFCExport.csv" [options]
+
+The export type is taken from the name of the PythonPart. So the coordinator can be tested without Allplan:
+
+    python -m allplan_gmbh.BatchExport.Coordinator <csv file> --allplan benchmarks/AllplanStandIn.py
+                                                   --pyp <pyp file>
+
+The usr, std and project folders of the simulated API are in the folder given by the environment variable
+ALLPLAN_STAND_IN_PATH, by default AllplanStandIn in the temporary folder. All instances share them like the
+Allplan instances of one user.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(BENCHMARK_PATH, "SimulatedAllplan"))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_PATH), "PythonPartsScripts"))
+
+# pylint: disable=wrong-import-position
+
+import SimulatedApi
+
+from allplan_gmbh.BatchExport.Exporters import export_dwg, export_ifc, export_job
+from allplan_gmbh.BatchExport.ExportOptions import parse_command_line
+from allplan_gmbh.BatchExport.ExportRunner import ExportRunner
+
+
+def main(argv: List[str]) -> int:
+    """ Export the CSV files of the command line
+
+    Args:
+        argv: command line arguments without the program name
+
+    Returns:
+        exit code, 0 if the export ran, 1 without PythonPart or CSV file
+    """
+
+    if len(argv) < 2 or argv[0] != "-o" or not argv[1].startswith("@"):
+        print("Usage: AllplanStandIn.py -o @<pyp file> <csv file> [options]")
+        return 1
+
+    pyp_name = os.path.basename(argv[1][1:].replace("\\", "/"))
+    options  = parse_command_line(["AllplanStandIn", *argv[2:]])
+
+    if not options.csv_file:
+        print("No CSV file given")
+        return 1
+
+    stand_in_path = os.environ.get("ALLPLAN_STAND_IN_PATH") or os.path.join(tempfile.gettempdir(), "AllplanStandIn")
+
+    for path_name in ("usr", "std", "prj", "projects"):
+        SimulatedApi.paths[path_name] = os.path.join(stand_in_path, path_name, "")
+
+        os.makedirs(SimulatedApi.paths[path_name], exist_ok = True)
+
+    SimulatedApi.reset()
+
+    export_type, export_function = ("IFC", export_ifc) if pyp_name.startswith("IFC") else \
+                                   ("DWG", export_dwg) if pyp_name.startswith("DWG") else \
+                                   ("", export_job)
+
+    runner = ExportRunner(None, options.csv_file, os.path.join(os.path.dirname(options.csv_file), ""), export_type,
+                          options, True, options.full_reload, options.csv_files[1:] if not export_type else ())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.export(runner.read_jobs(), export_function)
+
+    runner.relaunch()
+
+    print(f"{options.csv_file}: {SimulatedApi.calls['ExportIFC'] + SimulatedApi.calls['ExportDWGByTheme']} exports, "
+          f"{len(runner.error_report.errors)} errors" + (", recycled" if runner.recycled else ""))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
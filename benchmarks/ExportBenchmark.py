@@ -0,0 +1,262 @@
+""" Benchmark of the batch export with a simulated Allplan API
+
+The export loop of the scripts (ExportRunner) is executed with the simulated Allplan API of the folder
+SimulatedAllplan over synthetic CSV files. For each scenario, the API calls, the simulated time spent in
+Allplan and the real time of the Python side are reported:
+
+    python benchmarks/ExportBenchmark.py [--rows 2000] [--projects 25] [--type IFC DWG combined]
+                                         [--latency RedrawAll=1.5] [--json result.json]
+                                         [--baseline baseline.json] [--tolerance 0.05]
+
+With --baseline, the API calls and the simulated time are compared to a previous result written by --json.
+The exit code is 1, if a scenario is slower or needs more calls than the baseline plus the tolerance.
+
+The combined type exports a merged job file with an IFC and a DWG row for the same drawing files, the
+scenario "separate" exports the same rows by two runs of the IFC and the DWG CSV file.
+
+The scripts themselves need the PythonParts framework, so the benchmark calls the runner with the export
+functions of the scripts directly.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(BENCHMARK_PATH, "SimulatedAllplan"))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_PATH), "PythonPartsScripts"))
+
+# pylint: disable=wrong-import-position
+
+import SimulatedApi
+
+from allplan_gmbh.BatchExport.Exporters import export_job
+from allplan_gmbh.BatchExport.ExportOptions import parse_command_line
+from allplan_gmbh.BatchExport.ExportRunner import ExportRunner
+
+from SyntheticData import create_csv, create_merged_csv
+
+
+#----------------- scenarios: name, command line options, keep the manifest of the previous scenario
+
+SCENARIOS: List[Tuple[str, List[str], bool]] = [("legacy",     ["--full-reload", "--redraw", "always", "--no-dedupe"],
+                                                  False),
+                                                 ("default",    [],                                      False),
+                                                 ("redraw_end", ["--redraw", "end"],                     False),
+                                                 ("unchanged",  [],                                      True)]
+
+REPORTED_CALLS = ["OpenProject", "UnloadAll", "LoadFile", "UnloadFile", "LoadFromFavoriteFile", "RedrawAll",
+                  "ExportIFC", "ExportDWGByTheme"]
+
+
+def run_scenario(csv_file     : str,
+                 export_type  : str,
+                 options      : List[str],
+                 keep_manifest: bool,
+                 latencies    : Dict[str, float]) -> Dict[str, Any]:
+    """ Run the export of a CSV file with the simulated API
+
+    Args:
+        csv_file:      path of the CSV file
+        export_type:   "IFC" or "DWG", empty for a merged job file
+        options:       command line options of the export
+        keep_manifest: keep the manifest of the previous run, otherwise all rows are exported
+        latencies:     latencies replacing the default ones
+
+    Returns:
+        result of the scenario
+    """
+
+    report_path = os.path.splitext(csv_file)[0]
+
+    if not keep_manifest:
+        for extension in (".manifest.json", ".events.jsonl"):
+            if os.path.exists(report_path + extension):
+                os.remove(report_path + extension)
+
+    SimulatedApi.reset(latencies)
+
+    runner = ExportRunner(None, csv_file, os.path.join(os.path.dirname(csv_file), ""), export_type,
+                          parse_command_line(["benchmark", csv_file, *options]), True,
+                          "--full-reload" in options)
+
+    start_time = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.export(runner.read_jobs(), export_job)
+
+    return {"calls"         : {name: SimulatedApi.calls[name] for name in REPORTED_CALLS},
+            "simulated_time": round(SimulatedApi.clock, 2),
+            "python_time"   : round(time.perf_counter() - start_time, 3),
+            "errors"        : len(runner.error_report.errors)}
+
+
+def add_results(first : Dict[str, Any],
+                second: Dict[str, Any]) -> Dict[str, Any]:
+    """ Add the results of two runs
+
+    Args:
+        first:  result of the first run
+        second: result of the second run
+
+    Returns:
+        sum of the results
+    """
+
+    return {"calls"         : {name: first["calls"][name] + second["calls"][name] for name in REPORTED_CALLS},
+            "simulated_time": round(first["simulated_time"] + second["simulated_time"], 2),
+            "python_time"   : round(first["python_time"] + second["python_time"], 3),
+            "errors"        : first["errors"] + second["errors"]}
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    """ Format the results as table
+
+    Args:
+        results: result of each scenario
+
+    Returns:
+        table
+    """
+
+    header = ["scenario", "rows", *REPORTED_CALLS, "simulated s", "python s"]
+
+    lines = [[name, str(result["rows"]), *(str(result["calls"][call]) for call in REPORTED_CALLS),
+              f"{result['simulated_time']:.1f}", f"{result['python_time']:.2f}"]
+             for name, result in results.items()]
+
+    widths = [max(len(line[index]) for line in [header, *lines]) for index in range(len(header))]
+
+    return "\n".join("  ".join(value.rjust(width) if index else value.ljust(width)
+                               for index, (value, width) in enumerate(zip(line, widths)))
+                     for line in [header, *lines])
+
+
+def compare_results(results  : Dict[str, Dict[str, Any]],
+                    baseline : Dict[str, Dict[str, Any]],
+                    tolerance: float) -> List[str]:
+    """ Compare the results with a baseline
+
+    The Python time depends on the machine and is not compared.
+
+    Args:
+        results:   result of each scenario
+        baseline:  result of each scenario of the baseline
+        tolerance: allowed relative increase
+
+    Returns:
+        description of each regression
+    """
+
+    regressions = []
+
+    for name, result in results.items():
+        if (base := baseline.get(name)) is None:
+            continue
+
+        values = [("simulated_time", result["simulated_time"], base["simulated_time"]),
+                  *((call, result["calls"][call], base["calls"].get(call, 0)) for call in REPORTED_CALLS)]
+
+        regressions.extend(f"{name}: {value_name} {value} > {base_value}"
+                           for value_name, value, base_value in values if value > base_value * (1 + tolerance))
+
+    return regressions
+
+
+def main(argv: List[str]) -> int:
+    """ Run the benchmark
+
+    Args:
+        argv: command line arguments without the program name
+
+    Returns:
+        exit code, 1 in case of a regression
+    """
+
+    parser = argparse.ArgumentParser(prog = "ExportBenchmark", description = "Benchmark of the batch export")
+
+    parser.add_argument("--rows", type = int, default = 2000, help = "number of rows of the CSV file")
+    parser.add_argument("--projects", type = int, default = 25, help = "number of projects")
+    parser.add_argument("--type", nargs = "+", choices = ["IFC", "DWG", "combined"],
+                        default = ["IFC", "DWG", "combined"], help = "export types")
+    parser.add_argument("--seed", type = int, default = 1, help = "seed of the synthetic data")
+    parser.add_argument("--latency", action = "append", default = [], metavar = "NAME=SECONDS",
+                        help = "latency of an API function, e.g. RedrawAll=1.5")
+    parser.add_argument("--json", help = "write the results to this JSON file")
+    parser.add_argument("--baseline", help = "JSON file of a previous result to compare with")
+    parser.add_argument("--tolerance", type = float, default = 0.0, help = "allowed relative increase")
+
+    options = parser.parse_args(argv)
+
+    latencies = {name: float(value) for name, _, value in (entry.partition("=") for entry in options.latency)}
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    work_path = tempfile.mkdtemp(prefix = "export_benchmark_")
+
+    try:
+        for path_name in ("usr", "std", "prj", "projects"):
+            SimulatedApi.paths[path_name] = os.path.join(work_path, path_name, "")
+            os.makedirs(SimulatedApi.paths[path_name])
+
+        for export_type in options.type:
+            if export_type == "combined":
+                continue
+
+            csv_file = create_csv(os.path.join(work_path, export_type), export_type, options.rows, options.projects,
+                                  os.path.join(work_path, "output", export_type), options.seed)
+
+            for name, scenario_options, keep_manifest in SCENARIOS:
+                results[f"{export_type}.{name}"] = {"rows": options.rows,
+                                                    **run_scenario(csv_file, export_type, scenario_options,
+                                                                   keep_manifest, latencies)}
+
+        if "combined" in options.type:
+            merged_file, ifc_file, dwg_file = create_merged_csv(os.path.join(work_path, "combined"), options.rows,
+                                                                options.projects,
+                                                                os.path.join(work_path, "output", "combined"),
+                                                                options.seed)
+
+            results["combined.separate"] = {"rows": 2 * options.rows,
+                                            **add_results(run_scenario(ifc_file, "IFC", [], False, latencies),
+                                                          run_scenario(dwg_file, "DWG", [], False, latencies))}
+
+            for name, scenario_options, keep_manifest in SCENARIOS[1:]:
+                results[f"combined.{name}"] = {"rows": 2 * options.rows,
+                                               **run_scenario(merged_file, "", scenario_options, keep_manifest,
+                                                              latencies)}
+
+    finally:
+        shutil.rmtree(work_path, ignore_errors = True)
+
+    print(format_results(results))
+
+    if options.json:
+        with open(options.json, "w", encoding = "UTF-8") as file:
+            json.dump(results, file, indent = 2)
+
+    if not options.baseline:
+        return 0
+
+    with open(options.baseline, "r", encoding = "UTF-8") as file:
+        regressions = compare_results(results, json.load(file), options.tolerance)
+
+    for regression in regressions:
+        print("Regression: " + regression)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
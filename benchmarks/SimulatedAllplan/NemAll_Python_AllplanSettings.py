@@ -0,0 +1,36 @@
+""" Simulated NemAll_Python_AllplanSettings for the benchmark
+"""
+
+# pylint: disable=invalid-name
+
+from __future__ import annotations
+
+import SimulatedApi
+
+
+class AllplanPaths():
+    """ Simulated AllplanPaths, the paths are set by the benchmark
+    """
+
+    @staticmethod
+    def GetUsrPath() -> str:
+        """ Get the user path with a trailing separator
+        """
+
+        return SimulatedApi.paths["usr"]
+
+
+    @staticmethod
+    def GetStdPath() -> str:
+        """ Get the standard path with a trailing separator
+        """
+
+        return SimulatedApi.paths["std"]
+
+
+    @staticmethod
+    def GetCurPrjPath() -> str:
+        """ Get the path of the current project with a trailing separator
+        """
+
+        return SimulatedApi.paths["prj"]
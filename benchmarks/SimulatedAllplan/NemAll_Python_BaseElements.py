@@ -0,0 +1,210 @@
+""" Simulated NemAll_Python_BaseElements for the benchmark
+"""
+
+# pylint: disable=invalid-name
+
+from __future__ import annotations
+
+from typing import Any, List, Tuple
+
+import enum
+import os
+
+import SimulatedApi
+
+
+Ifc_2x3 = "Ifc_2x3"
+Ifc_4   = "Ifc_4"
+Ifc_4_3 = "Ifc_4_3"
+
+
+class DrawingFileLoadState(enum.IntEnum):
+    """ Load state of a drawing file
+    """
+
+    PassiveBackground = 1
+    ActiveBackground  = 2
+    ActiveForeground  = 3
+
+
+def write_output(path   : str,
+                 content: str):
+    """ Write a small file instead of an exported file
+
+    Args:
+        path:    path of the exported file
+        content: content of the file
+    """
+
+    with open(path, "w", encoding = "UTF-8") as file:
+        file.write(content)
+
+
+class DrawingFileService():
+    """ Simulated DrawingFileService
+    """
+
+    def __init__(self):
+        """ Initialization of class DrawingFileService
+        """
+
+        self.loaded: dict = {}
+
+
+    def UnloadAll(self, _doc: Any):
+        """ Unload all drawing files
+        """
+
+        SimulatedApi.record("UnloadAll")
+
+        self.loaded.clear()
+
+
+    def UnloadFile(self, _doc: Any, file_number: int):
+        """ Unload a drawing file
+        """
+
+        SimulatedApi.record("UnloadFile")
+
+        self.loaded.pop(file_number, None)
+
+
+    def LoadFile(self, _doc: Any, file_number: int, state: DrawingFileLoadState):
+        """ Load a drawing file
+        """
+
+        SimulatedApi.record("LoadFile")
+
+        if state == DrawingFileLoadState.ActiveForeground:
+            for number, loaded_state in self.loaded.items():
+                if loaded_state == DrawingFileLoadState.ActiveForeground:
+                    self.loaded[number] = DrawingFileLoadState.ActiveBackground
+
+        self.loaded[file_number] = state
+
+
+    def GetFileState(self) -> List[Tuple[int, int]]:
+        """ Get the loaded drawing files
+        """
+
+        SimulatedApi.record("GetFileState")
+
+        return [(number, int(state)) for number, state in self.loaded.items()]
+
+
+    def ExportIFC(self, _doc: Any, file_numbers: List[int], version: Any, path: str, _favorite: str):
+        """ Export the drawing files to IFC
+        """
+
+        SimulatedApi.record("ExportIFC", count = len(file_numbers))
+
+        write_output(path, f"ISO-10303-21;\n/* {version} {sorted(self.loaded)} */\nEND-ISO-10303-21;\n")
+
+
+    def ExportDWGByTheme(self, _doc: Any, path: str, _favorite: str, version: int):
+        """ Export the loaded drawing files to DWG
+        """
+
+        SimulatedApi.record("ExportDWGByTheme", count = len(self.loaded))
+
+        write_output(path, f"AC1032 {version} {sorted(self.loaded)}\n")
+
+
+class ProjectService():
+    """ Simulated ProjectService
+    """
+
+    @staticmethod
+    def OpenProject(_doc: Any, host_name: str, project_name: str) -> str:
+        """ Open a project
+        """
+
+        if (host_name, project_name) in SimulatedApi.missing_projects:
+            SimulatedApi.record("OpenProject", "OpenProject.active")
+            return "Project not exist"
+
+        if SimulatedApi.current_project == (host_name, project_name):
+            SimulatedApi.record("OpenProject", "OpenProject.active")
+            return "Active project"
+
+        SimulatedApi.record("OpenProject")
+
+        SimulatedApi.current_project = (host_name, project_name)
+
+        return "Project opened"
+
+
+    @staticmethod
+    def GetProjectPath(host_name: str, project_name: str) -> Tuple[bool, str]:
+        """ Get the path of a project
+        """
+
+        SimulatedApi.record("GetProjectPath")
+
+        if (host_name, project_name) in SimulatedApi.missing_projects:
+            return True, ""
+
+        return False, os.path.join(SimulatedApi.paths["projects"], project_name)
+
+
+    @staticmethod
+    def GetCurrentProjectNameAndHost() -> Tuple[str, str]:
+        """ Get the current project
+        """
+
+        return SimulatedApi.current_project[::-1] if SimulatedApi.current_project else ("", "")
+
+
+    @staticmethod
+    def GetCurrentUserAsBwsPath() -> str:
+        """ Get the current user
+        """
+
+        return "bench"
+
+
+    @staticmethod
+    def CloseAllplan():
+        """ Close Allplan
+        """
+
+        SimulatedApi.record("CloseAllplan")
+
+
+class LayerService():
+    """ Simulated LayerService
+    """
+
+    @staticmethod
+    def LoadFromFavoriteFile(_doc: Any, path: str) -> bool:
+        """ Load a layer favorite
+        """
+
+        SimulatedApi.record("LoadFromFavoriteFile")
+
+        return os.path.isfile(path)
+
+
+    @staticmethod
+    def SaveToFavoriteFile(_doc: Any, path: str) -> bool:
+        """ Save the layer state as favorite
+        """
+
+        SimulatedApi.record("SaveToFavoriteFile")
+
+        with open(path, "w", encoding = "UTF-8") as file:
+            file.write("# V1.00  01:01:2025 00.00.00\n@     0@" + "f" * 64 + "@\n")
+
+        return True
+
+
+class DrawingService():
+    """ Simulated DrawingService
+    """
+
+    @staticmethod
+    def RedrawAll(_doc: Any):
+        """ Redraw all views
+        """
+
+        SimulatedApi.record("RedrawAll")
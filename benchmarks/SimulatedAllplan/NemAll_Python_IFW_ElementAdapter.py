@@ -0,0 +1,9 @@
+""" Simulated NemAll_Python_IFW_ElementAdapter for the benchmark
+"""
+
+# pylint: disable=invalid-name
+
+
+class DocumentAdapter():
+    """ Simulated DocumentAdapter
+    """
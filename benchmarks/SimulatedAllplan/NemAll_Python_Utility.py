@@ -0,0 +1,40 @@
+""" Simulated NemAll_Python_Utility for the benchmark
+"""
+
+# pylint: disable=invalid-name
+
+from __future__ import annotations
+
+from typing import Any
+
+import SimulatedApi
+
+
+MB_OK = 0
+
+
+def ShowMessageBox(_message: str, _buttons: int) -> int:
+    """ Count a message box instead of showing it
+    """
+
+    SimulatedApi.record("ShowMessageBox")
+
+    return 0
+
+
+class ProgressBar():
+    """ Simulated ProgressBar
+    """
+
+    def StartProgressbar(self, *_args: Any):
+        """ Start the progress bar
+        """
+
+        SimulatedApi.record("StartProgressbar")
+
+
+    def MakeStep(self, _steps: int):
+        """ Make a step
+        """
+
+        SimulatedApi.record("MakeStep")
@@ -0,0 +1,80 @@
+""" State of the simulated Allplan API
+
+The modules NemAll_Python_BaseElements, NemAll_Python_Utility, NemAll_Python_AllplanSettings and
+NemAll_Python_IFW_ElementAdapter in this folder replace the Allplan API for the benchmark. Each call
+is counted and advances a virtual clock by its configured latency, no call sleeps. So the simulated
+time of a run shows the time spent in Allplan, the real time of a run the overhead of the Python side.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple
+
+
+#----------------- default latencies in seconds, the exports have an additional latency for each drawing file
+
+DEFAULT_LATENCIES = {"OpenProject"            : 6.0,
+                     "OpenProject.active"     : 0.05,
+                     "GetProjectPath"         : 0.01,
+                     "UnloadAll"              : 1.0,
+                     "LoadFile"               : 0.8,
+                     "UnloadFile"             : 0.3,
+                     "GetFileState"           : 0.01,
+                     "LoadFromFavoriteFile"   : 0.5,
+                     "SaveToFavoriteFile"     : 0.2,
+                     "RedrawAll"              : 2.0,
+                     "ExportIFC"              : 4.0,
+                     "ExportIFC.file"         : 0.5,
+                     "ExportDWGByTheme"       : 2.0,
+                     "ExportDWGByTheme.file"  : 0.3}
+
+latencies: Dict[str, float] = dict(DEFAULT_LATENCIES)
+
+calls: Counter = Counter()
+
+clock = 0.0
+
+paths = {"usr": "", "std": "", "prj": "", "projects": ""}
+
+missing_projects: Set[Tuple[str, str]] = set()
+
+current_project: Optional[Tuple[str, str]] = None
+
+
+def reset(new_latencies: Optional[Dict[str, float]] = None):
+    """ Reset the counters, the clock and the opened project
+
+    Args:
+        new_latencies: latencies replacing the default ones
+    """
+
+    global clock, current_project                   # pylint: disable=global-statement
+
+    latencies.clear()
+    latencies.update(DEFAULT_LATENCIES)
+    latencies.update(new_latencies or {})
+
+    calls.clear()
+    missing_projects.clear()
+
+    clock           = 0.0
+    current_project = None
+
+
+def record(name         : str,
+           latency_name : str = "",
+           count        : int = 0):
+    """ Count a call and advance the virtual clock
+
+    Args:
+        name:         name of the API function
+        latency_name: name of the latency, the name of the function if empty
+        count:        number of drawing files for the additional latency of an export
+    """
+
+    global clock                                    # pylint: disable=global-statement
+
+    calls[name] += 1
+
+    clock += latencies.get(latency_name or name, 0.0) + count * latencies.get(name + ".file", 0.0)
@@ -0,0 +1,229 @@
+""" Synthetic CSV files and setting files for the benchmark
+
+The rows are distributed randomly over the projects, so the scheduler has to group them. Each project
+has a pool of drawing files and some drawing file selections, alternating in the format of the IFC
+export window and of the building structure. Two of the layer favorites have the same layer states.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import csv
+import os
+import random
+
+from allplan_gmbh.BatchExport.ExportJob import COLUMNS, EXPORT_TYPE_COLUMN, SETTING_FOLDERS, get_setting_file
+
+
+FILES_PER_PROJECT      = 40
+SELECTIONS_PER_PROJECT = 6
+MAX_SELECTED_FILES     = 12
+LAYER_FAVORITES        = 4
+EXPORT_FAVORITES       = 2
+CONFIG_FILES           = 2
+
+
+def write_text(path   : str,
+               content: str):
+    """ Write a text file, the folder is created if not existing
+
+    Args:
+        path:    path of the file
+        content: content of the file
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+
+    with open(path, "w", encoding = "UTF-8") as file:
+        file.write(content)
+
+
+def create_selection(file_numbers   : List[int],
+                     structure_format: bool) -> str:
+    """ Create the content of a drawing file selection
+
+    Args:
+        file_numbers:     numbers of the selected drawing files
+        structure_format: create the format of the building structure instead of the IFC export window
+
+    Returns:
+        content of the drawing file selection
+    """
+
+    if structure_format:
+        files = "".join(f"    <File ID=\"{number:04d}\" State=\"{3 if index == 0 else 2}\" Activated=\"1\" />\n"
+                        for index, number in enumerate(file_numbers))
+
+        return "<?xml version=\"1.0\" encoding=\"utf-8\"?>\n" \
+               "<NemetschekBIMStructureSettings Activated=\"1\">\n  <Files>\n" + files + \
+               "  </Files>\n</NemetschekBIMStructureSettings>\n"
+
+    nodes = "".join(f"    <Teilbild Name=\"File {number}\" NodeID=\"{number:04d}\" />\n" for number in file_numbers)
+
+    return "<?xml version=\"1.0\" encoding=\"utf-8\"?>\n" \
+           "<NemetschekBIMStructureSelection Activated=\"1\">\n<SelectedNodes>\n" + nodes + \
+           "</SelectedNodes>\n</NemetschekBIMStructureSelection>\n"
+
+
+def create_layer_favorite(seed: int) -> str:
+    """ Create the content of a layer favorite
+
+    Args:
+        seed: seed of the layer states
+
+    Returns:
+        content of the layer favorite
+    """
+
+    generator = random.Random(seed)
+
+    return "# V1.00  01:01:2025 00.00.00\n" + \
+           "".join(f"@{block_id:6d}@{generator.getrandbits(256):064x}@\n" for block_id in range(0, 2048, 256))
+
+
+def create_csv(folder      : str,
+               export_type : str,
+               rows        : int,
+               projects    : int,
+               output_path : str,
+               seed        : int = 1) -> str:
+    """ Create a CSV file with its setting files
+
+    Args:
+        folder:      folder of the CSV file
+        export_type: "IFC" or "DWG"
+        rows:        number of rows
+        projects:    number of projects
+        output_path: destination folder of the exported files
+        seed:        seed of the random distribution
+
+    Returns:
+        path of the CSV file
+    """
+
+    generator     = random.Random(seed)
+    settings_path = os.path.join(folder, "")
+    columns       = COLUMNS[export_type]
+
+
+    #----------------- setting files
+
+    for index in range(LAYER_FAVORITES):
+        write_text(get_setting_file(settings_path, f"layer-{index}.lfa", "layerSettings"),
+                   create_layer_favorite(min(index, LAYER_FAVORITES - 2)))
+
+    for index in range(EXPORT_FAVORITES):
+        write_text(get_setting_file(settings_path, f"favorite-{index}.nth", SETTING_FOLDERS[export_type]),
+                   "@NemetschekThemeFile\n\n\"AOConfigfile\"=string:\"\"\n")
+
+    for index in range(CONFIG_FILES):
+        write_text(get_setting_file(settings_path, f"config-{index}.cfg", "cfgSettings"), f"config {index}\n")
+
+    selections: Dict[int, List[str]] = {}
+
+    for project in range(projects):
+        pool = list(range(1000, 1000 + FILES_PER_PROJECT))
+
+        for index in range(SELECTIONS_PER_PROJECT):
+            name = f"project-{project}-{index}.xml"
+
+            write_text(get_setting_file(settings_path, name, "dfSettings"),
+                       create_selection(generator.sample(pool, generator.randint(1, MAX_SELECTED_FILES)),
+                                        index % 2 == 1))
+
+            selections.setdefault(project, []).append(name)
+
+
+    #----------------- rows
+
+    csv_file = os.path.join(folder, export_type + "Export.csv")
+
+    fieldnames = ["hostName", "projectName", "dfSelection", "layerSetting", columns["export_favorite"],
+                  columns["version"], "destinationFolder", columns["filename"]]
+
+    if "config_file" in columns:
+        fieldnames.insert(5, columns["config_file"])
+
+    with open(csv_file, "w", encoding = "UTF-8", newline = "") as file:
+        writer = csv.DictWriter(file, fieldnames)
+        writer.writeheader()
+
+        for row_index in range(rows):
+            project = generator.randrange(projects)
+
+            row = {"hostName"                  : "localhost",
+                   "projectName"               : f"Project {project}",
+                   "dfSelection"               : generator.choice(selections[project]),
+                   "layerSetting"              : f"layer-{generator.randrange(LAYER_FAVORITES)}.lfa",
+                   columns["export_favorite"]  : f"favorite-{generator.randrange(EXPORT_FAVORITES)}.nth",
+                   columns["version"]          : "Ifc_4" if export_type == "IFC" else "32",
+                   "destinationFolder"         : output_path,
+                   columns["filename"]         : f"row{row_index:05d}." + export_type.lower()}
+
+            if "config_file" in columns:
+                row[columns["config_file"]] = f"config-{generator.randrange(CONFIG_FILES)}.cfg"
+
+            writer.writerow(row)
+
+    return csv_file
+
+
+def create_merged_csv(folder      : str,
+                      rows        : int,
+                      projects    : int,
+                      output_path : str,
+                      seed        : int = 1) -> List[str]:
+    """ Create a merged job file with an IFC and a DWG row for the same drawing files and layer favorite
+
+    The same rows are also written as separate IFC and DWG CSV files, for the comparison with two runs.
+
+    Args:
+        folder:      folder of the CSV files
+        rows:        number of IFC rows, the same number of DWG rows is added
+        projects:    number of projects
+        output_path: destination folder of the exported files
+        seed:        seed of the random distribution
+
+    Returns:
+        paths of the merged job file, the IFC CSV file and the DWG CSV file
+    """
+
+    ifc_file = create_csv(folder, "IFC", rows, projects, output_path, seed)
+    dwg_file = create_csv(folder, "DWG", rows, projects, output_path, seed)
+
+    with open(ifc_file, "r", encoding = "UTF-8", newline = "") as file:
+        ifc_rows = list(csv.DictReader(file))
+
+    dwg_columns = COLUMNS["DWG"]
+
+    dwg_rows = [{"hostName"                    : row["hostName"],
+                 "projectName"                 : row["projectName"],
+                 "dfSelection"                 : row["dfSelection"],
+                 "layerSetting"                : row["layerSetting"],
+                 dwg_columns["export_favorite"]: "favorite-0.nth",
+                 dwg_columns["config_file"]    : "config-0.cfg",
+                 dwg_columns["version"]        : "32",
+                 "destinationFolder"           : row["destinationFolder"],
+                 dwg_columns["filename"]       : os.path.splitext(row[COLUMNS["IFC"]["filename"]])[0] + ".dwg"}
+                for row in ifc_rows]
+
+    with open(dwg_file, "w", encoding = "UTF-8", newline = "") as file:
+        writer = csv.DictWriter(file, list(dwg_rows[0]) if dwg_rows else [])
+        writer.writeheader()
+        writer.writerows(dwg_rows)
+
+    merged_file = os.path.join(folder, "BatchExport.csv")
+
+    fieldnames = [EXPORT_TYPE_COLUMN, *dict.fromkeys([*(ifc_rows[0] if ifc_rows else {}),
+                                                      *(dwg_rows[0] if dwg_rows else {})])]
+
+    with open(merged_file, "w", encoding = "UTF-8", newline = "") as file:
+        writer = csv.DictWriter(file, fieldnames)
+        writer.writeheader()
+
+        for ifc_row, dwg_row in zip(ifc_rows, dwg_rows):
+            writer.writerow({EXPORT_TYPE_COLUMN: "IFC", **ifc_row})
+            writer.writerow({EXPORT_TYPE_COLUMN: "DWG", **dwg_row})
+
+    return [merged_file, ifc_file, dwg_file]